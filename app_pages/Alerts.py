@@ -2,24 +2,100 @@ import streamlit as st
 import pandas as pd
 
 from views.cards import section_title, kpi_card
-from views.tables import alert_cards
+from services.alert_sla import SLA_GROUPS
+from services.alerts import group_alerts
+from views.charts import bar_chart
+from views.tables import alert_cards, alert_group_cards
 
 
+def _render_sla(repo, alerts_all: pd.DataFrame):
+    with st.expander("Resolution SLA", expanded=False):
+        if len(alerts_all) == 0:
+            st.caption("No alert history yet.")
+            return
+        group_label = st.radio("Group by", list(SLA_GROUPS), horizontal=True, key="alerts_sla_group")
+        by = SLA_GROUPS[group_label]
+        summary = repo.alert_sla.summary(alerts_all, by)
+        st.caption("Minutes from creation to acknowledgement (tta) and to resolution (ttr).")
+        st.dataframe(summary.round(1), use_container_width=True, hide_index=True)
 
-def render(repo):
-    section_title("Alerts Center", "Monitor and triage patient alerts requiring attention", right_html="")
+        # resolution and acknowledgement are separate SLAs: an acknowledged alert is still open
+        for pending, title, empty in (
+            ("is_open", "Unresolved alerts by age", "No unresolved alerts."),
+            ("is_unacked", "Unacknowledged alerts by age", "Every open alert has been acknowledged."),
+        ):
+            aging = repo.alert_sla.aging(alerts_all, pending=pending)
+            st.markdown(f"<div class='card-sub'>{title}</div>", unsafe_allow_html=True)
+            if aging.to_numpy().sum() == 0:
+                st.caption(empty)
+            else:
+                bar_chart(aging.sum(axis=1).rename("alerts").reset_index(), "age", "alerts", height=220)
+                st.dataframe(aging, use_container_width=True)
 
-    alerts_all = repo.list_alerts()
-    alerts_all = alerts_all if isinstance(alerts_all, pd.DataFrame) else pd.DataFrame()
 
-    if len(alerts_all) and "status" in alerts_all.columns:
-        open_n = int((alerts_all["status"].astype(str).str.lower() == "open").sum())
-        resolved_n = int((alerts_all["status"].astype(str).str.lower() == "resolved").sum())
-    else:
-        open_n = 0
-        resolved_n = 0
+def _keep_known(key: str, options: dict):
+    """Drop stored selections that are no longer among the options."""
+    if key in st.session_state:
+        st.session_state[key] = [v for v in st.session_state[key] if v in options]
+
+
+def _render_bulk_triage(repo, df: pd.DataFrame, groups: pd.DataFrame | None):
+    last = st.session_state.pop("alerts_triage_result", None)
+    if last:
+        done, failed = last
+        if done:
+            st.success(f"Updated {done} alert(s).")
+        for aid, err in failed.items():
+            st.error(f"Alert {aid}: {err}")
+
+    if df is None or len(df) == 0:
+        return
+
+    with st.container(border=True):
+        st.markdown(
+            "<div class='card-title'>Bulk Triage</div>"
+            "<div class='card-sub'>Acknowledge or resolve several alerts (or whole groups) at once</div>",
+            unsafe_allow_html=True,
+        )
+        if groups is not None:
+            # keyed on the group's oldest alert_id: group positions shift whenever alerts change
+            by_key = {str(r["alert_ids"][0]): r for r in groups.to_dict("records") if len(r["alert_ids"])}
+            labels = {k: f"{r['patient_name']} • {r['type']} • {r['severity']} ×{r['count']}" for k, r in by_key.items()}
+            _keep_known("alerts_bulk_groups", labels)
+            picked = st.multiselect("Groups", options=list(labels), format_func=labels.get, key="alerts_bulk_groups")
+            ids = [str(a) for k in picked for a in by_key[k]["alert_ids"]]
+        else:
+            labels = dict(zip(df["alert_id"].astype(str), df["patient_name"].astype(str) + " • " + df["type"].astype(str)))
+            _keep_known("alerts_bulk_ids", labels)
+            picked = st.multiselect("Alerts", options=list(labels), format_func=lambda a: f"{a} — {labels[a]}", key="alerts_bulk_ids")
+            ids = list(picked)
+
+        msg = st.text_input("Message (optional)", key="alerts_bulk_msg")
+        b1, b2 = st.columns(2, gap="large")
+        action = None
+        with b1:
+            if st.button("Acknowledge", use_container_width=True, disabled=not ids, key="alerts_bulk_ack"):
+                action = "acknowledged"
+        with b2:
+            if st.button("Resolve", type="primary", use_container_width=True, disabled=not ids, key="alerts_bulk_resolve"):
+                action = "resolved"
 
-    total_n = int(len(alerts_all))
+        if action:
+            failed = repo.update_alerts(ids, action, msg.strip())
+            st.session_state["alerts_triage_result"] = (len(set(ids)) - len(failed), failed)
+            st.session_state.pop("alerts_bulk_groups", None)
+            st.session_state.pop("alerts_bulk_ids", None)
+            st.rerun()
+
+
+def render(repo):
+    section_title("Alerts Center", "Monitor and triage patient alerts requiring attention", right_html="")
+
+    view = repo.alerts_view()
+    alerts_all = view.df
+    open_n = view.count("status", "open")
+    resolved_n = view.count("status", "resolved")
+    total_n = int(len(view))
 
     c1, c2, c3 = st.columns(3, gap="large")
     with c1:
@@ -31,10 +107,10 @@ def render(repo):
 
     st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True)
 
-    sev_vals = alerts_all["severity"].astype(str).str.lower().unique().tolist() if (len(alerts_all) and "severity" in alerts_all.columns) else []
-    st_vals = alerts_all["status"].astype(str).str.lower().unique().tolist() if (len(alerts_all) and "status" in alerts_all.columns) else []
-    sev_opts = ["All"] + sorted({v for v in sev_vals if v and v != "nan"})
-    st_opts = ["All"] + sorted({v for v in st_vals if v and v != "nan"})
+    _render_sla(repo, alerts_all)
+
+    sev_opts = ["All"] + view.options("severity")
+    st_opts = ["All"] + view.options("status")
 
     f1, f2 = st.columns([1, 1], gap="large")
     with f1:
@@ -42,10 +118,35 @@ def render(repo):
     with f2:
         status = st.selectbox("Status", st_opts, index=0)
 
-    df = repo.list_alerts(severity=severity, status=status)
-    st.caption(f"Showing {len(df)} alerts")
+    provisional = repo.evaluate_anomalies()
+    if len(provisional):
+        with st.container(border=True):
+            st.markdown(
+                "<div class='card-title'>Provisional Alerts</div>"
+                "<div class='card-sub'>Flagged locally from live device readings; not yet in the alert log</div>",
+                unsafe_allow_html=True,
+            )
+            alert_cards(provisional)
 
-    alert_cards(df)
+    df = repo.filter_alerts(severity=severity, status=status)
+
+    g1, g2 = st.columns([1, 1], gap="large")
+    with g1:
+        grouped = st.toggle("Group similar alerts", value=True, key="alerts_grouped")
+    with g2:
+        window_min = st.number_input(
+            "Group window (minutes)", min_value=1, max_value=24 * 60, value=30, step=5, key="alerts_group_window", disabled=not grouped
+        )
+
+    groups = group_alerts(df, window_min=float(window_min)) if grouped else None
+    _render_bulk_triage(repo, df, groups)
+
+    if grouped:
+        st.caption(f"Showing {len(df)} alerts in {len(groups)} groups")
+        alert_group_cards(groups)
+    else:
+        st.caption(f"Showing {len(df)} alerts")
+        alert_cards(df)
 
     with st.container(border=True):
         st.markdown(
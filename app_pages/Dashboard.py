@@ -2,10 +2,13 @@
 import streamlit as st
 import textwrap
 import pandas as pd
-from datetime import datetime, timedelta, timezone
 
 from views.cards import section_title, kpi_card
-from views.charts import line_chart, bar_chart
+from views.charts import line_chart, bar_chart, band_chart, waveform_chart, state_chart
+from services.ai_history import LEVEL_TEXT, ai_conf_pct, ai_status
+from services.rollups import WINDOWS
+from services.metric_registry import METRICS, SENSOR_METRICS, format_value
+from services.timeseries import from_epoch_ms, minmax_decimate, now_ms
 from services.metrics import (
     kpi_dashboard,
     chart_daily_adherence_training,
@@ -13,6 +16,14 @@ from services.metrics import (
     chart_grip_improvement,
 )
 
+# ECG is sampled at hundreds of Hz: keep a short raw strip locally, pull big pages
+ECG_STRIPS = {"1 min": 60_000, "5 min": 5 * 60_000, "10 min": 10 * 60_000}
+ECG_PAGE_LIMIT = 20_000
+ECG_MAX_POINTS = 6_000
+
+AI_TREND_HOURS = 6
+
+
 def _dedent(html: str) -> str:
     return textwrap.dedent(html).strip()
 
@@ -275,17 +286,6 @@ def _fmt(val, decimals: int | None = None) -> str:
         return str(val)
 
 
-def _pick_metric(snap: dict, aliases: list[str]):
-    for a in aliases:
-        if a in snap:
-            return snap.get(a)
-        if a.upper() in snap:
-            return snap.get(a.upper())
-        if a.lower() in snap:
-            return snap.get(a.lower())
-    return None
-
-
 def _get_devices_df(repo) -> pd.DataFrame:
     df = repo.list_devices()
     return df if isinstance(df, pd.DataFrame) else pd.DataFrame()
@@ -347,33 +347,25 @@ def _render_live_sensor_card(repo):
         with headR:
             device_id = _device_selector(repo, key_prefix="dash_live")
 
-        snap = repo.get_latest_sensor_reading(device_id)
+        snap = repo.get_live_sensor_reading(device_id)
         if not snap:
             st.caption("No sensor readings yet for this device.")
             return
 
-        fields = [
-            ("Heart Rate", ["Heart Rate", "hr"], "bpm", 0),
-            ("SpO₂", ["SPO2", "spo2"], "%", 0),
-            ("ECG", ["ECG", "ecg"], "", 2),
-            ("Body Temperature", ["Body Temperature", "temp_ds18b20"], "°C", 1),
-            ("Room Temperature", ["Room Temperature", "dht_temp"], "°C", 1),
-            ("Room Humidity", ["Room Humidity", "dht_hum"], "%", 1),
-            ("Sweat", ["Sweat", "gsr"], "", 0),
-            ("Loadcell", ["LOADCELL_KG", "loadcell_kg"], "kg", 1),
-        ]
+        stream = repo.sensor_streams.subscribe(device_id)
+        st.caption({"stream": "● Live stream", "poll": "Polling (no stream endpoint)"}.get(stream.mode, "Connecting…"))
 
         tiles = []
-        for label, aliases, unit, dec in fields:
-            v = _pick_metric(snap, aliases)
-            v_txt = _fmt(v, dec)
+        for m in METRICS:
+            v_txt = format_value(m.code, snap.get(m.code))
+            unit = m.unit
             if unit and v_txt != "—":
                 value_html = f"{v_txt}<span class='pt-sensor-unit'>{unit}</span>"
             else:
                 value_html = f"{v_txt}"
             tiles.append(
                 f"<div class='pt-sensor-tile'>"
-                f"<div class='pt-sensor-label'>{label}</div>"
+                f"<div class='pt-sensor-label'>{m.label}</div>"
                 f"<div class='pt-sensor-value'>{value_html}</div>"
                 f"</div>"
             )
@@ -381,54 +373,73 @@ def _render_live_sensor_card(repo):
         html = "<div class='pt-sensor-wrap'><div class='pt-sensor-grid'>" + "".join(tiles) + "</div></div>"
         st.markdown(html, unsafe_allow_html=True)
 
-
-def _iso_z(dt: datetime) -> str:
-    # backend accepts ISO with Z
-    return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
-
-
-def _fetch_sensor_series(repo, device_id: str, metric_code: str, minutes: int = 30, limit: int = 1500) -> pd.DataFrame:
-    """
-    Pull timeseries from backend:
-      GET /sensor-readings?device_id=...&metric=HR&start=...&order=asc&limit=...
-    """
-    end_dt = datetime.now(timezone.utc)
-    start_dt = end_dt - timedelta(minutes=minutes)
-
-    params = {
-        "device_id": device_id,
-        "metric": metric_code,
-        "start": _iso_z(start_dt),
-        "end": _iso_z(end_dt),
-        "order": "asc",
-        "limit": int(limit),
-    }
-
-    getter = getattr(repo, "_get", None)
-    if not callable(getter):
-        return pd.DataFrame(columns=["ts", "value", "unit"])
-
-    try:
-        items = getter("/sensor-readings", params=params) or []
-    except Exception:
-        return pd.DataFrame(columns=["ts", "value", "unit"])
-
-    rows = []
-    for x in items:
-        rows.append(
-            {
-                "ts": pd.to_datetime(x.get("ts"), errors="coerce"),
-                "value": x.get("value"),
-                "unit": x.get("unit") or "",
-            }
-        )
-    df = pd.DataFrame(rows)
-    if len(df):
-        df = df.dropna(subset=["ts"]).sort_values("ts")
-
-        df["value"] = pd.to_numeric(df["value"], errors="coerce")
-        df = df.dropna(subset=["value"])
-    return df
+        # trend straight from the stream's ring buffer: no request per rerun
+        trend = [(m.label, m.code) for m in METRICS if m.code != "ECG" and len(stream.series(m.code)[0]) >= 2]
+        if trend:
+            label, code = st.selectbox("Live trend", options=trend, format_func=lambda x: x[0], key="dash_live_trend")
+            ts, val = stream.series(code)
+            line_chart(pd.DataFrame({"ts": from_epoch_ms(ts), "value": val}), x="ts", y="value", height=200)
+
+
+def _raw_window(repo, device_id: str, metric_code: str, span_ms: int, max_points: int = 2000):
+    # raw readings straight from the local mmap store once it holds the whole window
+    store = getattr(repo, "ts_store", None)
+    if store is None:
+        return None
+    now = now_ms()
+    s = store.sync(repo, device_id, metric_code, now=now)
+    if not store.covers(s, now - span_ms, now):
+        return None
+    return s.frame(now - span_ms, now, max_points=max_points), s
+
+
+def _render_ecg_viewer(repo, device_id: str, strip_ms: int):
+    store = getattr(repo, "ts_store", None)
+    if store is None:
+        st.caption("ECG viewer needs the local sensor store.")
+        return
+
+    now = now_ms()
+    s = store.sync(
+        repo,
+        device_id,
+        "ECG",
+        now=now,
+        history_ms=max(ECG_STRIPS.values()),
+        page_limit=ECG_PAGE_LIMIT,
+    )
+    ts, val = s.range(now - strip_ms, now + 1)
+    if len(ts) < 2:
+        st.caption("No ECG samples for this device in the selected strip.")
+        return
+
+    span_s = (int(ts[-1]) - int(ts[0])) / 1000.0
+    rate = (len(ts) - 1) / span_s if span_s > 0 else 0.0
+
+    # overview: whole strip, min/max decimated so R peaks stay visible
+    o_ts, o_val = minmax_decimate(ts, val, ECG_MAX_POINTS // 2)
+    st.caption(f"{len(ts):,} samples over {span_s:.0f}s (~{rate:.0f} Hz) • overview shows {len(o_ts):,} points")
+    waveform_chart(from_epoch_ms(o_ts), o_val, height=180)
+
+    # zoom: seconds before the latest sample; small windows come back at full resolution
+    span_r = float(round(span_s, 1))
+    if span_r <= 0:
+        return
+    lo_s, hi_s = st.slider(
+        "Zoom (seconds before latest sample)",
+        min_value=-span_r,
+        max_value=0.0,
+        value=(-min(10.0, span_r), 0.0),
+        step=min(0.5, span_r),
+        key=f"dash_ecg_zoom_{device_id}",
+    )
+    end = int(ts[-1])
+    z_ts, z_val = s.range(end + int(lo_s * 1000), end + int(hi_s * 1000) + 1)
+    full = len(z_ts) <= ECG_MAX_POINTS
+    if not full:
+        z_ts, z_val = minmax_decimate(z_ts, z_val, ECG_MAX_POINTS // 2)
+    st.caption(f"Zoomed: {len(z_ts):,} points ({'full resolution' if full else 'decimated'})")
+    waveform_chart(from_epoch_ms(z_ts), z_val, height=300)
 
 
 def _render_sensor_visualization_card(repo):
@@ -436,21 +447,12 @@ def _render_sensor_visualization_card(repo):
         headL, headR = st.columns([0.72, 0.28], gap="large")
         with headL:
             st.markdown("<div class='pt-card-title'>Sensor Visualization</div>", unsafe_allow_html=True)
-            st.markdown("<div class='pt-card-sub'>Select one sensor and view recent readings</div>", unsafe_allow_html=True)
+            st.markdown("<div class='pt-card-sub'>Select one sensor and a time window</div>", unsafe_allow_html=True)
 
         with headR:
             device_id = _device_selector(repo, key_prefix="dash_vis")
 
-        metric_options = [
-            ("Heart Rate", "HR"),
-            ("SpO₂", "SPO2"),
-            ("ECG", "ECG"),
-            ("Body Temperature", "TEMP_DS18B20"),
-            ("Room Temperature", "DHT_TEMP"),
-            ("Room Humidity", "DHT_HUM"),
-            ("Sweat", "GSR"),
-            ("Loadcell (kg)", "LOADCELL_KG"),
-        ]
+        metric_options = SENSOR_METRICS
 
         # persist selection
         default_code = st.session_state.get("dash_vis_metric_code") or "HR"
@@ -460,24 +462,39 @@ def _render_sensor_visualization_card(repo):
         except Exception:
             default_idx = 0
 
-        label, metric_code = st.selectbox(
-            "Sensor",
-            options=metric_options,
-            index=default_idx,
-            format_func=lambda x: x[0],
-            key="dash_vis_metric_select",
-        )
-        metric_code = metric_code  
+        cS, cW = st.columns([0.6, 0.4], gap="large")
+        with cS:
+            label, metric_code = st.selectbox(
+                "Sensor",
+                options=metric_options,
+                index=default_idx,
+                format_func=lambda x: x[0],
+                key="dash_vis_metric_select",
+            )
+        with cW:
+            if metric_code == "ECG":
+                strip = st.selectbox("Strip", options=list(ECG_STRIPS), index=2, key="dash_ecg_strip")
+            else:
+                window = st.selectbox("Window", options=list(WINDOWS), index=0, key="dash_vis_window")
         st.session_state["dash_vis_metric_code"] = metric_code
 
-        df = _fetch_sensor_series(repo, device_id=device_id, metric_code=metric_code, minutes=30, limit=2000)
+        if metric_code == "ECG":
+            _render_ecg_viewer(repo, device_id, ECG_STRIPS[strip])
+            return
+
+        span_ms, tier = WINDOWS[window]
+        raw = _raw_window(repo, device_id, metric_code, span_ms) if tier == "1s" else None
+        if raw is not None:
+            df, series = raw
+            unit, last_val = series.unit, (df["value"].iloc[-1] if len(df) else None)
+        else:
+            df, series = repo.sensor_rollups.window(repo, device_id, metric_code, window)
+            unit, last_val = series.unit, series.last_value
 
         if df is None or len(df) == 0:
-            st.caption("No data available for the selected sensor (last 30 minutes).")
+            st.caption(f"No data available for the selected sensor (last {window}).")
             return
 
-        unit = (df["unit"].dropna().iloc[-1] if "unit" in df.columns and len(df["unit"].dropna()) else "").strip()
-        last_val = df["value"].iloc[-1]
         unit_txt = f" {unit}" if unit else ""
 
         st.markdown(
@@ -485,8 +502,10 @@ def _render_sensor_visualization_card(repo):
             unsafe_allow_html=True,
         )
 
-        plot_df = df[["ts", "value"]].copy()
-        line_chart(plot_df, x="ts", y="value", y_range=None, height=300)
+        if raw is not None:
+            line_chart(df, x="ts", y="value", y_range=None, height=300)
+        else:
+            band_chart(df, x="ts", y="mean", y_lo="min", y_hi="max", y_range=None, height=300)
 
 
 def _render_ai_health_prediction_card(repo):
@@ -499,52 +518,13 @@ def _render_ai_health_prediction_card(repo):
         with headR:
             device_id = _device_selector(repo, key_prefix="dash_ai")
 
-        snap = {}
-        getter = getattr(repo, "get_latest_ai", None)
-        if callable(getter):
-            try:
-                snap = getter(device_id) or {}
-            except Exception:
-                snap = {}
-
-        if not snap:
-            getter2 = getattr(repo, "_get", None)
-            if callable(getter2):
-                try:
-                    snap = getter2(f"/devices/{device_id}/ai/latest") or {}
-                except Exception:
-                    snap = {}
-
+        snap = repo.get_latest_ai(device_id)
         if not snap:
             st.caption("No AI prediction available yet for this device.")
             return
 
-        raw_label = (snap.get("ai_label") or snap.get("label") or "").strip()
-        raw_conf = snap.get("ai_conf", snap.get("conf", None))
-
-        # Normalize label -> SAFE / WARNING / DANGER (unchanged logic intent)
-        norm = raw_label.lower().strip()
-        if norm in {"safe", "optimal", "ok", "normal"}:
-            status_key = "optimal"
-            status_text = "SAFE"
-        elif norm in {"warning", "low", "low_risk", "low risk", "caution"}:
-            status_key = "low"
-            status_text = "WARNING"
-        elif norm in {"danger", "high", "high_risk", "high risk", "critical"}:
-            status_key = "high"
-            status_text = "DANGER"
-        else:
-            status_key = "low"
-            status_text = raw_label.upper() if raw_label else "UNKNOWN"
-
-        conf_pct = 0.0
-        try:
-            if raw_conf is not None:
-                c = float(raw_conf)
-                conf_pct = (c * 100.0) if 0.0 <= c <= 1.0 else c
-                conf_pct = max(0.0, min(100.0, conf_pct))
-        except Exception:
-            conf_pct = 0.0
+        status_key, status_text, _ = ai_status(snap.get("ai_label") or snap.get("label"))
+        conf_pct = ai_conf_pct(snap.get("ai_conf", snap.get("conf")))
 
         theme_cls = {"optimal": "pt-ai-theme-optimal", "low": "pt-ai-theme-low", "high": "pt-ai-theme-high"}[status_key]
 
@@ -565,6 +545,11 @@ def _render_ai_health_prediction_card(repo):
         </div>
         """
         st.markdown(_dedent(html), unsafe_allow_html=True)
+
+        hist = repo.get_ai_history(device_id, hours=AI_TREND_HOURS)
+        if len(hist) >= 2:
+            st.markdown(f"<div class='pt-card-sub'>Predicted state, last {AI_TREND_HOURS} h</div>", unsafe_allow_html=True)
+            state_chart(hist, "ts", "level", LEVEL_TEXT, height=170)
         st.markdown("<div style='height:14px'></div>", unsafe_allow_html=True)
 
 def render(repo):
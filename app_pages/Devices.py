@@ -1,8 +1,62 @@
 import streamlit as st
 import pandas as pd
+from datetime import timedelta
 
 from views.cards import section_title, kpi_card, simple_card
+from views.charts import line_chart
 from views.tables import devices_table
+from services.metric_registry import SENSOR_METRICS, snapshot_items
+from services.timeseries import now_ms
+
+
+def _render_sensor_history(repo, did: str):
+    store = getattr(repo, "ts_store", None)
+    if store is None:
+        return
+
+    with st.container(border=True):
+        st.markdown(
+            "<div class='card-title'>Sensor History</div>"
+            "<div class='card-sub'>Scroll back through readings stored locally for this device</div>",
+            unsafe_allow_html=True,
+        )
+        label, metric_code = st.selectbox(
+            "Sensor",
+            options=SENSOR_METRICS,
+            format_func=lambda x: x[0],
+            key="dev_hist_metric_select",
+        )
+
+        s = store.sync(repo, did, metric_code, now=now_ms())
+        first, last = s.first_ts, s.last_ts
+        if first is None or last is None or last <= first:
+            st.caption("No stored readings for this sensor yet.")
+            return
+
+        lo_dt = pd.Timestamp(first, unit="ms").to_pydatetime()
+        hi_dt = pd.Timestamp(last, unit="ms").to_pydatetime()
+        default_lo = max(lo_dt, hi_dt - timedelta(hours=1))
+        start_dt, end_dt = st.slider(
+            "Range (UTC)",
+            min_value=lo_dt,
+            max_value=hi_dt,
+            value=(default_lo, hi_dt),
+            step=timedelta(minutes=1),
+            format="YYYY-MM-DD HH:mm",
+            key=f"dev_hist_range_{did}_{metric_code}",
+        )
+
+        start_ms = int(pd.Timestamp(start_dt).value // 1_000_000)
+        end_ms = int(pd.Timestamp(end_dt).value // 1_000_000) + 1
+        n = len(s.range(start_ms, end_ms)[0])
+        df = s.frame(start_ms, end_ms, max_points=3000)
+        if len(df) == 0:
+            st.caption("No readings in the selected range.")
+            return
+
+        unit_txt = f" ({s.unit})" if s.unit else ""
+        st.caption(f"{n:,} readings{unit_txt}" + (f", thinned to {len(df):,} points" if n > len(df) else ""))
+        line_chart(df, x="ts", y="value", y_range=None, height=280)
 
 
 def render(repo):
@@ -26,7 +80,69 @@ def render(repo):
 
     st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True)
 
+    t_fleet, t_device = st.tabs(["Fleet", "Device Details"])
+    with t_fleet:
+        _render_fleet(repo, df)
+        _render_silent_devices(repo)
+    with t_device:
+        _render_device_details(repo, df)
 
+
+def _render_fleet(repo, df: pd.DataFrame):
+    with st.container(border=True):
+        st.markdown(
+            "<div class='card-title'>Fleet Status</div>"
+            "<div class='card-sub'>Status, battery and latest vitals for every device</div>",
+            unsafe_allow_html=True,
+        )
+        if len(df) == 0:
+            st.caption("No devices registered.")
+            return
+
+        fleet = repo.fleet.scan(repo, df, force=st.button("Rescan", key="fleet_rescan"))
+        show = fleet.copy()
+        show["last_seen_at"] = show["last_seen_at"].dt.strftime("%Y-%m-%d %H:%M")
+        st.dataframe(
+            show,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "battery_pct": st.column_config.ProgressColumn("Battery", min_value=0, max_value=100, format="%d%%"),
+                "hr": st.column_config.NumberColumn("HR (bpm)", format="%.0f"),
+                "spo2": st.column_config.NumberColumn("SpO₂ (%)", format="%.0f"),
+            },
+        )
+
+
+def _render_silent_devices(repo):
+    hb = getattr(repo, "heartbeats", None)
+    if hb is None:
+        return
+
+    with st.container(border=True):
+        st.markdown(
+            "<div class='card-title'>Silent Devices</div>"
+            "<div class='card-sub'>No heartbeat within the threshold, from the local heartbeat index</div>",
+            unsafe_allow_html=True,
+        )
+        minutes = st.number_input("Silent for more than (minutes)", min_value=1, max_value=1440, step=1, key="stale_minutes", value=10)
+        silent = hb.silent_for(float(minutes))
+        if len(silent) == 0:
+            st.caption("All devices reported within the threshold.")
+            return
+
+        cL, cR = st.columns([0.68, 0.32], gap="large")
+        with cL:
+            show = silent.copy()
+            show["last_seen_at"] = show["last_seen_at"].dt.strftime("%Y-%m-%d %H:%M")
+            show["silent_min"] = show["silent_min"].round(0)
+            st.dataframe(show, use_container_width=True, hide_index=True)
+        with cR:
+            per_t = hb.offline_by_therapist(float(minutes)).rename_axis("therapist").reset_index()
+            st.dataframe(per_t, use_container_width=True, hide_index=True)
+
+
+def _render_device_details(repo, df: pd.DataFrame):
     did = devices_table(df)
     if not did:
         return
@@ -52,8 +168,10 @@ def render(repo):
         if not snap:
             st.caption("No sensor readings yet.")
         else:
-            keys = sorted(snap.keys())
-            cols = st.columns(min(4, len(keys)))
-            for i, k in enumerate(keys):
+            items = snapshot_items(snap)
+            cols = st.columns(min(4, len(items)))
+            for i, (label, value, unit) in enumerate(items):
                 with cols[i % len(cols)]:
-                    simple_card(k.upper(), "", f"<b>{snap.get(k)}</b>")
+                    simple_card(label, unit, f"<b>{value}</b>")
+
+    _render_sensor_history(repo, did)
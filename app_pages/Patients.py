@@ -2,6 +2,7 @@
 import streamlit as st
 import pandas as pd
 
+from services.metric_registry import snapshot_items
 from views.cards import section_title, simple_card
 from views.tables import patients_table, sessions_table
 
@@ -16,25 +17,67 @@ def _fmt(v, suffix: str = "") -> str:
         pass
     return f"{v}{suffix}"
 
-def _baseline_current(sessions: pd.DataFrame, col: str):
-    if sessions is None or len(sessions) == 0 or col not in sessions.columns:
-        return (None, None)
-    df = sessions.copy()
-    df = df.dropna(subset=[col])
-    if len(df) == 0:
-        return (None, None)
+_PROGRESS_LABELS = {
+    "grip": ("Grip avg", " kg", 1),
+    "rom": ("ROM avg", "°", 1),
+    "adherence": ("Adherence", "%", 0),
+    "pain": ("Pain", "", 1),
+}
 
-    if "status" in df.columns and (df["status"] == "completed").any():
-        df = df[df["status"] == "completed"]
 
-    df = df.sort_values("started_at")
-    return (df.iloc[0][col], df.iloc[-1][col])
+def _progress_value(metric: str, v) -> str:
+    if v is None or pd.isna(v):
+        return "—"
+    _, unit, dec = _PROGRESS_LABELS[metric]
+    if metric == "adherence":
+        v = v * 100.0
+    return f"{v:.{dec}f}{unit}"
+
+
+def _ordinal(n: int) -> str:
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+
+def _cohort_progress_card(progress: pd.DataFrame):
+    with st.expander("Cohort Progress", expanded=False):
+        if progress is None or len(progress) == 0:
+            st.caption("No session records yet.")
+            return
+        metric = st.selectbox(
+            "Metric",
+            list(_PROGRESS_LABELS),
+            format_func=lambda m: _PROGRESS_LABELS[m][0],
+            key="cohort_progress_metric",
+        )
+        cols = [f"{metric}_{s}" for s in ("baseline", "current", "delta", "slope")]
+        show = progress[["patient_name", "sessions", *cols]].copy()
+        if metric == "adherence":
+            show[cols] = show[cols] * 100.0
+        show = show.rename(
+            columns={
+                "patient_name": "Patient",
+                "sessions": "Sessions",
+                cols[0]: "Baseline",
+                cols[1]: "Current",
+                cols[2]: "Δ",
+                cols[3]: "Δ / week",
+            }
+        )
+        st.dataframe(
+            show.sort_values("Δ", ascending=(metric == "pain"), na_position="last").round(2),
+            use_container_width=True,
+            hide_index=True,
+        )
 
 
 def render(repo):
     section_title("Patients", "Manage and monitor all patients in your care", right_html="")
 
     patients = repo.list_patients()
+    progress = repo.cohort_progress()
+    _cohort_progress_card(progress)
+
     pid = patients_table(patients)
     if not pid:
         return
@@ -42,7 +85,6 @@ def render(repo):
     st.session_state.selected_patient_id = pid
 
     p = repo.get_patient(pid) or {}
-    sessions = repo.list_sessions(patient_id=pid)
     alerts_open = repo.list_alerts(patient_id=pid, status="open")
 
     row = None
@@ -96,8 +138,8 @@ def render(repo):
 
         st.markdown("<div style='height:10px'></div>", unsafe_allow_html=True)
 
-        base_grip, cur_grip = _baseline_current(sessions, "grip_avg_kg")
-        base_rom, cur_rom = _baseline_current(sessions, "rom_avg_deg")
+        prow = progress[progress["patient_id"] == str(pid)]
+        prow = prow.iloc[0] if len(prow) else None
 
         with st.container(border=True):
             st.markdown(
@@ -105,11 +147,23 @@ def render(repo):
                 "<div class='card-sub'>Baseline = first recorded session; Current = latest</div>",
                 unsafe_allow_html=True,
             )
-            g1, g2 = st.columns(2, gap="large")
-            with g1:
-                st.markdown(f"**Grip avg (kg)**\n\nBaseline: 12.0\nCurrent: 17.4")
-            with g2:
-                st.markdown("")
+            pcols = st.columns(len(_PROGRESS_LABELS), gap="large")
+            for col, (m, (label, _, _)) in zip(pcols, _PROGRESS_LABELS.items()):
+                with col:
+                    base = prow[f"{m}_baseline"] if prow is not None else None
+                    cur = prow[f"{m}_current"] if prow is not None else None
+                    st.markdown(f"**{label}**\n\nBaseline: {_progress_value(m, base)}\nCurrent: {_progress_value(m, cur)}")
+
+            ranks = repo.cohort_ranks
+            ranks.update(progress, patients.set_index("patient_id")["primary_condition"])
+            parts = []
+            for m, label in (("rom_delta", "ROM"), ("grip_delta", "Grip")):
+                pct, n = ranks.percentile(pid, m)
+                if pct is not None and n > 1:
+                    parts.append(f"{label} improvement: {_ordinal(round(pct))} percentile")
+            if parts:
+                cond = row.get("primary_condition") if isinstance(row, dict) else "—"
+                st.caption(" • ".join(parts) + f" among {cond} patients")
 
         if device_id:
             snap = repo.get_latest_sensor_reading(device_id)
@@ -120,14 +174,14 @@ def render(repo):
                         "<div class='card-sub'>Most recent metrics for mapped device</div>",
                         unsafe_allow_html=True,
                     )
-                    show_keys = [k for k in ["hr", "spo2", "gsr", "loadcell_kg", "temp_ds18b20", "dht_temp", "dht_hum", "ecg"] if k in snap]
-                    if not show_keys:
+                    items = snapshot_items(snap, known_only=True)
+                    if not items:
                         st.caption("No recognized metrics in latest payload.")
                     else:
-                        cols = st.columns(min(4, len(show_keys)))
-                        for i, k in enumerate(show_keys):
+                        cols = st.columns(min(4, len(items)))
+                        for i, (label, value, unit) in enumerate(items):
                             with cols[i % len(cols)]:
-                                simple_card(k.upper(), "", f"<b>{snap.get(k)}</b>")
+                                simple_card(label, unit, f"<b>{value}</b>")
             else:
                 st.caption("No sensor readings available yet for this device.")
 
@@ -1,10 +1,11 @@
 import streamlit as st
 import pandas as pd
 
+from services.progression import DEFAULT_RULES, FEATURE_COLUMNS, ProgressionRule, evaluate_rules, validate_rule
 from views.cards import section_title, simple_card
 
 
-def _progression_rule_item(title: str, rule_text: str, toggle_key: str, default_enabled: bool = True):
+def _progression_rule_item(title: str, rule_text: str, toggle_key: str, default_enabled: bool = True) -> bool:
     with st.container(border=True):
         cL, cR = st.columns([0.86, 0.14], gap="small")
         with cL:
@@ -15,9 +16,12 @@ def _progression_rule_item(title: str, rule_text: str, toggle_key: str, default_
             )
         with cR:
             st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
-            st.toggle("Enabled", value=default_enabled, key=toggle_key)
+            return st.toggle("Enabled", value=default_enabled, key=toggle_key)
+
+
+def _progression_rules_card(repo, patients: pd.DataFrame):
+    custom: list[dict] = st.session_state.setdefault("prog_custom_rules", [])
 
-def _progression_rules_card():
     with st.container(border=True):
         st.markdown("<div class='card-title'>Progression Rules</div>", unsafe_allow_html=True)
         st.markdown(
@@ -27,26 +31,147 @@ def _progression_rules_card():
 
         st.markdown("<div style='height:10px'></div>", unsafe_allow_html=True)
 
-        _progression_rule_item(
-            title="Increase Intensity Rule",
-            rule_text="IF completion ≥ 80% AND pain ≤ 3 THEN increase intensity by 10%",
-            toggle_key="prog_rule_increase_intensity_enabled",
-            default_enabled=True,
-        )
+        rules: list[ProgressionRule] = []
+        texts = {
+            "increase_intensity": "IF completion ≥ 80% AND pain ≤ 3 THEN increase intensity by 10%",
+            "safety_pause": "IF SpO2 < 90% THEN pause program and alert therapist",
+        }
+        for rule in sorted(DEFAULT_RULES, key=lambda r: r.priority):
+            if _progression_rule_item(
+                title=rule.title,
+                rule_text=texts.get(rule.name, f"IF {rule.condition} THEN {rule.action}"),
+                toggle_key=f"prog_rule_{rule.name}_enabled",
+                default_enabled=True,
+            ):
+                rules.append(rule)
 
-        _progression_rule_item(
-            title="Safety Pause Rule",
-            rule_text="IF SpO2 < 90% THEN pause program and alert therapist",
-            toggle_key="prog_rule_safety_pause_enabled",
-            default_enabled=True,
-        )
+        for i, r in enumerate(custom):
+            if _progression_rule_item(
+                title=r["title"],
+                rule_text=f"IF {r['condition']} THEN {r['action']}",
+                toggle_key=f"prog_rule_custom_{i}_enabled",
+                default_enabled=True,
+            ):
+                rules.append(ProgressionRule(f"custom_{i}", r["title"], r["condition"], r["action"], priority=int(r.get("priority", 50))))
+
+        features = repo.rule_features(patients)
+
+        with st.expander("Add custom rule", expanded=False):
+            st.caption("Condition columns: " + ", ".join(FEATURE_COLUMNS) + " (e.g. pain >= 6 and rom < 60)")
+            title = st.text_input("Rule name", key="prog_custom_title")
+            condition = st.text_input("Condition", key="prog_custom_condition")
+            action = st.text_input("Action", key="prog_custom_action", placeholder="e.g. Reduce load by 10%")
+            if st.button("Add Rule", key="prog_custom_add"):
+                err = validate_rule(condition, features) if condition.strip() else "Condition is empty."
+                if err or not title.strip() or not action.strip():
+                    st.error(err or "Rule name and action are required.")
+                else:
+                    custom.append({"title": title.strip(), "condition": condition.strip(), "action": action.strip()})
+                    st.rerun()
 
         st.markdown("<div style='height:10px'></div>", unsafe_allow_html=True)
 
+        recs = evaluate_rules(features, rules)
+        st.markdown(
+            f"<div class='card-title'>Recommended Adjustments</div><div class='card-sub'>{len(recs)} across {len(features)} patients</div>",
+            unsafe_allow_html=True,
+        )
+        if len(recs) == 0:
+            st.caption("No rule fires for any patient right now.")
+        else:
+            show = recs.drop(columns=["priority"]).round(1)
+            st.dataframe(show, use_container_width=True, hide_index=True)
+
         if st.button("Save Program", type="primary", key="save_program_btn", use_container_width=False):
             st.info("Program Saved!")
 
 
+def _default(v, fallback: int) -> int:
+    try:
+        return int(v) if pd.notna(v) and v else fallback
+    except (TypeError, ValueError):
+        return fallback
+
+
+def _batch_builder_card(repo, patients: pd.DataFrame, exercises: pd.DataFrame, pid: str, patient_label):
+    exercises = exercises.drop_duplicates("exercise_id")
+    ex_names = dict(zip(exercises["exercise_id"].astype(str), exercises["exercise_name"].astype(str)))
+    # default_sets / default_reps may be missing from the library; fall back like the single form
+    ex_defaults = {str(r["exercise_id"]): r for r in exercises.to_dict("records")}
+
+    with st.container(border=True):
+        st.markdown(
+            "<div class='card-title'>Batch Program Builder</div><div class='card-sub'>Create many assignments in one go</div>",
+            unsafe_allow_html=True,
+        )
+        mode = st.radio(
+            "Mode",
+            ["Several exercises → this patient", "One exercise → cohort"],
+            horizontal=True,
+            key="batch_mode",
+            label_visibility="collapsed",
+        )
+
+        items: list[dict] = []
+        if mode.startswith("Several"):
+            chosen = st.multiselect("Exercises", options=list(ex_names), format_func=ex_names.get, key="batch_exercises")
+            if chosen:
+                plan = pd.DataFrame(
+                    {
+                        "exercise_id": chosen,
+                        "exercise": [ex_names[e] for e in chosen],
+                        "sets": [_default(ex_defaults[e].get("default_sets"), 3) for e in chosen],
+                        "reps": [_default(ex_defaults[e].get("default_reps"), 10) for e in chosen],
+                        "notes": "",
+                    }
+                )
+                plan = st.data_editor(
+                    plan,
+                    hide_index=True,
+                    use_container_width=True,
+                    disabled=["exercise_id", "exercise"],
+                    column_config={"exercise_id": None},
+                    key="batch_plan",
+                )
+                items = [
+                    {"patient_id": pid, "exercise_id": r.exercise_id, "sets": r.sets, "reps": r.reps, "notes": str(r.notes or "").strip()}
+                    for r in plan.itertuples(index=False)
+                ]
+        else:
+            ex_id = st.selectbox("Exercise", options=list(ex_names), format_func=ex_names.get, key="batch_template")
+            c1, c2 = st.columns(2, gap="large")
+            with c1:
+                sets = st.number_input("Sets", min_value=1, max_value=20, value=_default(ex_defaults.get(ex_id, {}).get("default_sets"), 3), key="batch_sets")
+            with c2:
+                reps = st.number_input("Reps", min_value=1, max_value=100, value=_default(ex_defaults.get(ex_id, {}).get("default_reps"), 10), key="batch_reps")
+            cohort = st.multiselect(
+                "Patients",
+                options=patients["patient_id"].astype(str).tolist(),
+                format_func=patient_label,
+                key="batch_patients",
+            )
+            notes = st.text_input("Notes (optional)", key="batch_notes")
+            items = [{"patient_id": p, "exercise_id": ex_id, "sets": sets, "reps": reps, "notes": notes.strip()} for p in cohort]
+
+        if st.button(f"Create {len(items)} Assignments", type="primary", disabled=not items, key="batch_create"):
+            res = repo.create_assignments(items)
+            st.session_state["batch_result"] = res
+            st.rerun()
+
+        res = st.session_state.pop("batch_result", None)
+        if res is not None and len(res):
+            ok = int(res["ok"].sum())
+            if ok == len(res):
+                st.success(f"Created {ok} assignments.")
+            else:
+                st.warning(f"Created {ok} of {len(res)} assignments.")
+                failed = res[~res["ok"]].assign(
+                    patient=lambda d: d["patient_id"].map(patient_label),
+                    exercise=lambda d: d["exercise_id"].map(ex_names),
+                )
+                st.dataframe(failed[["patient", "exercise", "error"]], use_container_width=True, hide_index=True)
+
+
 def render(repo):
     section_title("Programs", "Create and manage rehabilitation programs", right_html="")
 
@@ -117,6 +242,8 @@ def render(repo):
             st.success("Assignment created.")
             st.rerun()
 
+    _batch_builder_card(repo, patients, exercises, pid, _patient_label)
+
     ass = repo.list_assignments(patient_id=pid)
     with st.container(border=True):
         st.markdown("<div class='card-title'>Current Assignments</div><div class='card-sub'>Latest first</div>", unsafe_allow_html=True)
@@ -126,7 +253,7 @@ def render(repo):
             show_cols = ["assignment_id", "exercise_name", "sets", "reps", "status", "notes"]
             st.dataframe(ass[[c for c in show_cols if c in ass.columns]], use_container_width=True, hide_index=True)
 
-    _progression_rules_card()
+    _progression_rules_card(repo, patients)
 
     with st.container(border=True):
         st.markdown("<div class='card-title'>Exercise Library</div><div class='card-sub'>", unsafe_allow_html=True)
@@ -2,7 +2,11 @@ import streamlit as st
 import pandas as pd
 import requests
 
+from services.metric_registry import BY_CODE
+from services.rep_analytics import align_rep_rom, compare_sessions, session_labels, session_rep_stats, weekly_rep_trends
+from services.session_sensors import SESSION_METRICS
 from views.cards import section_title
+from views.charts import bar_chart, line_chart, overlay_chart
 from views.tables import sessions_table
 
 
@@ -73,7 +77,7 @@ def _rep_by_rep_df(repo, session_id: str, session_summary: dict) -> tuple[pd.Dat
     subtitle = "Motion details by repetition."
     df = None
     try:
-        df = repo.list_rep_metrics(session_id)
+        df = repo.get_rep_metrics(session_id, completed=session_summary.get("status") == "completed")
     except Exception:
         df = None
     if df is None or len(df) == 0:
@@ -104,40 +108,123 @@ def _render_rep_by_rep_rom(repo, session_id: str, session_summary: dict):
             st.markdown("</div>", unsafe_allow_html=True)
             return
 
-        st.markdown("<div class='rr-list'>", unsafe_allow_html=True)
+        rep_i = pd.to_numeric(df["rep_index"], errors="coerce")
+        rom = pd.to_numeric(df["rom_deg"], errors="coerce")
+        rep_txt = ("rep " + rep_i.astype("Int64").astype("string")).fillna("rep")
+        rom_txt = (rom.round(0).astype("Int64").astype("string") + "°").fillna("—")
+        rows = (
+            '<div class="rr-row"><div class="rr-left"><span class="pill pill-blue">'
+            + rep_txt
+            + '</span><div class="rr-rom">ROM: '
+            + rom_txt
+            + "</div></div></div>"
+        )
+        st.markdown("<div class='rr-list'>" + "".join(rows.tolist()) + "</div>", unsafe_allow_html=True)
 
-        for _, r in df.iterrows():
-            rep_i = r.get("rep_index")
-            rom = r.get("rom_deg")
+        st.markdown("</div>", unsafe_allow_html=True)
 
-            try:
-                rep_i_int = int(rep_i)
-            except Exception:
-                rep_i_int = None
 
-            if rom is None or (isinstance(rom, float) and pd.isna(rom)):
-                rom_txt = "—"
-            else:
-                try:
-                    rom_txt = f"{float(rom):.0f}°"
-                except Exception:
-                    rom_txt = f"{rom}°"
-
-            rep_txt = f"rep {rep_i_int}" if rep_i_int is not None else "rep"
-
-            st.markdown(
-                f"""
-                <div class="rr-row">
-                  <div class="rr-left">
-                    <span class="pill pill-blue">{rep_txt}</span>
-                    <div class="rr-rom">ROM: {rom_txt}</div>
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
+def _render_rep_sensor_overlay(repo, session: dict):
+    ov = repo.get_session_sensor_overlay(session)
+
+    with st.container(border=True):
+        st.markdown("<div class='rr-pad'>", unsafe_allow_html=True)
+        sub = "Device readings at each repetition."
+        if ov.attrs.get("estimated"):
+            sub += " Rep times are spread evenly over the session."
+        if ov.attrs.get("truncated"):
+            sub += " The session has more readings than were fetched; later reps may be missing values."
+        st.markdown(
+            "<div class='card-title'>Heart Response & Effort per Rep</div>"
+            f"<div class='card-sub'>{sub}</div>",
+            unsafe_allow_html=True,
+        )
+
+        metrics = [m for m in SESSION_METRICS if m in ov.columns and ov[m].notna().any()]
+        if len(ov) == 0 or not metrics:
+            st.caption("No sensor readings recorded during this session.")
+            st.markdown("</div>", unsafe_allow_html=True)
+            return
+
+        vitals = [m for m in metrics if m != "LOADCELL_KG"]
+        if vitals:
+            line_chart(ov, "rep_index", vitals, height=220)
+        if "LOADCELL_KG" in metrics:
+            bar_chart(ov, "rep_index", "LOADCELL_KG", height=180)
+
+        table = ov[["rep_index", *metrics]].rename(columns={m: BY_CODE[m].label for m in metrics})
+        st.dataframe(table, use_container_width=True, hide_index=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
 
-        st.markdown("</div></div>", unsafe_allow_html=True)
+def _render_rep_analytics(repo, sessions: pd.DataFrame):
+    with st.container(border=True):
+        st.markdown(
+            "<div class='card-title'>Rep Analytics</div>"
+            "<div class='card-sub'>Fatigue and ROM consistency across all of this patient's sessions</div>",
+            unsafe_allow_html=True,
+        )
+        if not st.toggle("Show rep analytics", value=False, key="rep_analytics_on"):
+            return
+
+        stats = session_rep_stats(repo.list_rep_metrics_multi(sessions), sessions)
+        if len(stats) == 0:
+            st.caption("No rep metrics recorded for these sessions.")
+            return
+        weekly = weekly_rep_trends(stats)
+
+        c1, c2 = st.columns(2, gap="large")
+        with c1:
+            st.caption("Fatigue: ROM lost over a set (%, weekly mean)")
+            line_chart(weekly, "week", "fatigue_pct", height=200)
+        with c2:
+            st.caption("ROM consistency: coefficient of variation (%, lower is steadier)")
+            line_chart(weekly, "week", "rom_cv", height=200)
+        st.caption("Reps per session (weekly mean)")
+        bar_chart(weekly, "week", "reps", height=180)
+
+        show = stats.drop(columns=["week"]).rename(
+            columns={
+                "reps": "Reps",
+                "rom_mean": "ROM mean (°)",
+                "rom_cv": "ROM CV (%)",
+                "fatigue_slope": "Fatigue (°/rep)",
+                "fatigue_pct": "Fatigue (%)",
+            }
+        )
+        st.dataframe(show.round(2), use_container_width=True, hide_index=True)
+
+
+def _render_session_comparison(repo, sessions: pd.DataFrame):
+    with st.container(border=True):
+        st.markdown(
+            "<div class='card-title'>Compare Sessions</div>"
+            "<div class='card-sub'>Rep-by-rep ROM and headline metrics side by side</div>",
+            unsafe_allow_html=True,
+        )
+        ordered = sessions.sort_values("started_at", ascending=False, na_position="last")
+        labels = session_labels(ordered.to_dict("records"))
+        if "compare_session_ids" in st.session_state:
+            # another patient's sessions (or deleted ones) are not options any more
+            st.session_state["compare_session_ids"] = [s for s in st.session_state["compare_session_ids"] if s in labels]
+        picked = st.multiselect(
+            "Sessions",
+            options=list(labels),
+            format_func=labels.get,
+            key="compare_session_ids",
+            placeholder="Pick two or more sessions (e.g. the baseline and today's)",
+        )
+        if len(picked) < 2:
+            return
+
+        bundles = repo.get_session_bundles(picked)
+        # both are keyed by session_id; labels are for display only
+        rom = align_rep_rom(bundles).rename(columns=labels)
+        if len(rom) and rom.shape[1] > 1:
+            overlay_chart(rom, "rep_index", [c for c in rom.columns if c != "rep_index"], height=260)
+        else:
+            st.caption("Rep-by-rep ROM is not available for these sessions.")
+        st.dataframe(compare_sessions(bundles).rename(columns=labels), use_container_width=True)
 
 
 def _fmt_ms(ms) -> str:
@@ -308,6 +395,7 @@ def _session_review(repo, session_id: str):
             )
 
         _render_rep_by_rep_rom(repo, session_id=session_id, session_summary=s)
+        _render_rep_sensor_overlay(repo, s)
 
     with cR:
         st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
@@ -394,6 +482,10 @@ def render(repo):
         st.session_state.selected_patient_id = pid
 
     df = repo.list_sessions(patient_id=pid)
+    if pid and len(df):
+        _render_rep_analytics(repo, df)
+    if pid and len(df) > 1:
+        _render_session_comparison(repo, df)
     sid = sessions_table(df)
 
     if sid:
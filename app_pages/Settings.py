@@ -1,11 +1,15 @@
+import os
+
 import streamlit as st
 import pandas as pd
 
 from services.auth import logout
+from services.exports import csv_tempfile, discard_export, sweep_exports
 
-
-def _df_to_csv_bytes(df: pd.DataFrame) -> bytes:
-    return df.to_csv(index=False).encode("utf-8")
+_EXPORTS = [("patients", "Patients"), ("sessions", "Sessions"), ("devices", "Devices"), ("alerts", "Alerts")]
+EXPORT_TTL_S = 600
+# newer Streamlit accepts a callable and only calls it on click
+_DEFERRED_DOWNLOAD = "callable" in (st.download_button.__doc__ or "")
 
 
 def _safe_list_users(repo) -> pd.DataFrame:
@@ -22,6 +26,48 @@ def _safe_list_users(repo) -> pd.DataFrame:
         pass
     return pd.DataFrame()
 
+
+def _read_file(path: str):
+    def read() -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    return read
+
+
+def _export_card(repo, kind: str, label: str):
+    state_key = f"export_{kind}"
+    if st.button(f"Prepare {label} export", key=f"{state_key}_btn", use_container_width=True):
+        discard_export((st.session_state.pop(state_key, None) or {}).get("path"))
+        try:
+            with st.spinner(f"Exporting {label.lower()}…"):
+                path, rows = csv_tempfile(repo.iter_export(kind))
+            st.session_state[state_key] = {"path": path, "rows": rows}
+        except Exception as e:
+            st.error(f"{label} export failed: {e}")
+
+    ready = st.session_state.get(state_key)
+    if ready and not os.path.exists(ready["path"]):
+        # swept after EXPORT_TTL_S
+        st.session_state.pop(state_key, None)
+        ready = None
+    if not ready:
+        return
+    kwargs = dict(
+        label=f"⬇️  Download {label} ({ready['rows']:,} rows)",
+        file_name=f"{kind}.csv",
+        mime="text/csv",
+        key=f"{state_key}_dl",
+        use_container_width=True,
+    )
+    if _DEFERRED_DOWNLOAD:
+        # read from disk only when the button is clicked
+        st.download_button(data=_read_file(ready["path"]), **kwargs)
+    else:
+        with open(ready["path"], "rb") as f:
+            st.download_button(data=f, **kwargs)
+
+
 def render(repo):
     st.title("Settings")
     st.caption("Manage users and system preferences")
@@ -73,42 +119,13 @@ def render(repo):
     with tab_export:
         st.subheader("Export (CSV)")
       
-        patients_df = repo.list_patients()
-        sessions_df = repo.list_sessions()
-        devices_df = repo.list_devices()
-        alerts_df = repo.list_alerts()
+        st.caption(f"Exports are built page by page and stay ready to download for {EXPORT_TTL_S // 60} minutes.")
+        sweep_exports(EXPORT_TTL_S)
 
         c1, c2 = st.columns(2, gap="large")
-        with c1:
-            st.download_button(
-                "⬇️  Export Patients",
-                data=_df_to_csv_bytes(patients_df if patients_df is not None else pd.DataFrame()),
-                file_name="patients.csv",
-                mime="text/csv",
-                use_container_width=True,
-            )
-            st.download_button(
-                "⬇️  Export Devices",
-                data=_df_to_csv_bytes(devices_df if devices_df is not None else pd.DataFrame()),
-                file_name="devices.csv",
-                mime="text/csv",
-                use_container_width=True,
-            )
-        with c2:
-            st.download_button(
-                "⬇️  Export Sessions",
-                data=_df_to_csv_bytes(sessions_df if sessions_df is not None else pd.DataFrame()),
-                file_name="sessions.csv",
-                mime="text/csv",
-                use_container_width=True,
-            )
-            st.download_button(
-                "⬇️  Export Alerts",
-                data=_df_to_csv_bytes(alerts_df if alerts_df is not None else pd.DataFrame()),
-                file_name="alerts.csv",
-                mime="text/csv",
-                use_container_width=True,
-            )
+        for i, (kind, label) in enumerate(_EXPORTS):
+            with (c1 if i % 2 == 0 else c2):
+                _export_card(repo, kind, label)
 
     # ---------------------------
     # Account 
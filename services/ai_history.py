@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from services.timeseries import now_ms
+
+AI_HISTORY_COLUMNS = ["ts", "label", "status", "level", "conf_pct"]
+
+# status key, display text, level on the trend chart
+_SAFE = ("optimal", "SAFE", 0)
+_WARNING = ("low", "WARNING", 1)
+_DANGER = ("high", "DANGER", 2)
+_LABELS = {
+    **dict.fromkeys(("safe", "optimal", "ok", "normal"), _SAFE),
+    **dict.fromkeys(("warning", "low", "low_risk", "low risk", "caution"), _WARNING),
+    **dict.fromkeys(("danger", "high", "high_risk", "high risk", "critical"), _DANGER),
+}
+LEVEL_TEXT = {0: "SAFE", 1: "WARNING", 2: "DANGER"}
+
+_TS_KEYS = ("ts", "predicted_at", "created_at", "timestamp")
+
+
+def ai_status(raw_label) -> tuple[str, str, int]:
+    """Backend label -> (status key, SAFE/WARNING/DANGER text, level)."""
+    raw = str(raw_label or "").strip()
+    hit = _LABELS.get(raw.lower())
+    if hit is not None:
+        return hit
+    return "low", (raw.upper() if raw else "UNKNOWN"), 1
+
+
+def ai_conf_pct(raw_conf) -> float:
+    try:
+        c = float(raw_conf)
+    except (TypeError, ValueError):
+        return 0.0
+    c = c * 100.0 if 0.0 <= c <= 1.0 else c
+    return max(0.0, min(100.0, c))
+
+
+def _ts_ms(snap: dict) -> int | None:
+    for k in _TS_KEYS:
+        v = snap.get(k)
+        if v is None:
+            continue
+        if isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool):
+            return int(v)  # epoch ms, like the rest of the sensor APIs
+        try:
+            ts = pd.Timestamp(v)
+        except Exception:
+            continue
+        if pd.isna(ts):
+            continue
+        ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts
+        return int(ts.value // 1_000_000)
+    return None
+
+
+class _DeviceHistory:
+    __slots__ = ("rows", "latest", "fetched_at")
+
+    def __init__(self, maxlen: int):
+        self.rows: deque = deque(maxlen=maxlen)  # (ts_ms, label, conf_pct), ascending
+        self.latest: dict = {}
+        self.fetched_at = 0.0
+
+
+class AiPredictionHistory:
+    """
+    Bounded per-device history of AI predictions, one entry per distinct prediction
+    timestamp. Tracks how often a device's predictions advance so the repo only asks
+    the backend again once a newer one can exist.
+    """
+
+    def __init__(self, maxlen: int = 720, min_poll_s: float = 3.0, max_poll_s: float = 60.0):
+        self.maxlen = int(maxlen)
+        self.min_poll_s = float(min_poll_s)
+        self.max_poll_s = float(max_poll_s)
+        self._lock = threading.Lock()
+        self._devices: dict[str, _DeviceHistory] = {}
+
+    def _get(self, device_id) -> _DeviceHistory:
+        did = str(device_id)
+        h = self._devices.get(did)
+        if h is None:
+            h = self._devices[did] = _DeviceHistory(self.maxlen)
+        return h
+
+    def _cadence_ms(self, h: _DeviceHistory) -> float:
+        if len(h.rows) < 3:
+            return 0.0
+        ts = np.fromiter((r[0] for r in list(h.rows)[-11:]), dtype=np.int64)
+        return float(np.median(np.diff(ts)))
+
+    def due(self, device_id, now: int | None = None) -> bool:
+        """True when a newer prediction than the one we hold could exist."""
+        now = int(now if now is not None else now_ms())
+        with self._lock:
+            h = self._get(device_id)
+            if not h.latest:
+                return True
+            since = time.monotonic() - h.fetched_at
+            if since < self.min_poll_s:
+                return False
+            if since >= self.max_poll_s or not h.rows:
+                return True
+            # not yet time for the device's next prediction
+            return now >= h.rows[-1][0] + 0.9 * self._cadence_ms(h)
+
+    def add(self, device_id, snap: dict) -> bool:
+        """Record a fetched snapshot; returns True if it was a new prediction."""
+        snap = dict(snap or {})
+        with self._lock:
+            h = self._get(device_id)
+            h.fetched_at = time.monotonic()
+            if not snap:
+                return False
+            label = snap.get("ai_label") or snap.get("label") or ""
+            conf = ai_conf_pct(snap.get("ai_conf", snap.get("conf")))
+            ts = _ts_ms(snap)
+            if ts is None:
+                # no timestamp from the backend: a changed prediction counts as new
+                if h.rows and h.rows[-1][1:] == (label, conf):
+                    h.latest = snap
+                    return False
+                ts = max(now_ms(), h.rows[-1][0] + 1) if h.rows else now_ms()
+            if h.rows and ts <= h.rows[-1][0]:
+                if ts == h.rows[-1][0]:
+                    h.latest = snap
+                return False
+            h.rows.append((ts, label, conf))
+            h.latest = snap
+            return True
+
+    def latest(self, device_id) -> dict:
+        with self._lock:
+            h = self._devices.get(str(device_id))
+            return dict(h.latest) if h is not None else {}
+
+    def frame(self, device_id, hours: float | None = None) -> pd.DataFrame:
+        with self._lock:
+            h = self._devices.get(str(device_id))
+            rows = list(h.rows) if h is not None else []
+        if hours is not None and rows:
+            cutoff = now_ms() - int(hours * 3_600_000)
+            rows = [r for r in rows if r[0] >= cutoff]
+        if not rows:
+            return pd.DataFrame(columns=AI_HISTORY_COLUMNS)
+        ts, labels, conf = zip(*rows)
+        status = [ai_status(lbl) for lbl in labels]
+        return pd.DataFrame(
+            {
+                "ts": pd.to_datetime(np.asarray(ts, dtype=np.int64), unit="ms", utc=True),
+                "label": labels,
+                "status": [s[1] for s in status],
+                "level": [s[2] for s in status],
+                "conf_pct": conf,
+            },
+            columns=AI_HISTORY_COLUMNS,
+        )
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+SLA_GROUPS = {"Severity": "severity", "Therapist": "assigned_therapist_id", "Week": "week"}
+SLA_QUANTILES = (0.5, 0.9, 0.99)
+
+# every other status (open, acknowledged, in_progress, ...) still needs resolving
+CLOSED_STATUSES = ("resolved", "closed")
+
+# open-alert age buckets, in hours
+AGING_BINS = [0, 1, 4, 24, 72, 168, np.inf]
+AGING_LABELS = ["< 1 h", "1–4 h", "4–24 h", "1–3 d", "3–7 d", "> 7 d"]
+
+
+def _utc(s: pd.Series) -> pd.Series:
+    return pd.to_datetime(s, errors="coerce", utc=True)
+
+
+def alert_durations(alerts: pd.DataFrame) -> pd.DataFrame:
+    """
+    created/acknowledged/resolved -> tta_min, ttr_min (NaN while pending), is_open
+    (not resolved or closed yet, acknowledged or not), is_unacked (open and nobody
+    has acknowledged it) and the week the alert was raised in.
+    """
+    d = pd.DataFrame(index=alerts.index)
+    created = _utc(alerts["created_at"]) if "created_at" in alerts.columns else pd.Series(pd.NaT, index=alerts.index, dtype="datetime64[ns, UTC]")
+    acked = _utc(alerts["acknowledged_at"]) if "acknowledged_at" in alerts.columns else pd.Series(pd.NaT, index=alerts.index, dtype="datetime64[ns, UTC]")
+    resolved = _utc(alerts["resolved_at"]) if "resolved_at" in alerts.columns else pd.Series(pd.NaT, index=alerts.index, dtype="datetime64[ns, UTC]")
+    status = alerts.get("status", pd.Series("open", index=alerts.index)).astype(str).str.lower()
+
+    d["severity"] = alerts.get("severity", pd.Series("med", index=alerts.index)).astype(str).str.lower()
+    d["assigned_therapist_id"] = alerts.get("assigned_therapist_id", pd.Series(None, index=alerts.index)).fillna("unassigned").astype(str)
+    d["week"] = created.dt.tz_localize(None).dt.to_period("W").dt.start_time
+    d["tta_min"] = (acked - created).dt.total_seconds() / 60.0
+    d["ttr_min"] = (resolved - created).dt.total_seconds() / 60.0
+    # negative spans are clock skew, not data
+    d.loc[d["tta_min"] < 0, "tta_min"] = np.nan
+    d.loc[d["ttr_min"] < 0, "ttr_min"] = np.nan
+
+    d["created"] = created
+    d["is_open"] = ~status.isin(CLOSED_STATUSES) & resolved.isna() & created.notna()
+    d["is_unacked"] = d["is_open"] & acked.isna() & ~status.isin(("acknowledged", "ack"))
+    return d
+
+
+def sla_summary(durations: pd.DataFrame, by: str) -> pd.DataFrame:
+    """
+    Per group: alert, resolved, open and unacknowledged counts and p50/p90/p99 of
+    time-to-ack and time-to-resolve (minutes).
+    """
+    cols = ["alerts", "resolved", "open", "unacked"] + [f"{m}_p{int(q * 100)}" for m in ("tta", "ttr") for q in SLA_QUANTILES]
+    if durations is None or len(durations) == 0:
+        return pd.DataFrame(columns=[by] + cols)
+
+    g = durations.groupby(by, sort=True, dropna=True)
+    out = pd.DataFrame({"alerts": g.size(), "resolved": g["ttr_min"].count(), "open": g["is_open"].sum(), "unacked": g["is_unacked"].sum()})
+    for m in ("tta", "ttr"):
+        q = g[f"{m}_min"].quantile(list(SLA_QUANTILES)).unstack()
+        q = q.reindex(columns=list(SLA_QUANTILES))
+        for p in SLA_QUANTILES:
+            out[f"{m}_p{int(p * 100)}"] = q[p]
+    return out.reset_index()[[by] + cols]
+
+
+def aging_buckets(durations: pd.DataFrame, now: pd.Timestamp | None = None, pending: str = "is_open") -> pd.DataFrame:
+    """
+    Pending alerts by age bucket (rows) and severity (columns): unresolved ones for
+    pending="is_open", not yet acknowledged ones for pending="is_unacked".
+    """
+    open_ = durations[durations[pending]] if len(durations) else durations
+    if len(open_) == 0:
+        return pd.DataFrame(0, index=pd.Index(AGING_LABELS, name="age"), columns=[])
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    age_h = (now - open_["created"]).dt.total_seconds() / 3600.0
+    bucket = pd.cut(age_h.clip(lower=0), bins=AGING_BINS, labels=AGING_LABELS, right=False)
+    table = pd.crosstab(bucket, open_["severity"]).reindex(AGING_LABELS, fill_value=0)
+    table.index.name = "age"
+    table.columns.name = None
+    return table
+
+
+class AlertSlaCache:
+    """
+    SLA frames for one alert history, recomputed only when the history changes
+    (new alerts, acks or resolutions) rather than on every rerun.
+    """
+
+    def __init__(self):
+        self._key: int | None = None
+        self._durations: pd.DataFrame | None = None
+        self._summaries: dict[str, pd.DataFrame] = {}
+
+    @staticmethod
+    def _fingerprint(alerts: pd.DataFrame) -> int:
+        cols = [c for c in ("alert_id", "status", "acknowledged_at", "resolved_at") if c in alerts.columns]
+        if not cols or len(alerts) == 0:
+            return len(alerts)
+        return int(pd.util.hash_pandas_object(alerts[cols], index=False).sum())
+
+    def _refresh(self, alerts: pd.DataFrame):
+        key = self._fingerprint(alerts)
+        if key != self._key:
+            self._key = key
+            self._durations = alert_durations(alerts)
+            self._summaries = {}
+
+    def summary(self, alerts: pd.DataFrame, by: str) -> pd.DataFrame:
+        self._refresh(alerts)
+        if by not in self._summaries:
+            self._summaries[by] = sla_summary(self._durations, by)
+        return self._summaries[by]
+
+    def aging(self, alerts: pd.DataFrame, pending: str = "is_open") -> pd.DataFrame:
+        # ages move with the clock, so only the durations are reused here
+        self._refresh(alerts)
+        return aging_buckets(self._durations, pending=pending)
@@ -0,0 +1,507 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from services.timeseries import now_ms
+
+ALERT_COLUMNS = [
+    "alert_id",
+    "patient_id",
+    "patient_name",
+    "type",
+    "severity",
+    "status",
+    "message",
+    "created_at",
+    "resolved_at",
+]
+PROVISIONAL_COLUMNS = ALERT_COLUMNS + ["device_id", "metric", "value", "last_seen_at"]
+GROUP_COLUMNS = [
+    "group_id",
+    "patient_id",
+    "patient_name",
+    "type",
+    "severity",
+    "status",
+    "count",
+    "open_count",
+    "first_seen",
+    "last_seen",
+    "message",
+    "alert_ids",
+]
+
+SEVERITY_RANK = {
+    "low": 1,
+    "info": 1,
+    "med": 2,
+    "medium": 2,
+    "warning": 3,
+    "high": 3,
+    "critical": 4,
+}
+
+
+@dataclass(frozen=True)
+class AnomalyRule:
+    """
+    One check on one metric. Absolute bounds (low/high) fire from the first sample;
+    relative checks (max_drop/max_rise vs the rolling mean, z vs the rolling std) need
+    min_samples of history first.
+    """
+
+    name: str
+    metric: str
+    severity: str = "high"
+    low: float | None = None
+    high: float | None = None
+    max_drop: float | None = None
+    max_rise: float | None = None
+    z: float | None = None
+    min_dev: float = 0.0  # z check also needs |value - mean| above this
+    min_samples: int = 10
+
+
+DEFAULT_RULES: list[AnomalyRule] = [
+    AnomalyRule("hr_out_of_band", "HR", "high", low=40.0, high=150.0),
+    AnomalyRule("hr_deviation", "HR", "warning", z=4.0, min_dev=25.0, min_samples=20),
+    AnomalyRule("spo2_low", "SPO2", "critical", low=90.0),
+    AnomalyRule("spo2_drop", "SPO2", "high", max_drop=4.0),
+    AnomalyRule("loadcell_spike", "LOADCELL_KG", "warning", max_rise=15.0, min_samples=5),
+]
+
+_RULE_TEXT = {
+    "hr_out_of_band": "Heart rate out of band",
+    "hr_deviation": "Heart rate far from recent average",
+    "spo2_low": "SpO₂ below threshold",
+    "spo2_drop": "Sudden SpO₂ drop",
+    "loadcell_spike": "Sudden loadcell spike",
+}
+
+
+class AnomalyEngine:
+    """
+    Client-side anomaly checks over incoming sensor samples. Each (device, metric)
+    stream owns a slot in flat numpy arrays holding O(1)-per-sample rolling state
+    (EWMA mean/variance, decaying min/max envelope, last value), so a refresh over
+    hundreds of devices is a handful of array operations. Violations become local
+    provisional alerts that stay up for hold_ms after the last offending sample.
+    """
+
+    def __init__(self, rules: list[AnomalyRule] | None = None, alpha: float = 0.1, hold_ms: int = 10 * 60_000):
+        self.rules = list(rules if rules is not None else DEFAULT_RULES)
+        self.alpha = float(alpha)
+        self.hold_ms = int(hold_ms)
+        self._lock = threading.Lock()
+        self._keys = pd.Index([], dtype=object)
+        cap = 64
+        self._n = np.zeros(cap, dtype=np.int64)
+        self._mean = np.zeros(cap)
+        self._var = np.zeros(cap)
+        self._min = np.zeros(cap)
+        self._max = np.zeros(cap)
+        self._last = np.zeros(cap)
+        self._last_ts = np.full(cap, -1, dtype=np.int64)
+        # (device_id, metric, rule) -> provisional alert row
+        self._active: dict[tuple[str, str, str], dict] = {}
+        self._labels: dict[str, tuple[str | None, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # ---------- state ----------
+    def _slots(self, keys: pd.Series) -> np.ndarray:
+        new = pd.Index(keys.unique()).difference(self._keys)
+        if len(new):
+            self._keys = self._keys.append(new)
+            need = len(self._keys)
+            if need > len(self._n):
+                cap = max(need, 2 * len(self._n))
+                for name in ("_n", "_mean", "_var", "_min", "_max", "_last", "_last_ts"):
+                    arr = getattr(self, name)
+                    grown = np.full(cap, -1 if name == "_last_ts" else 0, dtype=arr.dtype)
+                    grown[: len(arr)] = arr
+                    setattr(self, name, grown)
+        return self._keys.get_indexer(keys)
+
+    def set_labels(self, devices: pd.DataFrame):
+        """device_id -> (patient_id, patient_name), used when rendering alerts."""
+        if devices is None or len(devices) == 0 or "device_id" not in devices.columns:
+            return
+        pid = devices["patient_id"] if "patient_id" in devices.columns else pd.Series(None, index=devices.index)
+        name = devices["patient_name"] if "patient_name" in devices.columns else pd.Series("—", index=devices.index)
+        self._labels.update(
+            {str(d): (None if pd.isna(p) else str(p), str(n)) for d, p, n in zip(devices["device_id"], pid, name) if pd.notna(d)}
+        )
+
+    # ---------- ingest ----------
+    def ingest(self, samples: pd.DataFrame) -> int:
+        """
+        samples: device_id, metric (canonical), value, ts (epoch ms or datetime; optional).
+        Samples not newer than the stream's last one are ignored, and a sample without a
+        timestamp counts only if its value differs from the stream's last one, so
+        re-feeding an unchanged snapshot is harmless. Returns the number of samples applied.
+        """
+        if samples is None or len(samples) == 0:
+            return 0
+        df = pd.DataFrame(
+            {
+                "device_id": samples["device_id"].astype(str).to_numpy(),
+                "metric": samples["metric"].astype(str).to_numpy(),
+                "value": pd.to_numeric(samples["value"], errors="coerce").to_numpy(dtype=np.float64),
+                "ts": _ts_ms(samples["ts"]) if "ts" in samples.columns else np.full(len(samples), -1, dtype=np.int64),
+            }
+        )
+        df = df[np.isfinite(df["value"].to_numpy())]
+        if len(df) == 0:
+            return 0
+
+        with self._lock:
+            df["slot"] = self._slots(df["device_id"] + "\x1f" + df["metric"])
+            undated = df["ts"].to_numpy() < 0
+            if undated.any():
+                slot = df["slot"].to_numpy()
+                repeat = undated & (self._n[slot] > 0) & (df["value"].to_numpy() == self._last[slot])
+                df = df[~repeat]
+                df.loc[df["ts"] < 0, "ts"] = now_ms()
+            df = df.sort_values(["slot", "ts"], kind="stable")
+            df = df[df["ts"].to_numpy() > self._last_ts[df["slot"].to_numpy()]]
+            df = df.drop_duplicates(["slot", "ts"], keep="last")
+            if len(df) == 0:
+                return 0
+            # a stream with several new samples is applied in rounds; each round is one
+            # vectorized update over every stream that still has samples left
+            rnd = df.groupby("slot", sort=False).cumcount().to_numpy()
+            slot_all, val_all, ts_all = df["slot"].to_numpy(), df["value"].to_numpy(), df["ts"].to_numpy()
+            metric_all, dev_all = df["metric"].to_numpy(), df["device_id"].to_numpy()
+            for r in range(int(rnd.max()) + 1):
+                m = rnd == r
+                self._evaluate(slot_all[m], val_all[m], ts_all[m], metric_all[m], dev_all[m])
+                self._update(slot_all[m], val_all[m], ts_all[m])
+            self._expire(now_ms())
+            return int(len(df))
+
+    def _update(self, slot: np.ndarray, x: np.ndarray, ts: np.ndarray):
+        a = self.alpha
+        first = self._n[slot] == 0
+        mean, var = self._mean[slot], self._var[slot]
+        delta = x - mean
+        new_mean = np.where(first, x, mean + a * delta)
+        new_var = np.where(first, 0.0, (1.0 - a) * (var + a * delta * delta))
+        # min/max relax toward the mean so old extremes fade instead of sticking forever
+        lo = np.where(first, x, np.minimum(x, self._min[slot] + a * (new_mean - self._min[slot])))
+        hi = np.where(first, x, np.maximum(x, self._max[slot] + a * (new_mean - self._max[slot])))
+        self._mean[slot], self._var[slot], self._min[slot], self._max[slot] = new_mean, new_var, lo, hi
+        self._last[slot], self._last_ts[slot] = x, ts
+        self._n[slot] += 1
+
+    def _evaluate(self, slot, x, ts, metric, device):
+        n, mean, std, last = self._n[slot], self._mean[slot], np.sqrt(self._var[slot]), self._last[slot]
+        for rule in self.rules:
+            on = metric == rule.metric
+            if not on.any():
+                continue
+            hit = np.zeros(len(slot), dtype=bool)
+            if rule.low is not None:
+                hit |= x < rule.low
+            if rule.high is not None:
+                hit |= x > rule.high
+            warm = n >= rule.min_samples
+            if rule.max_drop is not None:
+                hit |= warm & (mean - x > rule.max_drop)
+            if rule.max_rise is not None:
+                hit |= warm & (x - last > rule.max_rise)
+            if rule.z is not None:
+                dev = np.abs(x - mean)
+                hit |= warm & (std > 0) & (dev > rule.z * std) & (dev > rule.min_dev)
+            for i in np.flatnonzero(hit & on):
+                self._raise(rule, str(device[i]), float(x[i]), int(ts[i]), float(mean[i]) if n[i] else None)
+
+    def _raise(self, rule: AnomalyRule, device_id: str, value: float, ts: int, mean: float | None):
+        key = (device_id, rule.metric, rule.name)
+        a = self._active.get(key)
+        ref = f" (recent avg {mean:.1f})" if mean is not None else ""
+        message = f"{_RULE_TEXT.get(rule.name, rule.name)}: {value:.1f}{ref}"
+        if a is None:
+            self._active[key] = {
+                "alert_id": f"local:{device_id}:{rule.metric}:{rule.name}:{ts}",
+                "type": rule.name,
+                "severity": rule.severity,
+                "message": message,
+                "created_at": ts,
+                "last_seen_at": ts,
+                "device_id": device_id,
+                "metric": rule.metric,
+                "value": value,
+                "_observed": now_ms(),
+            }
+        else:
+            a.update(message=message, last_seen_at=ts, value=value, _observed=now_ms())
+
+    def _expire(self, now: int):
+        # hold is measured on our clock, not the device's, so skewed devices still alert
+        cutoff = now - self.hold_ms
+        for key in [k for k, a in self._active.items() if a["_observed"] < cutoff]:
+            del self._active[key]
+
+    # ---------- read side ----------
+    def stats(self) -> pd.DataFrame:
+        with self._lock:
+            k = len(self._keys)
+            parts = self._keys.str.split("\x1f", n=1, expand=True) if k else None
+            return pd.DataFrame(
+                {
+                    "device_id": parts.get_level_values(0) if k else [],
+                    "metric": parts.get_level_values(1) if k else [],
+                    "samples": self._n[:k],
+                    "mean": self._mean[:k],
+                    "std": np.sqrt(self._var[:k]),
+                    "min": self._min[:k],
+                    "max": self._max[:k],
+                    "last": self._last[:k],
+                }
+            )
+
+    def alerts(self) -> pd.DataFrame:
+        """Active provisional alerts, newest first, in list_alerts columns (+ device fields)."""
+        with self._lock:
+            self._expire(now_ms())
+            rows = [dict(a) for a in self._active.values()]
+        if not rows:
+            return pd.DataFrame(columns=PROVISIONAL_COLUMNS)
+        df = pd.DataFrame(rows)
+        labels = df["device_id"].map(self._labels)
+        df["patient_id"] = labels.map(lambda t: t[0] if isinstance(t, tuple) else None)
+        df["patient_name"] = labels.map(lambda t: t[1] if isinstance(t, tuple) else "—")
+        df["status"] = "provisional"
+        df["resolved_at"] = pd.NaT
+        df["created_at"] = pd.to_datetime(df["created_at"], unit="ms", utc=True)
+        df["last_seen_at"] = pd.to_datetime(df["last_seen_at"], unit="ms", utc=True)
+        return df[PROVISIONAL_COLUMNS].sort_values("last_seen_at", ascending=False).reset_index(drop=True)
+
+
+def group_alerts(df: pd.DataFrame, window_min: float = 30.0, keys: tuple[str, ...] = ("patient_id", "type")) -> pd.DataFrame:
+    """
+    Collapse bursts of similar alerts: rows sharing `keys` whose created_at gaps are all
+    within window_min form one group. One sort plus a groupby; newest groups first.
+    """
+    if df is None or len(df) == 0:
+        return pd.DataFrame(columns=GROUP_COLUMNS)
+
+    d = df.reset_index(drop=True).copy()
+    for c, default in (("patient_name", "—"), ("message", ""), ("alert_id", None), ("severity", "med"), ("status", "open")):
+        if c not in d.columns:
+            d[c] = default
+    for k in keys:
+        d[k] = d[k].fillna("—").astype(str) if k in d.columns else "—"
+    d["_t"] = pd.to_datetime(d.get("created_at"), errors="coerce", utc=True)
+    d["_rank"] = d["severity"].astype(str).str.lower().map(SEVERITY_RANK).fillna(2)
+    d["_open"] = d["status"].astype(str).str.lower().eq("open")
+    d = d.sort_values([*keys, "_t"], kind="stable", na_position="first").reset_index(drop=True)
+
+    # a new group starts where the key changes or the gap to the previous alert exceeds the window
+    t = pd.DatetimeIndex(d["_t"].fillna(pd.Timestamp(0, tz="UTC"))).as_unit("ns").asi8
+    new = np.zeros(len(d), dtype=bool)
+    new[0] = True
+    new[1:] = np.diff(t) > int(window_min * 60e9)
+    for k in keys:
+        col = d[k].to_numpy()
+        new[1:] |= col[1:] != col[:-1]
+    d["group_id"] = np.cumsum(new)
+
+    g = d.groupby("group_id", sort=False)
+    out = g.agg(
+        **{k: (k, "first") for k in keys},
+        patient_name=("patient_name", "first"),
+        count=("_rank", "size"),
+        open_count=("_open", "sum"),
+        first_seen=("_t", "min"),
+        last_seen=("_t", "max"),
+        message=("message", "last"),
+        alert_ids=("alert_id", list),
+        last_status=("status", "last"),
+    )
+    out["severity"] = d.loc[g["_rank"].idxmax(), ["group_id", "severity"]].set_index("group_id")["severity"]
+    out["status"] = np.where(out["open_count"] > 0, "open", out["last_status"])
+    out = out.reset_index()
+    for c in GROUP_COLUMNS:
+        if c not in out.columns:
+            out[c] = None
+    return out[GROUP_COLUMNS].sort_values("last_seen", ascending=False, na_position="last").reset_index(drop=True)
+
+
+class AlertsView:
+    """
+    One downloaded alert frame with per-column indexes: each filterable column is
+    factorized once, and value -> boolean mask is built on first use, so any
+    severity/status/patient combination is a couple of mask ANDs.
+    """
+
+    FILTER_COLUMNS = ("severity", "status", "patient_id")
+
+    def __init__(self, df: pd.DataFrame):
+        self.source = df
+        self.df = df.reset_index(drop=True) if df is not None else pd.DataFrame(columns=ALERT_COLUMNS)
+        self._codes: dict[str, tuple[np.ndarray, pd.Index]] = {}
+        self._masks: dict[tuple[str, str], np.ndarray] = {}
+        for col in self.FILTER_COLUMNS:
+            if col in self.df.columns:
+                vals = self.df[col].astype("string").str.lower() if col != "patient_id" else self.df[col].astype("string")
+                codes, uniques = pd.factorize(vals, use_na_sentinel=True)
+                self._codes[col] = (codes, pd.Index(uniques))
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def options(self, col: str) -> list[str]:
+        if col not in self._codes:
+            return []
+        return sorted(str(v) for v in self._codes[col][1] if v and str(v) != "nan")
+
+    def mask(self, col: str, value) -> np.ndarray:
+        key = (col, str(value).lower() if col != "patient_id" else str(value))
+        m = self._masks.get(key)
+        if m is None:
+            codes, uniques = self._codes.get(col, (np.full(len(self.df), -1), pd.Index([])))
+            loc = uniques.get_indexer([key[1]])[0]
+            m = self._masks[key] = (codes == loc) if loc >= 0 else np.zeros(len(self.df), dtype=bool)
+        return m
+
+    def count(self, col: str, value) -> int:
+        return int(self.mask(col, value).sum())
+
+    def filter(self, **filters) -> pd.DataFrame:
+        """filter(severity="high", status="open"); None/"All" means no filter on that column."""
+        m = np.ones(len(self.df), dtype=bool)
+        for col, value in filters.items():
+            if value is None or value == "All" or value == "":
+                continue
+            m &= self.mask(col, value)
+        return self.df[m]
+
+
+class AlertFeed:
+    """
+    Open-alert count and newest previews for the notification badge. Keeps a
+    (created_at, alert_id) cursor and asks only for alerts newer than it; a full
+    /alerts/all?status=open pass every full_refresh_s picks up resolutions made
+    elsewhere. Never touches /patients: names come from whatever the repo has seen.
+
+    Alerts are told apart by alert_id, not by the cursor, so a backend that ignores
+    `since` doesn't double count. An alert without a usable created_at is dated by
+    the fetch that first saw it.
+    """
+
+    def __init__(self, full_refresh_s: float = 60.0, min_interval_s: float = 2.0, keep: int = 50):
+        self.full_refresh_s = float(full_refresh_s)
+        self.min_interval_s = float(min_interval_s)
+        self.keep = int(keep)
+        self._lock = threading.Lock()
+        self._cursor: tuple[int, str] | None = None
+        self._open: set[str] = set()
+        # every alert_id seen since the last full pass, including ones discarded locally
+        self._known: set[str] = set()
+        self._recent: dict[str, dict] = {}
+        self._full_at = float("-inf")
+        self._polled_at = float("-inf")
+
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
+
+    def poll(self, get, now: float) -> bool:
+        """get(path, params) -> JSON; now is time.monotonic(). Returns True if anything was fetched."""
+        if now - self._polled_at < self.min_interval_s:
+            return False
+        self._polled_at = now
+        full = self._cursor is None or now - self._full_at >= self.full_refresh_s
+        params = {"status": "open"}
+        if not full:
+            params["since"] = pd.Timestamp(self._cursor[0], unit="ms", tz="UTC").isoformat().replace("+00:00", "Z")
+        try:
+            items = get("/alerts/all", params) or []
+        except Exception:
+            return False
+        fetched_ms = now_ms()
+        rows = [_feed_row(a, fetched_ms) for a in items if isinstance(a, dict) and a.get("alert_id") is not None]
+
+        with self._lock:
+            if full:
+                # undated alerts keep the fetch time they were first seen with
+                for r in rows:
+                    old = self._recent.get(r["alert_id"])
+                    if not r["_dated"] and old is not None:
+                        r["_ms"] = old["_ms"]
+                self._full_at = now
+                self._open = {r["alert_id"] for r in rows if r["status"] == "open"}
+                self._known = {r["alert_id"] for r in rows}
+                self._recent = {}
+            else:
+                # the backend may ignore `since` and send everything again
+                rows = [r for r in rows if r["alert_id"] not in self._known]
+                self._known.update(r["alert_id"] for r in rows)
+                self._open.update(r["alert_id"] for r in rows if r["status"] == "open")
+            for r in rows:
+                self._recent[r["alert_id"]] = r
+            # fetch times are not created_at: only real timestamps move the `since` cursor
+            dated = [(r["_ms"], r["alert_id"]) for r in rows if r["_dated"]]
+            if dated:
+                newest = max(dated)
+                self._cursor = max(newest, self._cursor) if self._cursor else newest
+            elif self._cursor is None:
+                self._cursor = (0, "")
+            if len(self._recent) > self.keep:
+                keep = sorted(self._recent.values(), key=lambda r: (r["_ms"], r["alert_id"]))[-self.keep:]
+                self._recent = {r["alert_id"]: r for r in keep}
+        return True
+
+    def discard(self, alert_ids):
+        """Drop alerts that were resolved/acknowledged locally."""
+        with self._lock:
+            for aid in alert_ids:
+                self._open.discard(str(aid))
+                self._recent.pop(str(aid), None)
+
+    def frame(self, names: dict | None = None) -> pd.DataFrame:
+        """Newest open alerts first, in list_alerts columns."""
+        with self._lock:
+            rows = [dict(r) for r in self._recent.values() if r["alert_id"] in self._open]
+        if not rows:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+        df = pd.DataFrame(rows)
+        df["patient_name"] = df["patient_id"].map(names or {}).fillna("Patient")
+        df["created_at"] = pd.to_datetime(df["_ms"], unit="ms", utc=True)
+        df["resolved_at"] = pd.NaT
+        return df.sort_values(["_ms", "alert_id"], ascending=False)[ALERT_COLUMNS].reset_index(drop=True)
+
+
+def _feed_row(a: dict, fetched_ms: int) -> dict:
+    created = pd.to_datetime(a.get("created_at"), errors="coerce", utc=True)
+    dated = pd.notna(created)
+    return {
+        "alert_id": str(a.get("alert_id")),
+        "patient_id": str(a["patient_id"]) if a.get("patient_id") else None,
+        "type": a.get("type") or "—",
+        "severity": a.get("severity") or "med",
+        "status": str(a.get("status") or "open").lower(),
+        "message": a.get("message") or "",
+        "_ms": int(created.value // 1_000_000) if dated else int(fetched_ms),
+        "_dated": bool(dated),
+    }
+
+
+def _ts_ms(ts: pd.Series) -> np.ndarray:
+    """Epoch ms per sample; -1 where the timestamp is missing or unparseable."""
+    if pd.api.types.is_numeric_dtype(ts):
+        return pd.to_numeric(ts, errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+    if pd.api.types.is_datetime64_any_dtype(ts):
+        parsed = pd.to_datetime(ts, utc=True)
+    else:
+        parsed = pd.to_datetime(ts.astype("string"), errors="coerce", utc=True, format="ISO8601")
+    out = pd.DatetimeIndex(parsed).as_unit("ms").asi8.copy()
+    out[parsed.isna().to_numpy()] = -1
+    return out
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# progress metric -> sessions column
+PROGRESS_METRICS = {
+    "grip": "grip_avg_kg",
+    "rom": "rom_avg_deg",
+    "adherence": "adherence",
+    "pain": "pain_score",
+}
+PROGRESS_STATS = ("baseline", "current", "delta", "slope")
+PROGRESS_COLUMNS = ["patient_id", "sessions"] + [f"{m}_{s}" for m in PROGRESS_METRICS for s in PROGRESS_STATS]
+
+
+def cohort_progress(sessions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Baseline (first), current (latest), delta and slope (per week, least squares over
+    session start times) of every progress metric for every patient. Completed sessions
+    are preferred; a patient with none completed for a metric falls back to all of them.
+    """
+    if sessions is None or len(sessions) == 0 or "patient_id" not in sessions.columns:
+        return pd.DataFrame(columns=PROGRESS_COLUMNS)
+
+    t = pd.to_datetime(sessions["started_at"], errors="coerce", utc=True)
+    s = pd.DataFrame(
+        {
+            "patient_id": sessions["patient_id"].astype(str).to_numpy(),
+            # days since the earliest session keeps the regression sums well conditioned
+            "x": ((t - t.min()).dt.total_seconds() / 86400.0).to_numpy(),
+            "completed": (sessions["status"].astype(str) == "completed").to_numpy()
+            if "status" in sessions.columns
+            else np.ones(len(sessions), dtype=bool),
+        }
+    )
+    for m, col in PROGRESS_METRICS.items():
+        s[m] = pd.to_numeric(sessions[col], errors="coerce").to_numpy() if col in sessions.columns else np.nan
+    s = s.dropna(subset=["x"]).sort_values(["patient_id", "x"], kind="stable")
+
+    pid = s["patient_id"]
+    out = pd.DataFrame({"sessions": s.groupby(pid, sort=False).size()})
+    for m in PROGRESS_METRICS:
+        v = s[m]
+        has_completed = (v.notna() & s["completed"]).groupby(pid, sort=False).transform("any")
+        # NaN outside the chosen rows, so first/last/sums skip them
+        v = v.where(s["completed"] | ~has_completed)
+        x = s["x"].where(v.notna())
+
+        g = pd.DataFrame({"v": v, "x": x, "xv": x * v, "xx": x * x}).groupby(pid, sort=False)
+        first, last = g["v"].first(), g["v"].last()
+        n = g["v"].count()
+        sx, sv, sxv, sxx = g["x"].sum(), g["v"].sum(), g["xv"].sum(), g["xx"].sum()
+        den = n * sxx - sx * sx
+        slope = (n * sxv - sx * sv) / den.where(den > 1e-9)
+
+        out[f"{m}_baseline"] = first
+        out[f"{m}_current"] = last
+        out[f"{m}_delta"] = last - first
+        out[f"{m}_slope"] = slope * 7.0
+    out.index.name = "patient_id"
+    return out.reset_index()[PROGRESS_COLUMNS]
+
+
+class CohortProgressCache:
+    """cohort_progress for one sessions frame, recomputed only when the sessions change."""
+
+    def __init__(self):
+        self._key: int | None = None
+        self._frame: pd.DataFrame | None = None
+
+    @staticmethod
+    def _fingerprint(sessions: pd.DataFrame) -> int:
+        cols = [c for c in ("session_id", "status", *PROGRESS_METRICS.values()) if c in sessions.columns]
+        if not cols or len(sessions) == 0:
+            return len(sessions)
+        return int(pd.util.hash_pandas_object(sessions[cols], index=False).sum())
+
+    def progress(self, sessions: pd.DataFrame) -> pd.DataFrame:
+        key = self._fingerprint(sessions)
+        if key != self._key or self._frame is None:
+            self._key = key
+            self._frame = cohort_progress(sessions)
+        return self._frame
+
+
+# improvements ranked within a primary_condition (higher is better for both)
+RANK_METRICS = ("rom_delta", "grip_delta")
+
+
+class CohortRanks:
+    """
+    Sorted improvement values per (primary_condition, metric). A patient's percentile is
+    two binary searches; when sessions sync only the patients whose values moved are
+    removed from / inserted into their arrays instead of re-sorting the population.
+    """
+
+    def __init__(self, metrics: tuple[str, ...] = RANK_METRICS):
+        self.metrics = tuple(metrics)
+        self._sorted: dict[tuple[str, str], np.ndarray] = {}
+        self._current: pd.DataFrame | None = None
+
+    def _rebuild(self, cur: pd.DataFrame):
+        self._sorted = {}
+        for cond, grp in cur.groupby("condition", sort=False):
+            for m in self.metrics:
+                self._sorted[(cond, m)] = np.sort(grp[m].dropna().to_numpy(dtype=float))
+
+    def _move(self, cond: str, metric: str, old: float | None, new: float | None, new_cond: str):
+        if old is not None and not np.isnan(old):
+            arr = self._sorted.get((cond, metric))
+            if arr is not None and len(arr):
+                i = int(np.searchsorted(arr, old))
+                if i < len(arr) and arr[i] == old:
+                    self._sorted[(cond, metric)] = np.delete(arr, i)
+        if new is not None and not np.isnan(new):
+            arr = self._sorted.get((new_cond, metric), np.empty(0))
+            self._sorted[(new_cond, metric)] = np.insert(arr, int(np.searchsorted(arr, new)), new)
+
+    def update(self, progress: pd.DataFrame, conditions: pd.Series) -> int:
+        """Sync with a cohort_progress frame and a patient_id -> primary_condition series; returns patients changed."""
+        cur = pd.DataFrame(index=pd.Index(progress["patient_id"].astype(str), name="patient_id"))
+        cond_map = pd.Series(conditions.to_numpy(), index=conditions.index.astype(str))
+        cond_map = cond_map[~cond_map.index.duplicated(keep="last")]
+        cur["condition"] = cur.index.map(cond_map).fillna("—").astype(str)
+        for m in self.metrics:
+            cur[m] = pd.to_numeric(progress[m], errors="coerce").to_numpy()
+
+        prev = self._current
+        if prev is None:
+            self._current = cur
+            self._rebuild(cur)
+            return len(cur)
+
+        idx = prev.index.union(cur.index)
+        old, new = prev.reindex(idx), cur.reindex(idx)
+        changed = old["condition"].ne(new["condition"]).to_numpy(copy=True)
+        for m in self.metrics:
+            o, n = old[m].to_numpy(), new[m].to_numpy()
+            changed |= (o != n) & ~(np.isnan(o) & np.isnan(n))
+        n_changed = int(changed.sum())
+        self._current = cur
+        if n_changed == 0:
+            return 0
+        # past a few thousand moves one sort per group is cheaper than array inserts
+        if n_changed > 2_000:
+            self._rebuild(cur)
+            return n_changed
+
+        old, new = old[changed], new[changed]
+        for m in self.metrics:
+            for oc, ov, nc, nv in zip(old["condition"], old[m], new["condition"], new[m]):
+                self._move(oc, m, ov, nv, nc)
+        return n_changed
+
+    def percentile(self, patient_id: str, metric: str) -> tuple[float | None, int]:
+        """(percentile 0-100 within the patient's condition, cohort size); ties count half."""
+        cur = self._current
+        if cur is None or str(patient_id) not in cur.index:
+            return None, 0
+        row = cur.loc[str(patient_id)]
+        arr = self._sorted.get((row["condition"], metric))
+        v = row[metric]
+        if arr is None or len(arr) == 0 or pd.isna(v):
+            return None, 0 if arr is None else len(arr)
+        lo = np.searchsorted(arr, v, side="left")
+        hi = np.searchsorted(arr, v, side="right")
+        return float((lo + 0.5 * (hi - lo)) / len(arr) * 100.0), len(arr)
+
+    def quantiles(self, condition: str, metric: str, qs=(0.1, 0.25, 0.5, 0.75, 0.9)) -> pd.Series:
+        arr = self._sorted.get((str(condition), metric))
+        if arr is None or len(arr) == 0:
+            return pd.Series(np.nan, index=list(qs))
+        # already sorted: index straight into it
+        pos = np.clip(np.round(np.asarray(qs) * (len(arr) - 1)).astype(int), 0, len(arr) - 1)
+        return pd.Series(arr[pos], index=list(qs))
@@ -1,11 +1,99 @@
 from __future__ import annotations
+import atexit
 import io
+import os
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Iterable
+
 import pandas as pd
 
+# rows handed to to_csv per write; bounds the text buffer for very large chunks
+CSV_CHUNK_ROWS = 10_000
+
+# temp export path -> created (monotonic); shared by every session in the process
+_FILES: dict[str, float] = {}
+_FILES_LOCK = threading.Lock()
+
+
+def write_csv_chunks(chunks: Iterable[pd.DataFrame], out: BinaryIO) -> int:
+    """
+    Write DataFrame chunks as one UTF-8 CSV (with BOM, for Excel) to a binary file.
+    The header comes from the first chunk; later chunks are aligned to its columns.
+    Returns the number of data rows written.
+    """
+    text = io.TextIOWrapper(out, encoding="utf-8-sig", newline="")
+    columns = None
+    rows = 0
+    try:
+        for df in chunks:
+            if df is None:
+                continue
+            if columns is None:
+                columns = list(df.columns)
+                df.to_csv(text, index=False, chunksize=CSV_CHUNK_ROWS)
+            elif len(df):
+                df.reindex(columns=columns).to_csv(text, index=False, header=False, chunksize=CSV_CHUNK_ROWS)
+            rows += len(df)
+        if columns is None:
+            text.write("\n")
+        text.flush()
+    finally:
+        # hand the binary file back open
+        text.detach()
+    return rows
+
+
+def csv_tempfile(chunks: Iterable[pd.DataFrame], suffix: str = ".csv") -> tuple[str, int]:
+    """
+    Stream chunks into a named temp file; returns (path, rows). The file is tracked:
+    discard_export() removes it, sweep_exports() removes it once it is old, and
+    whatever is left goes when the process exits.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="physiotrack-export-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            rows = write_csv_chunks(chunks, f)
+    except Exception:
+        os.remove(path)
+        raise
+    with _FILES_LOCK:
+        _FILES[path] = time.monotonic()
+    return path, rows
+
+
+def discard_export(path: str | None):
+    if not path:
+        return
+    with _FILES_LOCK:
+        _FILES.pop(path, None)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def sweep_exports(max_age_s: float) -> int:
+    """Remove tracked export files older than max_age_s, whichever session made them."""
+    cutoff = time.monotonic() - max_age_s
+    with _FILES_LOCK:
+        old = [p for p, at in _FILES.items() if at < cutoff]
+    for p in old:
+        discard_export(p)
+    return len(old)
+
+
+@atexit.register
+def _remove_exports():
+    for p in list(_FILES):
+        discard_export(p)
+
+
 def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
     if df is None:
         df = pd.DataFrame()
 
-    buf = io.StringIO()
-    df.to_csv(buf, index=False)
-    return ("\ufeff" + buf.getvalue()).encode("utf-8")
+    buf = io.BytesIO()
+    write_csv_chunks([df], buf)
+    return buf.getvalue()
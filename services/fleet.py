@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+FLEET_COLUMNS = ["device_id", "patient_name", "status", "last_seen_at", "battery_pct", "hr", "spo2"]
+
+
+class FleetScanner:
+    """
+    Status + latest readings for every device at once. Per-device /status calls and the
+    latest-readings fetch run concurrently, never more than max_in_flight requests at a
+    time, and the resulting frame is reused for ttl_s.
+    """
+
+    def __init__(self, max_in_flight: int = 16, ttl_s: float = 10.0):
+        self.max_in_flight = max(2, int(max_in_flight))
+        self.ttl_s = float(ttl_s)
+        self._cache: tuple[float, tuple[str, ...], pd.DataFrame] | None = None
+
+    def scan(self, repo, devices: pd.DataFrame | None = None, force: bool = False) -> pd.DataFrame:
+        if devices is None:
+            devices = repo.list_devices()
+        if devices is None or len(devices) == 0 or "device_id" not in devices.columns:
+            return pd.DataFrame(columns=FLEET_COLUMNS)
+
+        ids = tuple(dict.fromkeys(str(d) for d in devices["device_id"].dropna().astype(str) if d))
+        now = time.monotonic()
+        if not force and self._cache is not None:
+            at, cached_ids, frame = self._cache
+            if cached_ids == ids and now - at < self.ttl_s:
+                return frame
+
+        # split the cap: a quarter for the latest-readings fallback, the rest for /status
+        latest_workers = max(1, self.max_in_flight // 4)
+        status_workers = max(1, self.max_in_flight - latest_workers)
+
+        def _status(did: str) -> dict:
+            return repo.get_device(did) or {}
+
+        with ThreadPoolExecutor(max_workers=1) as latest_ex, ThreadPoolExecutor(max_workers=status_workers) as ex:
+            latest_f = latest_ex.submit(repo.get_latest_sensor_readings, list(ids), 2.0, latest_workers)
+            statuses = list(ex.map(_status, ids))
+            try:
+                latest = latest_f.result()
+            except Exception:
+                latest = pd.DataFrame(index=list(ids))
+
+        base = devices.assign(device_id=devices["device_id"].astype(str)).drop_duplicates("device_id").set_index("device_id")
+        rows = []
+        for did, st_ in zip(ids, statuses):
+            snap = latest.loc[did].dropna().to_dict() if did in latest.index else {}
+            b = base.loc[did].to_dict() if did in base.index else {}
+            battery = st_.get("battery_pct", st_.get("battery"))
+            rows.append(
+                {
+                    "device_id": did,
+                    "patient_name": b.get("patient_name") or "—",
+                    "status": st_.get("status") or b.get("status") or "unknown",
+                    "last_seen_at": st_.get("last_seen_at") or b.get("last_seen_at"),
+                    "battery_pct": pd.to_numeric(battery, errors="coerce") if battery is not None else None,
+                    "hr": snap.get("HR"),
+                    "spo2": snap.get("SPO2"),
+                }
+            )
+
+        frame = pd.DataFrame(rows, columns=FLEET_COLUMNS)
+        frame["last_seen_at"] = pd.to_datetime(frame["last_seen_at"].astype(str), errors="coerce", utc=True, format="ISO8601")
+        hb = getattr(repo, "heartbeats", None)
+        if hb is not None:
+            hb.update_frame(frame)
+        self._cache = (now, ids, frame)
+        return frame
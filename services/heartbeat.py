@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left, insort
+
+import pandas as pd
+
+from services.timeseries import now_ms
+
+_NEVER = 0  # devices with no last_seen_at sort first, i.e. silent forever
+
+
+def _ms(value) -> int:
+    if value is None:
+        return _NEVER
+    try:
+        ts = pd.Timestamp(value)
+    except Exception:
+        return _NEVER
+    if pd.isna(ts):
+        return _NEVER
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts
+    return int(ts.value // 1_000_000)
+
+
+class HeartbeatIndex:
+    """
+    Last-seen time per device, kept sorted so "silent for more than N minutes" is a
+    bisect plus a prefix slice instead of a scan over the device list. Fed from every
+    device poll (list_devices, get_device, fleet scans).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last: dict[str, int] = {}
+        self._order: list[tuple[int, str]] = []
+        self._therapist: dict[str, str | None] = {}
+        self._label: dict[str, str] = {}
+        self._alerted: set[str] = set()
+        # monotonic time of the last full device-list poll
+        self.refreshed_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def update(self, device_id, last_seen, therapist_id=None, label=None):
+        did = str(device_id)
+        ms = _ms(last_seen)
+        with self._lock:
+            if therapist_id is not None:
+                self._therapist[did] = str(therapist_id)
+            if label:
+                self._label[did] = str(label)
+            old = self._last.get(did)
+            if old is not None:
+                if ms <= old:
+                    return
+                i = bisect_left(self._order, (old, did))
+                if i < len(self._order) and self._order[i] == (old, did):
+                    del self._order[i]
+            self._last[did] = ms
+            insort(self._order, (ms, did))
+
+    def update_frame(self, df: pd.DataFrame, id_col: str = "device_id", ts_col: str = "last_seen_at"):
+        if df is None or len(df) == 0 or id_col not in df.columns or ts_col not in df.columns:
+            return
+        self.refreshed_at = time.monotonic()
+        df = df[df[id_col].notna()]
+        ids = df[id_col].astype(str)
+        seen = pd.to_datetime(df[ts_col].astype(str), errors="coerce", utc=True, format="ISO8601")
+        ms = pd.Series(pd.DatetimeIndex(seen).as_unit("ms").asi8, index=df.index).where(seen.notna(), _NEVER)
+
+        # only rows that are new or moved forward touch the sorted order
+        old = ids.map(self._last)
+        changed = old.isna() | (ms > old)
+        therapist = df["assigned_therapist_id"] if "assigned_therapist_id" in df.columns else pd.Series(None, index=df.index)
+        label = df["patient_name"] if "patient_name" in df.columns else pd.Series(None, index=df.index)
+        for did, t, tid, lbl in zip(ids[changed], ms[changed], therapist[changed], label[changed]):
+            seen_at = None if t == _NEVER else pd.Timestamp(int(t), unit="ms", tz="UTC")
+            self.update(did, seen_at, therapist_id=None if pd.isna(tid) else tid, label=lbl)
+
+    def silent_for(self, minutes: float, now: int | None = None) -> pd.DataFrame:
+        """Devices not seen for more than `minutes`, longest-silent first."""
+        now = int(now if now is not None else now_ms())
+        cutoff = now - int(minutes * 60_000)
+        with self._lock:
+            hits = self._order[: bisect_left(self._order, (cutoff, ""))]
+            rows = [
+                {
+                    "device_id": did,
+                    "patient_name": self._label.get(did, "—"),
+                    "assigned_therapist_id": self._therapist.get(did),
+                    "last_seen_at": pd.Timestamp(ms, unit="ms", tz="UTC") if ms != _NEVER else pd.NaT,
+                    "silent_min": (now - ms) / 60_000.0 if ms != _NEVER else None,
+                }
+                for ms, did in hits
+            ]
+        return pd.DataFrame(rows, columns=["device_id", "patient_name", "assigned_therapist_id", "last_seen_at", "silent_min"])
+
+    def offline_by_therapist(self, minutes: float, now: int | None = None) -> pd.Series:
+        silent = self.silent_for(minutes, now=now)
+        if len(silent) == 0:
+            return pd.Series(dtype=int, name="offline")
+        return silent["assigned_therapist_id"].fillna("unassigned").value_counts().rename("offline")
+
+    def new_stale(self, minutes: float, now: int | None = None) -> list[str]:
+        """Devices that crossed the staleness threshold since the last call (each reported once)."""
+        silent = self.silent_for(minutes, now=now)
+        ids = set(silent["device_id"])
+        with self._lock:
+            fresh = sorted(ids - self._alerted)
+            # devices that came back can alert again next time they go quiet
+            self._alerted = ids
+        return fresh
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class MetricDef:
+    code: str        # canonical code, as /sensor-readings expects it
+    label: str
+    unit: str
+    decimals: int
+    aliases: tuple[str, ...] = ()
+
+
+METRICS: list[MetricDef] = [
+    MetricDef("HR", "Heart Rate", "bpm", 0, ("heart rate", "heart_rate", "hr", "bpm")),
+    MetricDef("SPO2", "SpO₂", "%", 0, ("spo2", "spo₂", "sp02", "oxygen")),
+    MetricDef("ECG", "ECG", "", 2, ("ecg",)),
+    MetricDef("TEMP_DS18B20", "Body Temperature", "°C", 1, ("body temperature", "body_temp", "temp_ds18b20")),
+    MetricDef("DHT_TEMP", "Room Temperature", "°C", 1, ("room temperature", "room_temp", "dht_temp")),
+    MetricDef("DHT_HUM", "Room Humidity", "%", 1, ("room humidity", "humidity", "dht_hum")),
+    MetricDef("GSR", "Sweat", "", 0, ("sweat", "gsr")),
+    MetricDef("LOADCELL_KG", "Loadcell", "kg", 1, ("loadcell", "load cell", "loadcell_kg")),
+]
+
+BY_CODE: dict[str, MetricDef] = {m.code: m for m in METRICS}
+
+# lower-cased name/alias -> canonical code
+_ALIAS: dict[str, str] = {}
+for _m in METRICS:
+    for _a in (_m.code, _m.label, *_m.aliases):
+        _ALIAS[_a.strip().lower()] = _m.code
+
+# (label, code) pairs for metric pickers
+SENSOR_METRICS = [(m.label, m.code) for m in METRICS]
+
+
+def canonical_code(name) -> str:
+    key = str(name or "").strip()
+    return _ALIAS.get(key.lower(), key.upper())
+
+
+def canonicalize(names: pd.Series) -> pd.Series:
+    """Vectorized canonical_code; unknown names pass through upper-cased."""
+    key = names.astype(str).str.strip()
+    return key.str.lower().map(_ALIAS).fillna(key.str.upper())
+
+
+def format_value(code: str, value) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return "—"
+    m = BY_CODE.get(code)
+    try:
+        f = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if m is None:
+        return str(int(round(f))) if abs(f - round(f)) < 1e-9 else f"{f:.2f}"
+    return f"{f:.{m.decimals}f}"
+
+
+def snapshot_items(snap: dict, known_only: bool = False) -> list[tuple[str, str, str]]:
+    """(label, formatted value, unit) for a canonical snapshot, in registry order."""
+    out = [(m.label, format_value(m.code, snap[m.code]), m.unit) for m in METRICS if m.code in snap]
+    if not known_only:
+        out += [(k, format_value(k, v), "") for k, v in sorted(snap.items()) if k not in BY_CODE]
+    return out
@@ -1,16 +1,7 @@
 import pandas as pd
 import random
 
-
-_SEV_RANK = {
-    "low": 1,
-    "info": 1,
-    "med": 2,
-    "medium": 2,
-    "warning": 3,
-    "high": 3,
-    "critical": 4,
-}
+from services.alerts import SEVERITY_RANK
 
 
 def _to_day(series: pd.Series) -> pd.Series:
@@ -33,7 +24,7 @@ def kpi_dashboard(repo):
     high_risk_open = 0
     if alerts_open is not None and len(alerts_open) > 0 and "severity" in alerts_open.columns:
         sev = alerts_open["severity"].astype(str).str.lower()
-        high_risk_open = int(sev.map(_SEV_RANK).fillna(2).ge(3).sum())
+        high_risk_open = int(sev.map(SEVERITY_RANK).fillna(2).ge(3).sum())
 
     today_sessions = 0
     if sessions is not None and len(sessions) > 0 and "started_at" in sessions.columns:
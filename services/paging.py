@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def frame_fingerprint(df: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> int:
+    """Content hash of df, or of just `columns` (so e.g. a ticking last_seen_at doesn't count)."""
+    if df is None or len(df) == 0:
+        return 0
+    if columns is not None:
+        df = df[[c for c in dict.fromkeys(columns) if c in df.columns]]
+    return int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+class PagedFrame:
+    """
+    Sort / filter / page view over one frame. Sort orders are computed once per column
+    and filter masks once per query, so turning a page is a slice of precomputed
+    positions; only the visible page is formatted and sent to the browser. Built pages
+    are kept, so going back and forth between pages formats each one once.
+
+    key_columns: the columns the view shows; `key` fingerprints only those.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        search_cols: list[str],
+        formatters: Optional[dict[str, Callable[[pd.Series], pd.Series]]] = None,
+        key_columns: Optional[Iterable[str]] = None,
+    ):
+        self.source = df.reset_index(drop=True)
+        self.key_columns = None if key_columns is None else list(key_columns)
+        self.key = frame_fingerprint(df, self.key_columns)
+        self.search_cols = [c for c in search_cols if c in self.source.columns]
+        self.formatters = formatters or {}
+        self._orders: dict[tuple[str, bool], np.ndarray] = {}
+        self._text: Optional[pd.Series] = None
+        self._masks: dict[str, np.ndarray] = {}
+        self._rows: dict[tuple, np.ndarray] = {}
+        self._pages: dict[tuple, pd.DataFrame] = {}
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+    def order(self, col: Optional[str], ascending: bool = True) -> np.ndarray:
+        if not col or col not in self.source.columns:
+            return np.arange(len(self.source))
+        k = (col, bool(ascending))
+        if k not in self._orders:
+            s = self.source[col]
+            if s.dtype == object:
+                # raw API values: numeric if they all parse, else compared as text
+                num = pd.to_numeric(s, errors="coerce")
+                s = num if num.notna().sum() == s.notna().sum() else s.astype("string")
+            self._orders[k] = s.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+        return self._orders[k]
+
+    def mask(self, query: str) -> Optional[np.ndarray]:
+        q = (query or "").strip().lower()
+        if not q or not self.search_cols:
+            return None
+        if q not in self._masks:
+            if self._text is None:
+                # one lower-cased haystack per row, built on the first search only
+                parts = [self.source[c].astype("string").fillna("") for c in self.search_cols]
+                text = parts[0]
+                for p in parts[1:]:
+                    text = text + "\x1f" + p
+                self._text = text.str.lower()
+            if len(self._masks) > 32:
+                self._masks.clear()
+            self._masks[q] = self._text.str.contains(q, regex=False).to_numpy(dtype=bool)
+        return self._masks[q]
+
+    def rows(self, sort: Optional[str] = None, ascending: bool = True, query: str = "") -> np.ndarray:
+        """Row positions in display order after filtering."""
+        k = (sort, bool(ascending), (query or "").strip().lower())
+        if k not in self._rows:
+            order = self.order(sort, ascending)
+            m = self.mask(query)
+            if len(self._rows) > 32:
+                self._rows.clear()
+            self._rows[k] = order if m is None else order[m[order]]
+        return self._rows[k]
+
+    def _build(self, positions: np.ndarray) -> pd.DataFrame:
+        out = self.source.iloc[positions].copy()
+        for col, fmt in self.formatters.items():
+            if col in out.columns:
+                out[col] = fmt(out[col])
+        return out
+
+    def page(
+        self,
+        n: int,
+        size: int,
+        sort: Optional[str] = None,
+        ascending: bool = True,
+        query: str = "",
+    ) -> tuple[pd.DataFrame, int]:
+        """(formatted page n, 0-based, total matching rows)."""
+        rows = self.rows(sort, ascending, query)
+        total = len(rows)
+        pages = max(1, -(-total // size))
+        n = min(max(int(n), 0), pages - 1)
+        k = (sort, bool(ascending), (query or "").strip().lower(), size, n)
+        if k not in self._pages:
+            if len(self._pages) > 8:
+                self._pages.clear()
+            self._pages[k] = self._build(rows[n * size : (n + 1) * size])
+        return self._pages[k], total
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# columns a rule condition can reference (pandas.eval syntax, e.g. "completion_pct >= 80 and pain <= 3")
+FEATURE_COLUMNS = [
+    "completion_pct",
+    "pain",
+    "rom",
+    "grip",
+    "sessions_recent",
+    "days_since_last",
+    "hr",
+    "spo2",
+]
+RECOMMENDATION_COLUMNS = ["patient_id", "patient_name", "rule", "action", "priority", *FEATURE_COLUMNS]
+
+
+@dataclass(frozen=True)
+class ProgressionRule:
+    name: str
+    title: str
+    condition: str
+    action: str
+    priority: int = 50
+    # when an exclusive rule fires for a patient, lower-priority recommendations are dropped
+    exclusive: bool = False
+
+
+DEFAULT_RULES: list[ProgressionRule] = [
+    ProgressionRule(
+        "safety_pause",
+        "Safety Pause Rule",
+        "spo2 < 90",
+        "Pause program and alert therapist",
+        priority=100,
+        exclusive=True,
+    ),
+    ProgressionRule(
+        "increase_intensity",
+        "Increase Intensity Rule",
+        "completion_pct >= 80 and pain <= 3",
+        "Increase intensity by 10%",
+        priority=10,
+    ),
+]
+
+
+def patient_features(
+    patients: pd.DataFrame,
+    sessions: pd.DataFrame,
+    latest: pd.DataFrame | None = None,
+    recent_days: int = 14,
+    now: pd.Timestamp | None = None,
+) -> pd.DataFrame:
+    """
+    One row per patient: recent completion, latest pain/ROM/grip, session activity and
+    the latest HR/SpO2 of their device (`latest` is get_latest_sensor_readings output).
+    """
+    base = pd.DataFrame(
+        {
+            "patient_id": patients["patient_id"].astype(str).to_numpy(),
+            "patient_name": patients.get("name", patients.get("patient_name", pd.Series("—", index=patients.index))).astype(str).to_numpy(),
+            "device_id": patients.get("device_id", pd.Series(None, index=patients.index)).to_numpy(),
+        }
+    ).drop_duplicates("patient_id")
+
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    feats = pd.DataFrame(index=pd.Index(base["patient_id"], name="patient_id"))
+    if sessions is not None and len(sessions):
+        s = pd.DataFrame(
+            {
+                "patient_id": sessions["patient_id"].astype(str).to_numpy(),
+                "t": pd.to_datetime(sessions["started_at"], errors="coerce", utc=True).to_numpy(),
+                "adherence": pd.to_numeric(sessions.get("adherence"), errors="coerce").to_numpy(),
+                "pain": pd.to_numeric(sessions.get("pain_score"), errors="coerce").to_numpy(),
+                "rom": pd.to_numeric(sessions.get("rom_avg_deg"), errors="coerce").to_numpy(),
+                "grip": pd.to_numeric(sessions.get("grip_avg_kg"), errors="coerce").to_numpy(),
+            }
+        ).dropna(subset=["t"])
+        s = s.sort_values(["patient_id", "t"], kind="stable")
+        g = s.groupby("patient_id", sort=False)
+        # GroupBy.last skips NaN, i.e. the latest value actually reported per column
+        feats = feats.join(g[["pain", "rom", "grip"]].last()).join(g["t"].max().rename("last_t"))
+
+        recent = s[s["t"] >= now - pd.Timedelta(days=recent_days)]
+        rg = recent.groupby("patient_id", sort=False)
+        feats = feats.join((rg["adherence"].mean() * 100.0).rename("completion_pct")).join(rg.size().rename("sessions_recent"))
+        feats["days_since_last"] = (now - feats["last_t"]).dt.total_seconds() / 86400.0
+        feats = feats.drop(columns=["last_t"])
+
+    out = base.set_index("patient_id").join(feats)
+    out["sessions_recent"] = out.get("sessions_recent", pd.Series(dtype=float)).fillna(0)
+
+    if latest is not None and len(latest):
+        dev = out["device_id"].astype("string")
+        for metric, col in (("HR", "hr"), ("SPO2", "spo2")):
+            if metric in latest.columns:
+                vals = pd.to_numeric(latest[metric], errors="coerce")
+                vals.index = vals.index.astype(str)
+                out[col] = dev.map(vals).astype(float)
+
+    for c in FEATURE_COLUMNS:
+        if c not in out.columns:
+            out[c] = np.nan
+    return out.reset_index()
+
+
+def validate_rule(condition: str, features: pd.DataFrame) -> str | None:
+    """Error message if the condition does not evaluate to a boolean column, else None."""
+    try:
+        res = features.head(1).eval(condition)
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+    if not isinstance(res, pd.Series) or res.dtype != bool:
+        return "Condition must be a comparison, e.g. completion_pct >= 80 and pain <= 3"
+    return None
+
+
+def evaluate_rules(features: pd.DataFrame, rules: list[ProgressionRule]) -> pd.DataFrame:
+    """
+    Every rule is one vectorized expression over all patients (NaN compares False, so
+    missing data never fires a rule). Returns one row per (patient, fired rule).
+    """
+    if features is None or len(features) == 0 or not rules:
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+
+    parts = []
+    for rule in rules:
+        try:
+            hit = features.eval(rule.condition)
+        except Exception:
+            continue
+        if not isinstance(hit, pd.Series):
+            continue
+        hit = hit.fillna(False).astype(bool).to_numpy()
+        if hit.any():
+            parts.append(features.loc[hit].assign(rule=rule.title, action=rule.action, priority=rule.priority, _exclusive=rule.exclusive))
+    if not parts:
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+
+    out = pd.concat(parts, ignore_index=True).sort_values(["patient_id", "priority"], ascending=[True, False], kind="stable")
+    # drop anything ranked below an exclusive rule that fired for the same patient
+    top_exclusive = out["priority"].where(out["_exclusive"]).groupby(out["patient_id"]).transform("max")
+    out = out[top_exclusive.isna() | (out["priority"] >= top_exclusive)]
+    return out.sort_values(["priority", "patient_name"], ascending=[False, True], kind="stable")[RECOMMENDATION_COLUMNS].reset_index(drop=True)
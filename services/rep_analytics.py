@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+REP_STAT_COLUMNS = ["session_id", "started_at", "week", "reps", "rom_mean", "rom_cv", "fatigue_slope", "fatigue_pct"]
+WEEKLY_REP_COLUMNS = ["week", "sessions", "reps", "rom_mean", "rom_cv", "fatigue_slope", "fatigue_pct"]
+
+
+def session_rep_stats(reps: pd.DataFrame, sessions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per session from a long rep frame (session_id, rep_index, rom_deg):
+    reps, mean ROM, ROM consistency (coefficient of variation, %), fatigue slope
+    (least-squares ROM change per rep, degrees) and the ROM lost over the whole set as
+    a percentage of the mean.
+    """
+    if reps is None or len(reps) == 0:
+        return pd.DataFrame(columns=REP_STAT_COLUMNS)
+
+    r = pd.DataFrame(
+        {
+            "session_id": reps["session_id"].astype(str).to_numpy(),
+            "x": pd.to_numeric(reps["rep_index"], errors="coerce").to_numpy(dtype=float),
+            "y": pd.to_numeric(reps["rom_deg"], errors="coerce").to_numpy(dtype=float),
+        }
+    ).dropna()
+    r["xy"] = r["x"] * r["y"]
+    r["xx"] = r["x"] * r["x"]
+
+    g = r.groupby("session_id", sort=False)
+    sums = g[["x", "y", "xy", "xx"]].sum()
+    n = g.size()
+    den = n * sums["xx"] - sums["x"] ** 2
+    slope = (n * sums["xy"] - sums["x"] * sums["y"]) / den.where(den > 1e-9)
+    mean = g["y"].mean()
+
+    out = pd.DataFrame(
+        {
+            "reps": n,
+            "rom_mean": mean,
+            "rom_cv": g["y"].std() / mean.where(mean > 0) * 100.0,
+            "fatigue_slope": slope,
+            "fatigue_pct": slope * (n - 1) / mean.where(mean > 0) * 100.0,
+        }
+    )
+    out.index.name = "session_id"
+
+    started = pd.Series(
+        pd.to_datetime(sessions["started_at"], errors="coerce", utc=True).to_numpy(),
+        index=sessions["session_id"].astype(str).to_numpy(),
+    )
+    started = started[~started.index.duplicated()]
+    out["started_at"] = out.index.map(started)
+    out["week"] = pd.to_datetime(out["started_at"], utc=True).dt.tz_localize(None).dt.to_period("W").dt.start_time
+    return out.reset_index().sort_values("started_at", kind="stable")[REP_STAT_COLUMNS].reset_index(drop=True)
+
+
+def weekly_rep_trends(stats: pd.DataFrame) -> pd.DataFrame:
+    """Session rep stats averaged per calendar week."""
+    if stats is None or len(stats) == 0:
+        return pd.DataFrame(columns=WEEKLY_REP_COLUMNS)
+    g = stats.dropna(subset=["week"]).groupby("week", sort=True)
+    out = g[["reps", "rom_mean", "rom_cv", "fatigue_slope", "fatigue_pct"]].mean()
+    out.insert(0, "sessions", g.size())
+    return out.reset_index()[WEEKLY_REP_COLUMNS]
+
+
+def session_label(summary: dict) -> str:
+    started = pd.Timestamp(summary.get("started_at")) if summary.get("started_at") is not None else pd.NaT
+    day = started.strftime("%Y-%m-%d %H:%M") if pd.notna(started) else "—"
+    return f"{day} • {summary.get('exercise_name') or '—'} ({str(summary.get('session_id'))[:8]})"
+
+
+def session_labels(summaries: list[dict]) -> dict[str, str]:
+    """session_id -> session_label, with the full session_id where two labels would collide."""
+    labels = {str(s.get("session_id")): session_label(s) for s in summaries}
+    seen = pd.Series(list(labels.values())).value_counts()
+    return {sid: (f"{lab} [{sid}]" if seen[lab] > 1 else lab) for sid, lab in labels.items()}
+
+
+def align_rep_rom(bundles: list[dict]) -> pd.DataFrame:
+    """Rep-by-rep ROM of several session bundles side by side: rep_index plus one column per session_id."""
+    cols = {}
+    for b in bundles:
+        reps = b.get("reps")
+        if reps is None or len(reps) == 0:
+            continue
+        s = pd.Series(
+            pd.to_numeric(reps["rom_deg"], errors="coerce").to_numpy(),
+            index=pd.to_numeric(reps["rep_index"], errors="coerce").to_numpy(),
+        )
+        cols[str(b["summary"]["session_id"])] = s[~s.index.duplicated()]
+    if not cols:
+        return pd.DataFrame(columns=["rep_index"])
+    out = pd.DataFrame(cols).sort_index()
+    out.index.name = "rep_index"
+    return out.reset_index()
+
+
+def compare_sessions(bundles: list[dict]) -> pd.DataFrame:
+    """Headline metrics of several session bundles, one column per session_id."""
+    reps = [b["reps"].assign(session_id=str(b["summary"]["session_id"])) for b in bundles if b.get("reps") is not None and len(b["reps"])]
+    summaries = pd.DataFrame([b["summary"] for b in bundles], columns=["session_id", "started_at"])
+    stats = session_rep_stats(pd.concat(reps, ignore_index=True) if reps else None, summaries).set_index("session_id")
+
+    cols = {}
+    for b in bundles:
+        s = b["summary"]
+        st_row = stats.loc[s["session_id"]] if s["session_id"] in stats.index else None
+        adh = s.get("adherence")
+        cols[str(s["session_id"])] = {
+            "Status": s.get("status"),
+            "Duration (min)": s.get("duration_min"),
+            "Rep count": s.get("rep_count"),
+            "ROM avg (°)": s.get("rom_avg_deg"),
+            "Grip avg (kg)": s.get("grip_avg_kg"),
+            "Pain": s.get("pain_score"),
+            "Adherence (%)": round(adh * 100) if adh is not None else None,
+            "ROM CV (%)": None if st_row is None else round(float(st_row["rom_cv"]), 1),
+            "Fatigue (%)": None if st_row is None else round(float(st_row["fatigue_pct"]), 1),
+            "Highlights": len(b.get("highlights") or []),
+        }
+    return pd.DataFrame(cols).astype(object)
@@ -1,21 +1,84 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+from typing import Any, Iterable, Iterator, Optional
 
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
 import requests
 import streamlit as st
 
+from services.ai_history import AiPredictionHistory
+from services.alert_sla import AlertSlaCache
+from services.alerts import SEVERITY_RANK, AlertFeed, AlertsView, AnomalyEngine
+from services.cohort import CohortProgressCache, CohortRanks
+from services.fleet import FleetScanner
+from services.heartbeat import HeartbeatIndex
+from services.metric_registry import canonical_code, canonicalize
+from services.paging import frame_fingerprint
+from services.progression import patient_features
+from services.rollups import RollupStore
+from services.search import RESULT_COLUMNS, SearchIndex
+from services.session_sensors import SESSION_METRICS, overlay_reps, rep_timeline
+from services.stream import get_hub
+from services.timeseries import align_metrics, iso_z, page_readings, readings_frame, to_epoch_ms, to_utc
+from services.tsstore import open_store
+
 DEFAULT_BASE_URL = os.getenv("PHYSIOTRACK_API_BASE_URL", "http://127.0.0.1:8000").strip().rstrip("/")
 
+REP_COLUMNS = ["rep_index", "rom_deg", "rep_ts"]
+_REP_TS_KEYS = ("rep_ts", "ts", "timestamp", "ended_at", "started_at")
+
 
 class ApiRepo:
     def __init__(self, base_url: str):
         self.base_url = (base_url or "").strip().rstrip("/")
         if not self.base_url:
             raise ValueError("base_url is empty")
+        self.sensor_rollups = RollupStore()
+        self.ts_store = open_store(self.base_url)
+        self.sensor_streams = get_hub(self.base_url)
+        self.fleet = FleetScanner()
+        self.heartbeats = HeartbeatIndex()
+        self.ai_history = AiPredictionHistory()
+        self.anomalies = AnomalyEngine()
+        self.sensor_streams.add_sink(self.anomalies.ingest)
+        self.alert_sla = AlertSlaCache()
+        self.alert_feed = AlertFeed()
+        self.cohort = CohortProgressCache()
+        self.cohort_ranks = CohortRanks()
+        self.search_index = SearchIndex()
+        self.search_ttl_s = 300.0
+        self.export_page_size = 5000
+        # unfiltered list_alerts result, reused for alerts_ttl_s and patched on local updates
+        self._alerts_local: Optional[tuple[float, pd.DataFrame]] = None
+        self.alerts_ttl_s = 30.0
+        # above this many alerts, filtered views go back to the server
+        self.alerts_max_local = 50_000
+        self._alerts_view: Optional[AlertsView] = None
+        # patient_id ("" = all) -> (fetched_at, assignments frame)
+        self._assignments_cache: dict[str, tuple[float, pd.DataFrame]] = {}
+        self.assignments_ttl_s = 60.0
+        # (fetched_at, patients fingerprint, patient_features frame) for the progression rules
+        self._features_cache: Optional[tuple[float, int, pd.DataFrame]] = None
+        self.features_ttl_s = 30.0
+        # patient_id -> name, refreshed whenever /patients is fetched anyway
+        self.patient_names: dict[str, str] = {}
+        self.max_workers = 8
+        # batch endpoints the backend answered 404/405 for; we stop probing them
+        self._no_batch: set[str] = set()
+        self._latest_cache: dict[str, tuple[float, dict]] = {}
+        # session_id -> (completed, fetched_at, rep overlay)
+        self._session_overlays: dict[str, tuple[bool, float, pd.DataFrame]] = {}
+        # session_id -> (final, fetched_at, reps); final once the session is completed
+        self._rep_cache: dict[str, tuple[bool, float, pd.DataFrame]] = {}
+        # session_id -> (final, fetched_at, {summary, reps, highlights})
+        self._session_bundles: dict[str, tuple[bool, float, dict]] = {}
+        # index into list_rep_metrics' candidate routes that last returned reps
+        self._rep_route: Optional[int] = None
 
     # ---------- low-level ----------
     def _url(self, path: str) -> str:
@@ -36,6 +99,28 @@ class ApiRepo:
         r.raise_for_status()
         return r.json()
 
+    def _try_batch(self, name: str, fn):
+        if name in self._no_batch:
+            return None
+        try:
+            return fn()
+        except requests.HTTPError as e:
+            code = e.response.status_code if e.response is not None else 0
+            if code in (404, 405, 422, 501):
+                self._no_batch.add(name)
+            return None
+        except Exception:
+            return None
+
+    def _map_concurrent(self, fn, items: list, max_workers: Optional[int] = None) -> list:
+        if not items:
+            return []
+        workers = min(int(max_workers or self.max_workers), len(items))
+        if workers <= 1:
+            return [fn(x) for x in items]
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(fn, items))
+
     # ---------- basics ----------
     def health(self) -> bool:
         try:
@@ -45,19 +130,29 @@ class ApiRepo:
 
     # ---------- patients ----------
     def list_patients(self) -> pd.DataFrame:
-        patients = self._get("/patients") or []
+        patients = [p for page in self._iter_pages("/patients") for p in page]
+        self.patient_names.update({str(p["patient_id"]): p["name"] for p in patients if p.get("patient_id") and p.get("name")})
+
+        df = self._patient_frame(patients, *self._patient_context())
+        self.search_index.sync("patient", df)
+        return df
+
+    def _patient_context(self, alert_pages: Optional[Iterable[list[dict]]] = None) -> tuple[dict, dict, dict]:
+        """
+        Device per patient, open alert count and worst open severity rank per patient.
+        Alerts are only counted, so they can come in pages (alert_pages) instead of one list.
+        """
         devices = self._get("/devices") or []
-        alerts = self._get("/alerts/all") or []
-
+        if alert_pages is None:
+            alert_pages = [self._get("/alerts/all") or []]
         dev_by_pid: dict[str, dict] = {}
         for d in devices:
             pid = d.get("patient_id")
             if pid:
                 dev_by_pid[str(pid)] = d
-        sev_rank = {"low": 1, "info": 1, "med": 2, "medium": 2, "warning": 3, "high": 3, "critical": 4}
         worst: dict[str, int] = {}
         open_cnt: dict[str, int] = {}
-        for a in alerts:
+        for a in (a for page in alert_pages for a in page):
             pid = a.get("patient_id")
             if not pid:
                 continue
@@ -65,8 +160,10 @@ class ApiRepo:
             if (a.get("status") or "open").lower() == "open":
                 open_cnt[pid] = open_cnt.get(pid, 0) + 1
                 s = (a.get("severity") or "med").lower()
-                worst[pid] = max(worst.get(pid, 0), sev_rank.get(s, 2))
+                worst[pid] = max(worst.get(pid, 0), SEVERITY_RANK.get(s, 2))
+        return dev_by_pid, open_cnt, worst
 
+    def _patient_frame(self, patients: list[dict], dev_by_pid: dict, open_cnt: dict, worst: dict) -> pd.DataFrame:
         rows = []
         for p in patients:
             pid = str(p.get("patient_id"))
@@ -98,7 +195,6 @@ class ApiRepo:
                     "last_seen_at": pd.to_datetime(d.get("last_seen_at")) if d.get("last_seen_at") else pd.NaT,
                 }
             )
-
         return pd.DataFrame(rows)
 
     def get_patient(self, patient_id: str) -> dict | None:
@@ -110,14 +206,18 @@ class ApiRepo:
     # ---------- sessions ----------
     def list_sessions(self, patient_id: Optional[str] = None) -> pd.DataFrame:
         params = {"patient_id": patient_id} if patient_id else None
-        items = self._get("/sessions", params=params) or []
+        items = [s for page in self._iter_pages("/sessions", params=params) for s in page]
 
         ex_map = {str(x["exercise_id"]): x.get("exercise_name") for x in (self._get("/exercises") or []) if x.get("exercise_id")}
 
+        df = self._session_frame(items, ex_map)
+        if not patient_id:
+            self.search_index.sync("session", df)
+        return df
+
+    def _session_frame(self, items: list[dict], ex_map: dict) -> pd.DataFrame:
         rows = []
         for s in items:
-            started = pd.to_datetime(s.get("started_at")) if s.get("started_at") else pd.NaT
-            ended = pd.to_datetime(s.get("ended_at")) if s.get("ended_at") else pd.NaT
             duration_sec = int(s.get("duration_sec") or 0)
 
             adh = s.get("adherence")
@@ -136,9 +236,8 @@ class ApiRepo:
                     "patient_id": str(s.get("patient_id")),
                     "exercise_id": str(s.get("exercise_id")) if s.get("exercise_id") else None,
                     "exercise_name": ex_map.get(str(s.get("exercise_id")), "—") if s.get("exercise_id") else "—",
-                    "started_at": started,
-                    "ended_at": ended,
-                    "status": "completed" if pd.notna(ended) else "in_progress",
+                    "started_at": s.get("started_at") or None,
+                    "ended_at": s.get("ended_at") or None,
                     "duration_sec": duration_sec,
                     "duration_min": int(round(duration_sec / 60.0)) if duration_sec else 0,
                     "rep_count": int(s.get("rep_count") or 0),
@@ -150,7 +249,36 @@ class ApiRepo:
                 }
             )
 
-        return pd.DataFrame(rows)
+        df = pd.DataFrame(rows)
+        if len(df):
+            # one parse per column instead of one per session
+            df["started_at"] = pd.to_datetime(df["started_at"], errors="coerce", utc=True, format="ISO8601")
+            df["ended_at"] = pd.to_datetime(df["ended_at"], errors="coerce", utc=True, format="ISO8601")
+            df.insert(df.columns.get_loc("ended_at") + 1, "status", np.where(df["ended_at"].notna(), "completed", "in_progress"))
+        return df
+
+    def cohort_progress(self, sessions: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Progress of every patient (see services.cohort), with patient names."""
+        if sessions is None:
+            sessions = self.list_sessions()
+        out = self.cohort.progress(sessions)
+        if not self.patient_names:
+            self.list_patients()
+        return out.assign(patient_name=out["patient_id"].map(self.patient_names).fillna("—"))
+
+    def rule_features(self, patients: pd.DataFrame) -> pd.DataFrame:
+        """patient_features for the progression rules, reused for features_ttl_s while the patients stay the same."""
+        # only what patient_features reads, so a ticking last_seen_at doesn't drop the cache
+        key = frame_fingerprint(patients, ["patient_id", "name", "device_id"])
+        cached = self._features_cache
+        if cached is not None and cached[1] == key and time.monotonic() - cached[0] < self.features_ttl_s:
+            return cached[2]
+        sessions = self.list_sessions()
+        device_ids = patients["device_id"].dropna().astype(str).tolist() if "device_id" in patients.columns else []
+        latest = self.get_latest_sensor_readings(device_ids) if device_ids else None
+        df = patient_features(patients, sessions, latest)
+        self._features_cache = (time.monotonic(), key, df)
+        return df
 
     def get_session(self, session_id: str) -> dict | None:
         try:
@@ -196,11 +324,12 @@ class ApiRepo:
             "rom_avg_deg": s.get("rom_avg_deg"),
             "grip_avg_kg": s.get("grip_avg_kg"),
             "pain_score": s.get("pain_score"),
+            "device_id": str(s.get("device_id")) if s.get("device_id") else None,
         }
 
     def list_rep_metrics(self, session_id: str) -> pd.DataFrame:
         if not session_id:
-            return pd.DataFrame(columns=["rep_index", "rom_deg"])
+            return pd.DataFrame(columns=REP_COLUMNS)
 
         def _normalize_items(payload: Any) -> list[dict]:
             if payload is None:
@@ -228,19 +357,37 @@ class ApiRepo:
             ("/sessions/rep-metrics", {"session_id": session_id}),
         ]
 
+        # try the route that answered last time first
+        order = list(range(len(candidates)))
+        if self._rep_route is not None:
+            order.insert(0, order.pop(self._rep_route))
+
         payload = None
         items: list[dict] = []
-        for path, params in candidates:
+        answered: Optional[int] = None
+        for route in order:
+            path, params = candidates[route]
             try:
                 payload = self._get(path, params=params)
-                items = _normalize_items(payload)
-                if items:
-                    break
             except Exception:
                 continue
+            items = _normalize_items(payload)
+            if items:
+                self._rep_route = route
+                break
+            if answered is None:
+                answered = route
+            if route == self._rep_route:
+                # the known route answered: this session just has no reps yet
+                break
+        if not items and self._rep_route is None and answered is not None:
+            self._rep_route = answered
 
         if not items:
-            return pd.DataFrame(columns=["rep_index", "rom_deg"])
+            empty = pd.DataFrame(columns=REP_COLUMNS)
+            # attrs["answered"]: False when every route failed, so the emptiness isn't final
+            empty.attrs["answered"] = answered is not None
+            return empty
 
         rows: list[dict] = []
         for it in items:
@@ -271,26 +418,134 @@ class ApiRepo:
             if rep_i is None and rom is None:
                 continue
 
-            rows.append({"rep_index": rep_i, "rom_deg": rom})
+            rep_ts = next((it.get(k) for k in _REP_TS_KEYS if it.get(k) is not None), None)
+            rows.append({"rep_index": rep_i, "rom_deg": rom, "rep_ts": rep_ts})
 
         df = pd.DataFrame(rows)
         if len(df) == 0:
-            return pd.DataFrame(columns=["rep_index", "rom_deg"])
+            return pd.DataFrame(columns=REP_COLUMNS)
 
         if "rep_index" not in df.columns or df["rep_index"].isna().all():
             df["rep_index"] = list(range(1, len(df) + 1))
 
         df["rep_index"] = pd.to_numeric(df["rep_index"], errors="coerce")
         df["rom_deg"] = pd.to_numeric(df["rom_deg"], errors="coerce")
+        df["rep_ts"] = pd.to_datetime(df["rep_ts"].astype("string"), errors="coerce", utc=True, format="ISO8601")
 
         df = df.dropna(subset=["rep_index"]).sort_values("rep_index").reset_index(drop=True)
-        return df[["rep_index", "rom_deg"]]
+        return df[REP_COLUMNS]
+
+    def get_rep_metrics(self, session_id: str, completed: bool = False) -> pd.DataFrame:
+        """list_rep_metrics, kept for good once the session is completed (10 s otherwise)."""
+        sid = str(session_id or "")
+        cached = self._rep_cache.get(sid)
+        if cached is not None and (cached[0] or time.monotonic() - cached[1] < 10.0):
+            return cached[2]
+        df = self.list_rep_metrics(sid)
+        # a completed session with no reps stays empty; don't re-probe it every rerun
+        final = bool(completed) and df.attrs.get("answered", True)
+        self._rep_cache[sid] = (final, time.monotonic(), df)
+        return df
+
+    def list_rep_metrics_multi(self, sessions: pd.DataFrame, max_workers: Optional[int] = None) -> pd.DataFrame:
+        """Rep metrics of many sessions (fetched concurrently, cached) as one long frame with session_id."""
+        cols = ["session_id", *REP_COLUMNS]
+        if sessions is None or len(sessions) == 0:
+            return pd.DataFrame(columns=cols)
+        done = sessions["status"].eq("completed") if "status" in sessions.columns else pd.Series(False, index=sessions.index)
+        items = list(zip(sessions["session_id"].astype(str), done))
+
+        def _one(item: tuple[str, bool]) -> pd.DataFrame:
+            try:
+                return self.get_rep_metrics(item[0], completed=item[1]).assign(session_id=item[0])
+            except Exception:
+                return pd.DataFrame(columns=cols)
+
+        parts = [p for p in self._map_concurrent(_one, items, max_workers=max_workers) if len(p)]
+        if not parts:
+            return pd.DataFrame(columns=cols)
+        return pd.concat(parts, ignore_index=True)[cols]
+
+    def get_session_bundle(self, session_id: str) -> Optional[dict]:
+        """Summary, rep metrics and highlights of one session; kept for good once it is completed."""
+        sid = str(session_id or "")
+        cached = self._session_bundles.get(sid)
+        if cached is not None and (cached[0] or time.monotonic() - cached[1] < 10.0):
+            return cached[2]
+        summary = self.get_session(sid)
+        if not summary:
+            return None
+        done = summary.get("status") == "completed"
+        bundle = {
+            "summary": summary,
+            "reps": self.get_rep_metrics(sid, completed=done),
+            "highlights": self.list_highlights(sid),
+        }
+        self._session_bundles[sid] = (done, time.monotonic(), bundle)
+        return bundle
+
+    def get_session_bundles(self, session_ids: list[str], max_workers: Optional[int] = None) -> list[dict]:
+        """Bundles for several sessions in the given order; only the ones not cached are fetched, concurrently."""
+        ids = [str(x) for x in dict.fromkeys(session_ids)]
+        bundles = self._map_concurrent(self.get_session_bundle, ids, max_workers=max_workers)
+        return [b for b in bundles if b]
+
+    def get_session_sensor_overlay(self, session: dict, metrics: Optional[list[str]] = None) -> pd.DataFrame:
+        """
+        Rep timeline with the patient device's readings as-of each rep (one column per
+        metric). One range query for the whole session; kept for good once it is completed.
+        """
+        sid = str(session.get("session_id") or "")
+        done = session.get("status") == "completed"
+        cached = self._session_overlays.get(sid)
+        if cached is not None and (cached[0] or time.monotonic() - cached[1] < 10.0):
+            return cached[2]
+
+        metrics = metrics or SESSION_METRICS
+        started = session.get("started_at")
+        ended = session.get("ended_at") if done else pd.Timestamp.now(tz="UTC")
+        reps = rep_timeline(self.get_rep_metrics(sid, completed=done), started, ended)
+        device_id = session.get("device_id") or self._patient_device(session.get("patient_id"))
+
+        readings = pd.DataFrame(columns=["ts", *metrics])
+        if device_id and started is not None and not pd.isna(started):
+            try:
+                readings = self.list_sensor_readings_all(device_id, metrics, start=started, end=ended)
+            except Exception:
+                pass
+
+        out = overlay_reps(reps, readings).assign(device_id=device_id)
+        out.attrs["truncated"] = bool(readings.attrs.get("truncated"))
+        self._session_overlays[sid] = (done, time.monotonic(), out)
+        return out
+
+    def _patient_device(self, patient_id) -> Optional[str]:
+        if not patient_id:
+            return None
+        try:
+            devices = self.list_devices()
+        except Exception:
+            return None
+        if len(devices) == 0 or "patient_id" not in devices.columns:
+            return None
+        hit = devices.loc[devices["patient_id"] == str(patient_id), "device_id"].dropna()
+        return str(hit.iloc[0]) if len(hit) else None
 
     # ---------- devices ----------
     def list_devices(self) -> pd.DataFrame:
         devices = self._get("/devices") or []
         patients = self._get("/patients") or []
         name_by_id = {str(p["patient_id"]): p.get("name") for p in patients if p.get("patient_id")}
+        self.patient_names.update({k: v for k, v in name_by_id.items() if v})
+        therapist_by_id = {str(p["patient_id"]): p.get("assigned_therapist_id") for p in patients if p.get("patient_id")}
+
+        df = self._device_frame(devices, name_by_id, therapist_by_id)
+        self.heartbeats.update_frame(df)
+        self.anomalies.set_labels(df)
+        self.search_index.sync("device", df)
+        return df
+
+    def _device_frame(self, devices: list[dict], name_by_id: dict, therapist_by_id: dict) -> pd.DataFrame:
         dev_ids = [str(d.get("device_id") or "") for d in devices]
         dev_ids_sorted = sorted([x for x in dev_ids if x])
         demo_by_device: dict[str, str] = {did: f"" for i, did in enumerate(dev_ids_sorted)}
@@ -314,6 +569,7 @@ class ApiRepo:
                     "device_id": d.get("device_id"),
                     "patient_id": pid_s,
                     "patient_name": patient_name,
+                    "assigned_therapist_id": str(therapist_by_id[pid_s]) if pid_s and therapist_by_id.get(pid_s) else None,
                     "label": d.get("label") or "—",
                     "status": d.get("status") or "unknown",
                     "last_seen_at": pd.to_datetime(d.get("last_seen_at")) if d.get("last_seen_at") else pd.NaT,
@@ -323,27 +579,188 @@ class ApiRepo:
 
     def get_device(self, device_id: str) -> dict | None:
         try:
-            return self._get(f"/devices/{device_id}/status")
+            d = self._get(f"/devices/{device_id}/status")
         except Exception:
             return None
+        if isinstance(d, dict) and d.get("last_seen_at"):
+            self.heartbeats.update(device_id, d.get("last_seen_at"))
+        return d
 
     def get_latest_sensor_reading(self, device_id: str) -> dict:
-        try:
-            items = self._get(f"/devices/{device_id}/sensor-readings/latest") or []
-        except Exception:
+        if not device_id:
+            return {}
+        return dict(self._latest_snapshots([device_id]).get(str(device_id)) or {})
+
+    def get_live_sensor_reading(self, device_id: str) -> dict:
+        """Latest snapshot from the device's push subscription; direct fetch until it has data."""
+        if not device_id:
             return {}
-        out: dict[str, Any] = {}
-        for r in items:
-            m = r.get("metric")
-            if m:
-                out[m] = r.get("value")
+        snap = self.sensor_streams.subscribe(device_id).latest()
+        return snap or self.get_latest_sensor_reading(device_id)
+
+    def get_latest_sensor_readings(
+        self,
+        device_ids: list[str],
+        ttl_s: float = 2.0,
+        max_workers: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Latest value per metric for several devices: one row per device, one column per metric."""
+        ids = list(dict.fromkeys(str(d) for d in device_ids if d))
+        snaps = self._latest_snapshots(ids, ttl_s=ttl_s, max_workers=max_workers)
+        df = pd.DataFrame.from_dict({d: snaps[d] for d in ids}, orient="index")
+        df.index.name = "device_id"
+        return df.reindex(ids)
+
+    def _latest_snapshots(self, ids: list[str], ttl_s: float = 2.0, max_workers: Optional[int] = None) -> dict[str, dict]:
+        """
+        Tries GET /sensor-readings/latest?device_ids=... first and falls back to concurrent
+        per-device requests. Snapshots are reused for ttl_s so every card on a rerun shares them.
+        """
+        ids = [str(d) for d in ids]
+        now = time.monotonic()
+        stale = [d for d in ids if now - self._latest_cache.get(d, (-1e9, None))[0] >= ttl_s]
+
+        if stale:
+            rows = self._try_batch(
+                "latest",
+                lambda: self._get("/sensor-readings/latest", params={"device_ids": ",".join(stale)}),
+            )
+            if rows is None:
+                def _one(did: str) -> list[dict]:
+                    try:
+                        items = self._get(f"/devices/{did}/sensor-readings/latest") or []
+                    except Exception:
+                        return []
+                    return [{**r, "device_id": did} for r in items if isinstance(r, dict)]
+
+                rows = [r for part in self._map_concurrent(_one, stale, max_workers=max_workers) for r in part]
+
+            # one vectorized alias -> canonical code pass over every reading fetched
+            long_df = pd.DataFrame.from_records(
+                [r for r in rows or [] if isinstance(r, dict)], columns=["device_id", "metric", "value", "ts"]
+            ).dropna(subset=["device_id", "metric"])
+            long_df["device_id"] = long_df["device_id"].astype(str)
+            long_df["metric"] = canonicalize(long_df["metric"])
+            self.anomalies.ingest(long_df)
+            fresh: dict[str, dict] = {d: {} for d in stale}
+            for did, g in long_df[long_df["device_id"].isin(fresh)].groupby("device_id", sort=False):
+                fresh[did] = dict(zip(g["metric"], g["value"]))
+
+            for d, snap in fresh.items():
+                self._latest_cache[d] = (now, snap)
+
+        return {d: self._latest_cache[d][1] for d in ids}
+
+    def evaluate_anomalies(self) -> pd.DataFrame:
+        """
+        Provisional alerts from the local anomaly engine. It is fed by readings already
+        arriving elsewhere (live streams and every latest-snapshot fetch), so this makes
+        no requests of its own.
+        """
+        return self.anomalies.alerts()
+
+    def list_sensor_readings(
+        self,
+        device_id: str,
+        metric: str,
+        start=None,
+        end=None,
+        order: str = "asc",
+        limit: int = 2000,
+    ) -> pd.DataFrame:
+        params: dict[str, Any] = {"device_id": device_id, "metric": metric, "order": order, "limit": int(limit)}
+        if start is not None:
+            params["start"] = iso_z(start)
+        if end is not None:
+            params["end"] = iso_z(end)
+        return readings_frame(self._get("/sensor-readings", params=params))
+
+    def list_sensor_readings_multi(
+        self,
+        device_id: str,
+        metrics: list[str],
+        start=None,
+        end=None,
+        limit: int = 2000,
+    ) -> pd.DataFrame:
+        """
+        Several metrics of one device in one call, aligned on ts (one column per metric,
+        units in df.attrs["units"]). Uses GET /sensor-readings/batch when the backend has it,
+        otherwise one concurrent /sensor-readings request per metric.
+        """
+        metrics = list(dict.fromkeys(canonical_code(m) for m in metrics if m))
+        params: dict[str, Any] = {"device_id": device_id, "metrics": ",".join(metrics), "order": "asc", "limit": int(limit)}
+        if start is not None:
+            params["start"] = iso_z(start)
+        if end is not None:
+            params["end"] = iso_z(end)
+
+        items = self._try_batch("series", lambda: self._get("/sensor-readings/batch", params=params))
+        if items is not None:
+            long_df = readings_frame(items, extra=("metric",))
+            long_df["metric"] = canonicalize(long_df["metric"])
+        else:
+            def _one(m: str) -> pd.DataFrame:
+                try:
+                    return self.list_sensor_readings(device_id, m, start=start, end=end, limit=limit).assign(metric=m)
+                except Exception:
+                    return readings_frame([], extra=("metric",))
+
+            parts = [p for p in self._map_concurrent(_one, metrics) if len(p)]
+            long_df = pd.concat(parts, ignore_index=True) if parts else readings_frame([], extra=("metric",))
+
+        return align_metrics(long_df, metrics)
+
+    def list_sensor_readings_all(
+        self,
+        device_id: str,
+        metrics: list[str],
+        start,
+        end,
+        page_limit: int = 20000,
+        max_requests: int = 10,
+    ) -> pd.DataFrame:
+        """
+        Every reading of several metrics over [start, end], aligned like
+        list_sensor_readings_multi. One multi-metric call when it comes back short of
+        page_limit; otherwise each metric is paged with page_readings, concurrently.
+        attrs["truncated"] is set when a metric ran out of requests before `end`.
+        """
+        metrics = list(dict.fromkeys(canonical_code(m) for m in metrics if m))
+        first = self.list_sensor_readings_multi(device_id, metrics, start=start, end=end, limit=page_limit)
+        # readings, not aligned rows: the batch endpoint caps the total across metrics
+        if int(first.reindex(columns=metrics).notna().to_numpy().sum()) < page_limit:
+            first.attrs["truncated"] = False
+            return first
+
+        start_ms, end_ms = (int(x) for x in to_epoch_ms(to_utc(pd.Series([iso_z(start), iso_z(end)]))))
+
+        def _one(m: str) -> tuple[pd.DataFrame, bool]:
+            parts: list[pd.DataFrame] = []
+            cursor, _ = page_readings(self, device_id, m, start_ms, end_ms + 1, max_requests, page_limit, parts.append)
+            df = pd.concat(parts, ignore_index=True) if parts else readings_frame([])
+            return df.assign(metric=m), cursor <= end_ms
+
+        results = self._map_concurrent(_one, metrics)
+        parts = [df for df, _ in results if len(df)]
+        out = align_metrics(pd.concat(parts, ignore_index=True) if parts else readings_frame([], extra=("metric",)), metrics)
+        out.attrs["truncated"] = any(cut for _, cut in results)
         return out
 
     def get_latest_ai(self, device_id: str) -> dict:
-        try:
-            return self._get(f"/devices/{device_id}/ai/latest") or {}
-        except Exception:
+        """Latest prediction; only asks the backend once a newer one can exist."""
+        if not device_id:
             return {}
+        if self.ai_history.due(device_id):
+            try:
+                snap = self._get(f"/devices/{device_id}/ai/latest") or {}
+            except Exception:
+                snap = {}
+            self.ai_history.add(device_id, snap if isinstance(snap, dict) else {})
+        return self.ai_history.latest(device_id)
+
+    def get_ai_history(self, device_id: str, hours: float = 6.0) -> pd.DataFrame:
+        return self.ai_history.frame(device_id, hours=hours)
 
     def media_url(self, stream_path: str) -> str:
         if not stream_path:
@@ -374,12 +791,24 @@ class ApiRepo:
         if patient_id:
             params["patient_id"] = patient_id
 
+        if not params and self._alerts_local is not None and time.monotonic() - self._alerts_local[0] < self.alerts_ttl_s:
+            return self._alerts_local[1]
+
         items = self._get("/alerts/all", params=params or None) or []
 
 
         pats = self._get("/patients") or []
         name_by_id = {str(p["patient_id"]): p.get("name") for p in pats if p.get("patient_id")}
+        self.patient_names.update({k: v for k, v in name_by_id.items() if v})
+        therapist_by_id = {str(p["patient_id"]): p.get("assigned_therapist_id") for p in pats if p.get("patient_id")}
+
+        df = self._alert_frame(items, name_by_id, therapist_by_id)
+        if not params:
+            self._alerts_local = (time.monotonic(), df)
+            self.search_index.sync("alert", df)
+        return df
 
+    def _alert_frame(self, items: list[dict], name_by_id: dict, therapist_by_id: dict) -> pd.DataFrame:
         rows = []
         for a in items:
             pid = a.get("patient_id")
@@ -393,17 +822,173 @@ class ApiRepo:
                     "severity": (a.get("severity") or "med"),
                     "status": (a.get("status") or "open"),
                     "message": a.get("message") or "",
-                    "created_at": pd.to_datetime(a.get("created_at")) if a.get("created_at") else pd.NaT,
-                    "resolved_at": pd.to_datetime(a.get("resolved_at")) if a.get("resolved_at") else pd.NaT,
+                    "created_at": a.get("created_at") or None,
+                    "resolved_at": a.get("resolved_at") or None,
+                    "acknowledged_at": a.get("acknowledged_at") or None,
+                    "assigned_therapist_id": str(therapist_by_id[pid_s]) if pid_s and therapist_by_id.get(pid_s) else None,
                 }
             )
-        return pd.DataFrame(rows)
+        df = pd.DataFrame(rows)
+        # one parse per column instead of one per alert
+        for c in ("created_at", "resolved_at", "acknowledged_at"):
+            if c in df.columns:
+                df[c] = pd.to_datetime(df[c], errors="coerce", utc=True, format="ISO8601")
+        return df
+
+    # ---------- exports ----------
+    def _iter_pages(self, path: str, params: Optional[dict] = None, page_size: Optional[int] = None) -> Iterator[list[dict]]:
+        """
+        GET a list endpoint page by page (limit/offset). A backend that ignores paging
+        answers with the whole list (or the same page again); that is yielded once.
+        """
+        size = int(page_size or self.export_page_size)
+        offset, first = 0, None
+        while True:
+            items = self._get(path, params={**(params or {}), "limit": size, "offset": offset}) or []
+            if offset and items and repr(items[0]) == first:
+                return
+            if offset == 0 and items:
+                first = repr(items[0])
+            yield items
+            if len(items) != size:
+                return
+            offset += size
+
+    def iter_export(self, kind: str, page_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Export rows of one entity kind as DataFrame chunks, one per fetched page, so
+        an export never holds more than a page of its rows in memory. Alerts behind the
+        patients' open counts are paged too; the device and patient lists used for
+        names and device columns are fetched whole.
+        """
+        if kind == "patients":
+            ctx = self._patient_context(self._iter_pages("/alerts/all", page_size=page_size))
+            for items in self._iter_pages("/patients", page_size=page_size):
+                yield self._patient_frame(items, *ctx)
+        elif kind == "devices":
+            pats = self._get("/patients") or []
+            name_by_id = {str(p["patient_id"]): p.get("name") for p in pats if p.get("patient_id")}
+            therapist_by_id = {str(p["patient_id"]): p.get("assigned_therapist_id") for p in pats if p.get("patient_id")}
+            for items in self._iter_pages("/devices", page_size=page_size):
+                yield self._device_frame(items, name_by_id, therapist_by_id)
+        elif kind == "sessions":
+            ex_map = {str(x["exercise_id"]): x.get("exercise_name") for x in (self._get("/exercises") or []) if x.get("exercise_id")}
+            for items in self._iter_pages("/sessions", page_size=page_size):
+                yield self._session_frame(items, ex_map)
+        elif kind == "alerts":
+            pats = self._get("/patients") or []
+            name_by_id = {str(p["patient_id"]): p.get("name") for p in pats if p.get("patient_id")}
+            therapist_by_id = {str(p["patient_id"]): p.get("assigned_therapist_id") for p in pats if p.get("patient_id")}
+            for items in self._iter_pages("/alerts/all", page_size=page_size):
+                yield self._alert_frame(items, name_by_id, therapist_by_id)
+        else:
+            raise ValueError(f"unknown export kind: {kind}")
+
+    # ---------- search ----------
+    def search(self, query: str, limit: int = 8) -> pd.DataFrame:
+        """
+        Ranked patients, sessions, devices and alerts for a free-text query. The index is
+        kept current by the regular list_* fetches; kinds not synced for search_ttl_s
+        are fetched once here.
+        """
+        if not (query or "").strip():
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+        now = time.monotonic()
+        loaders = {"patient": self.list_patients, "session": self.list_sessions, "device": self.list_devices, "alert": self.list_alerts}
+        for kind, load in loaders.items():
+            if now - self.search_index.synced_at(kind) > self.search_ttl_s:
+                try:
+                    load()
+                except Exception:
+                    pass
+        return self.search_index.search(query, limit=limit)
+
+    def alerts_view(self) -> AlertsView:
+        """Indexed view over the (cached) full alert list; rebuilt when the list changes."""
+        df = self.list_alerts()
+        if self._alerts_view is None or self._alerts_view.source is not df:
+            self._alerts_view = AlertsView(df)
+        return self._alerts_view
+
+    def filter_alerts(
+        self,
+        severity: Optional[str] = None,
+        status: Optional[str] = None,
+        patient_id: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Filtered alerts answered from the local view; the server filters only for very large histories."""
+        # a history already known to be too large is not downloaded again just to find that out
+        last = self._alerts_local
+        if last is not None and len(last[1]) > self.alerts_max_local:
+            return self.list_alerts(severity=severity, status=status, patient_id=patient_id)
+        view = self.alerts_view()
+        if len(view) > self.alerts_max_local:
+            return self.list_alerts(severity=severity, status=status, patient_id=patient_id)
+        return view.filter(severity=severity, status=status, patient_id=patient_id)
+
+    def _apply_alert_status(self, alert_ids: list[str], status: str) -> Optional[pd.DataFrame]:
+        """Set status on the local alert frame; returns the previous rows for rollback."""
+        if self._alerts_local is None or len(self._alerts_local[1]) == 0:
+            return None
+        df = self._alerts_local[1]
+        mask = df["alert_id"].isin([str(a) for a in alert_ids])
+        cols = [c for c in ("status", "acknowledged_at", "resolved_at") if c in df.columns]
+        before = df.loc[mask, cols].copy()
+        df.loc[mask, "status"] = status
+        self._alerts_view = None
+        stamp = {"resolved": ("acknowledged_at", "resolved_at"), "acknowledged": ("acknowledged_at",)}.get(status, ())
+        for c in stamp:
+            if c in df.columns:
+                now = pd.Timestamp.now(tz="UTC").floor("s")
+                if not isinstance(df[c].dtype, pd.DatetimeTZDtype):
+                    now = now.tz_localize(None)
+                df.loc[mask & df[c].isna(), c] = now
+        return before
+
+    def update_alerts(self, alert_ids: list[str], status: str, message: str = "", max_workers: Optional[int] = None) -> dict[str, str]:
+        """
+        Bulk status change: the local alert frame is updated up front, the PATCHes go out
+        concurrently, and rows whose PATCH failed are rolled back. Returns {alert_id: error}.
+        """
+        ids = list(dict.fromkeys(str(a) for a in alert_ids if a))
+        if not ids:
+            return {}
+        before = self._apply_alert_status(ids, status)
+        payload = {"status": status}
+        if message:
+            payload["message"] = message
+
+        def _one(aid: str) -> Optional[str]:
+            try:
+                self._patch(f"/alerts/{aid}", payload)
+                return None
+            except Exception as e:
+                return str(e)[:200] or e.__class__.__name__
+
+        results = self._map_concurrent(_one, ids, max_workers=max_workers)
+        failed = {aid: err for aid, err in zip(ids, results) if err is not None}
+        if before is not None and failed:
+            df = self._alerts_local[1]
+            rows = before.index[df.loc[before.index, "alert_id"].isin(failed)]
+            df.loc[rows, before.columns] = before.loc[rows]
+            self._alerts_view = None
+        if status != "open":
+            self.alert_feed.discard([a for a in ids if a not in failed])
+        return failed
 
     def update_alert(self, alert_id: str, status: str, message: str = ""):
         payload = {"status": status}
         if message:
             payload["message"] = message
         self._patch(f"/alerts/{alert_id}", payload)
+        self._apply_alert_status([alert_id], status)
+        if str(status).lower() != "open":
+            self.alert_feed.discard([alert_id])
+
+    def open_alert_feed(self) -> pd.DataFrame:
+        """Newest open alerts for the notification badge (incremental; see AlertFeed)."""
+        self.alert_feed.poll(lambda path, params: self._get(path, params=params), time.monotonic())
+        return self.alert_feed.frame(self.patient_names)
 
     # ---------- exercises ----------
     def list_exercises(self) -> pd.DataFrame:
@@ -423,6 +1008,15 @@ class ApiRepo:
 
     # ---------- assignments ----------
     def list_assignments(self, patient_id: Optional[str] = None) -> pd.DataFrame:
+        key = str(patient_id or "")
+        cached = self._assignments_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.assignments_ttl_s:
+            return cached[1]
+        df = self._fetch_assignments(patient_id)
+        self._assignments_cache[key] = (time.monotonic(), df)
+        return df
+
+    def _fetch_assignments(self, patient_id: Optional[str] = None) -> pd.DataFrame:
         params = {"patient_id": patient_id} if patient_id else None
         items = self._get("/assignments", params=params) or []
         ex_map = {str(x["exercise_id"]): x.get("exercise_name") for x in (self._get("/exercises") or []) if x.get("exercise_id")}
@@ -440,10 +1034,13 @@ class ApiRepo:
                     "reps": a.get("reps"),
                     "status": a.get("status") or "assigned",
                     "notes": a.get("notes") or "",
-                    "created_at": pd.to_datetime(a.get("created_at")) if a.get("created_at") else pd.NaT,
+                    "created_at": a.get("created_at") or None,
                 }
             )
-        return pd.DataFrame(rows)
+        df = pd.DataFrame(rows)
+        if "created_at" in df.columns:
+            df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce", utc=True, format="ISO8601")
+        return df
 
     def create_assignment(
         self,
@@ -466,8 +1063,59 @@ class ApiRepo:
         if notes:
             payload["notes"] = notes
         out = self._post("/assignments", payload)
+        self._assignments_cache.clear()
         return str(out.get("assignment_id"))
 
+    def create_assignments(self, items: list[dict], max_workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        POST several assignments concurrently (each item: patient_id, exercise_id and
+        optional sets/reps/notes/status). One row per item with assignment_id or error;
+        the assignment cache is refreshed once at the end, not per item.
+        """
+        def _one(it: dict) -> tuple[Optional[str], Optional[str]]:
+            payload: dict[str, Any] = {
+                "patient_id": it["patient_id"],
+                "exercise_id": it["exercise_id"],
+                "status": it.get("status") or "assigned",
+            }
+            for k in ("sets", "reps"):
+                v = it.get(k)
+                if v is None or pd.isna(v):
+                    continue
+                try:
+                    n = int(v)
+                except (TypeError, ValueError):
+                    return None, f"invalid {k}: {v!r}"
+                if n <= 0:
+                    return None, f"{k} must be positive"
+                payload[k] = n
+            if it.get("notes"):
+                payload["notes"] = it["notes"]
+            try:
+                out = self._post("/assignments", payload) or {}
+            except Exception as e:
+                return None, str(e)[:200] or e.__class__.__name__
+            aid = out.get("assignment_id") if isinstance(out, dict) else None
+            if aid is None or str(aid) == "":
+                return None, "backend returned no assignment_id"
+            return str(aid), None
+
+        results = self._map_concurrent(_one, list(items), max_workers=max_workers)
+        self._assignments_cache.clear()
+        return pd.DataFrame(
+            [
+                {
+                    "patient_id": str(it.get("patient_id")),
+                    "exercise_id": str(it.get("exercise_id")),
+                    "ok": err is None,
+                    "assignment_id": aid,
+                    "error": err,
+                }
+                for it, (aid, err) in zip(items, results)
+            ],
+            columns=["patient_id", "exercise_id", "ok", "assignment_id", "error"],
+        )
+
     # ---------- notes ----------
     def create_note(self, patient_id: str, body: str, session_id: Optional[str] = None, title: Optional[str] = None) -> str:
         payload: dict[str, Any] = {"patient_id": patient_id, "body": body}
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from services.timeseries import from_epoch_ms, now_ms, page_readings, to_epoch_ms
+
+_MIN = 60_000
+_HOUR = 60 * _MIN
+_DAY = 24 * _HOUR
+
+# tier -> (bucket size ms, retention ms)
+TIERS: dict[str, tuple[int, int]] = {
+    "1s": (1_000, 2 * _HOUR),
+    "1min": (_MIN, 3 * _DAY),
+    "15min": (15 * _MIN, 35 * _DAY),
+}
+
+# window label -> (span ms, tier served from)
+WINDOWS: dict[str, tuple[int, str]] = {
+    "30 min": (30 * _MIN, "1s"),
+    "6 h": (6 * _HOUR, "1min"),
+    "24 h": (24 * _HOUR, "1min"),
+    "7 days": (7 * _DAY, "15min"),
+}
+
+
+def _reduce(start, vmin, vmax, vsum, cnt):
+    # merge partial aggregates that share a bucket start; input need not be sorted
+    order = np.argsort(start, kind="stable")
+    start, vmin, vmax, vsum, cnt = start[order], vmin[order], vmax[order], vsum[order], cnt[order]
+    keys, idx = np.unique(start, return_index=True)
+    return (
+        keys,
+        np.minimum.reduceat(vmin, idx),
+        np.maximum.reduceat(vmax, idx),
+        np.add.reduceat(vsum, idx),
+        np.add.reduceat(cnt, idx),
+    )
+
+
+class _Tier:
+    __slots__ = ("bucket_ms", "retention_ms", "start", "vmin", "vmax", "vsum", "cnt")
+
+    def __init__(self, bucket_ms: int, retention_ms: int):
+        self.bucket_ms = int(bucket_ms)
+        self.retention_ms = int(retention_ms)
+        self.start = np.empty(0, dtype=np.int64)
+        self.vmin = np.empty(0, dtype=np.float64)
+        self.vmax = np.empty(0, dtype=np.float64)
+        self.vsum = np.empty(0, dtype=np.float64)
+        self.cnt = np.empty(0, dtype=np.int64)
+
+    def add(self, ts_ms: np.ndarray, values: np.ndarray):
+        if len(self.start) and ts_ms[-1] < self.start[-1] - self.retention_ms:
+            return
+        b = ts_ms - ts_ms % self.bucket_ms
+        new = _reduce(b, values, values, values, np.ones(len(values), dtype=np.int64))
+
+        # only buckets at/after the first touched one need re-reducing
+        cut = int(np.searchsorted(self.start, new[0][0], side="left"))
+        old = (self.start, self.vmin, self.vmax, self.vsum, self.cnt)
+        tail = _reduce(*(np.concatenate([o[cut:], n]) for o, n in zip(old, new)))
+        self.start, self.vmin, self.vmax, self.vsum, self.cnt = (
+            np.concatenate([o[:cut], t]) for o, t in zip(old, tail)
+        )
+
+        horizon = self.start[-1] - self.retention_ms
+        keep = int(np.searchsorted(self.start, horizon, side="left"))
+        if keep:
+            self.start, self.vmin, self.vmax, self.vsum, self.cnt = (
+                a[keep:] for a in (self.start, self.vmin, self.vmax, self.vsum, self.cnt)
+            )
+
+    def query(self, start_ms: int, end_ms: int) -> pd.DataFrame:
+        lo = int(np.searchsorted(self.start, start_ms - start_ms % self.bucket_ms, side="left"))
+        hi = int(np.searchsorted(self.start, end_ms, side="right"))
+        cnt = self.cnt[lo:hi]
+        return pd.DataFrame(
+            {
+                "ts": from_epoch_ms(self.start[lo:hi]),
+                "min": self.vmin[lo:hi],
+                "mean": self.vsum[lo:hi] / np.maximum(cnt, 1),
+                "max": self.vmax[lo:hi],
+                "count": cnt,
+            }
+        )
+
+
+class RollupSeries:
+    """Min/mean/max/count buckets for one device/metric across all tiers."""
+
+    def __init__(self):
+        self.tiers = {name: _Tier(b, r) for name, (b, r) in TIERS.items()}
+        self.unit = ""
+        self.last_value = None
+        self.last_ts_ms: int | None = None
+        # [covered_from, synced_to) has been pulled from the backend
+        self.covered_from: int | None = None
+        self.synced_to: int | None = None
+        # (chunk start, resume cursor) of a backfill chunk still being paged in
+        self.backfill: tuple[int, int] | None = None
+        # (ts ms, value bits) of readings in the window the next sync re-reads
+        self.recent: set[tuple[int, int]] = set()
+
+    def ingest(self, df: pd.DataFrame):
+        """Fold readings into every tier, skipping ones already folded (see `recent`)."""
+        if df is None or len(df) == 0:
+            return
+        ts_ms = to_epoch_ms(df["ts"])
+        keys = list(zip(ts_ms.tolist(), df["value"].to_numpy(dtype=np.float64).view(np.int64).tolist()))
+        new = np.fromiter((k not in self.recent for k in keys), dtype=bool, count=len(keys))
+        self.recent.update(keys)
+        if not new.all():
+            df, ts_ms = df[new], ts_ms[new]
+            if len(df) == 0:
+                return
+        values = df["value"].to_numpy(dtype=np.float64)
+        order = np.argsort(ts_ms, kind="stable")
+        ts_ms, values = ts_ms[order], values[order]
+        for tier in self.tiers.values():
+            tier.add(ts_ms, values)
+
+        if self.last_ts_ms is None or ts_ms[-1] >= self.last_ts_ms:
+            self.last_ts_ms = int(ts_ms[-1])
+            self.last_value = float(values[-1])
+            unit = str(df["unit"].iloc[-1] or "").strip() if "unit" in df.columns else ""
+            self.unit = unit or self.unit
+
+    def forget_before(self, ts_ms: int):
+        self.recent = {k for k in self.recent if k[0] >= ts_ms}
+
+    def query(self, tier: str, start_ms: int, end_ms: int) -> pd.DataFrame:
+        return self.tiers[tier].query(start_ms, end_ms)
+
+
+class RollupStore:
+    """
+    Local rollup cache per (device, metric), built incrementally from /sensor-readings.
+    Raw pages are folded into the tiers and dropped, so long windows render from
+    a few hundred buckets instead of the raw stream. Each sync re-reads the last
+    `late_ms` before its cursor, so readings the backend ingests late still land in
+    their buckets; the series remembers what that window already folded in.
+    """
+
+    def __init__(
+        self,
+        page_limit: int = 5000,
+        backfill_chunk_ms: int = 6 * _HOUR,
+        max_requests: int = 12,
+        late_ms: int = 5 * _MIN,
+    ):
+        self.page_limit = int(page_limit)
+        self.backfill_chunk_ms = int(backfill_chunk_ms)
+        self.max_requests = int(max_requests)
+        self.late_ms = int(late_ms)
+        self._series: dict[tuple[str, str], RollupSeries] = {}
+
+    def series(self, device_id: str, metric: str) -> RollupSeries:
+        key = (str(device_id), str(metric))
+        s = self._series.get(key)
+        if s is None:
+            s = self._series[key] = RollupSeries()
+        return s
+
+    def _pull(self, repo, s: RollupSeries, device_id: str, metric: str, cursor: int, end_ms: int, budget: int):
+        return page_readings(repo, device_id, metric, cursor, end_ms, budget, self.page_limit, s.ingest)
+
+    def sync(self, repo, device_id: str, metric: str, span_ms: int, now: int | None = None) -> RollupSeries:
+        now = int(now if now is not None else now_ms())
+        key = (str(device_id), str(metric))
+        s = self.series(device_id, metric)
+        if s.synced_to is not None and now - s.synced_to > max(w for w, _ in WINDOWS.values()):
+            # too far behind to be worth catching up page by page
+            s = self._series[key] = RollupSeries()
+
+        budget = self.max_requests
+        if s.synced_to is None:
+            s.covered_from = s.synced_to = now
+        else:
+            cursor = max(s.synced_to - self.late_ms, s.covered_from)
+            s.synced_to, used = self._pull(repo, s, device_id, metric, cursor, now, budget)
+            budget -= used
+
+        want_from = now - int(span_ms)
+        while budget > 0 and s.covered_from > want_from:
+            if s.backfill is None:
+                chunk_from = max(want_from, s.covered_from - self.backfill_chunk_ms)
+                s.backfill = (chunk_from, chunk_from)
+            chunk_from, cursor = s.backfill
+            cursor, used = self._pull(repo, s, device_id, metric, cursor, s.covered_from, budget)
+            budget -= used
+            if cursor < s.covered_from:
+                s.backfill = (chunk_from, cursor)
+                break
+            s.covered_from, s.backfill = chunk_from, None
+        s.forget_before(s.synced_to - self.late_ms)
+        return s
+
+    def window(self, repo, device_id: str, metric: str, label: str) -> tuple[pd.DataFrame, RollupSeries]:
+        span_ms, tier = WINDOWS[label]
+        now = now_ms()
+        s = self.sync(repo, device_id, metric, span_ms, now=now)
+        return s.query(tier, now - span_ms, now), s
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import re
+import time
+import unicodedata
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SEARCH_KINDS = ("patient", "session", "device", "alert")
+RESULT_COLUMNS = ["kind", "id", "label", "sub", "patient_id", "score"]
+
+# ties go to the entity people look for most
+_KIND_BOOST = {"patient": 0.3, "device": 0.2, "session": 0.1, "alert": 0.0}
+_BOOST = np.array([_KIND_BOOST[k] for k in SEARCH_KINDS])
+_WORD = re.compile(r"[0-9a-z]+")
+
+
+def _col(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name].astype("string").fillna("") if name in df.columns else pd.Series("", index=df.index, dtype="string")
+
+
+def patient_entities(df: pd.DataFrame) -> pd.DataFrame:
+    name = _col(df, "name")
+    cond = _col(df, "primary_condition")
+    return pd.DataFrame(
+        {
+            "id": _col(df, "patient_id"),
+            "label": name,
+            "sub": cond,
+            "patient_id": _col(df, "patient_id"),
+            "title": name,
+            "text": name + " " + _col(df, "patient_id") + " " + cond + " " + _col(df, "device_id"),
+        }
+    )
+
+
+def session_entities(df: pd.DataFrame) -> pd.DataFrame:
+    started = pd.to_datetime(df["started_at"], errors="coerce", utc=True).dt.strftime("%Y-%m-%d").fillna("") if "started_at" in df.columns else _col(df, "session_id")
+    ex = _col(df, "exercise_name")
+    return pd.DataFrame(
+        {
+            "id": _col(df, "session_id"),
+            "label": ex + " • " + started.astype("string"),
+            "sub": _col(df, "status"),
+            "patient_id": _col(df, "patient_id"),
+            "title": ex,
+            "text": ex + " " + _col(df, "session_id") + " " + started.astype("string"),
+        }
+    )
+
+
+def device_entities(df: pd.DataFrame) -> pd.DataFrame:
+    label = _col(df, "label")
+    return pd.DataFrame(
+        {
+            "id": _col(df, "device_id"),
+            "label": _col(df, "device_id") + " • " + label,
+            "sub": _col(df, "patient_name"),
+            "patient_id": _col(df, "patient_id"),
+            "title": label,
+            "text": _col(df, "device_id") + " " + label + " " + _col(df, "patient_name"),
+        }
+    )
+
+
+def alert_entities(df: pd.DataFrame) -> pd.DataFrame:
+    msg = _col(df, "message")
+    return pd.DataFrame(
+        {
+            "id": _col(df, "alert_id"),
+            "label": msg,
+            "sub": _col(df, "patient_name") + " • " + _col(df, "severity"),
+            "patient_id": _col(df, "patient_id"),
+            "title": _col(df, "type"),
+            "text": msg + " " + _col(df, "type") + " " + _col(df, "patient_name"),
+        }
+    )
+
+
+ENTITY_BUILDERS = {
+    "patient": patient_entities,
+    "session": session_entities,
+    "device": device_entities,
+    "alert": alert_entities,
+}
+
+
+def _fold(text: str) -> str:
+    """Lower-cased with accents stripped ('José Müller' -> 'jose muller'), so they match plain queries."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch)) if not text.isascii() else text
+
+
+def _normalize(text: str) -> str:
+    # words joined by two spaces with two in front and one behind: every word is seen as
+    # '  word ', so its start ('  w', ' wo') and end ('rd ') are trigrams of their own
+    return "  " + "  ".join(_WORD.findall(_fold(text))) + " "
+
+
+def _codes(grams) -> np.ndarray:
+    return np.fromiter(((ord(g[0]) << 16) | (ord(g[1]) << 8) | ord(g[2]) for g in grams), dtype=np.int64)
+
+
+def _gram_pairs(texts: list[str], slots: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(trigram code, slot) for every trigram of every text, computed over one byte buffer."""
+    norm = [_normalize(t) for t in texts]
+    if not norm:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    lens = np.fromiter(map(len, norm), dtype=np.int64, count=len(norm))
+    b = np.frombuffer("".join(norm).encode("ascii"), dtype=np.uint8).astype(np.int64)
+    codes = (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+    pos = np.arange(len(b) - 2) - np.repeat(np.cumsum(lens) - lens, lens)[:-2]
+    keep = pos <= np.repeat(lens, lens)[:-2] - 3
+    keep &= codes != _BLANK
+    return codes[keep], np.repeat(np.asarray(slots, dtype=np.int64), lens)[:-2][keep]
+
+
+class _Postings:
+    """Trigram -> sorted slot array (one CSR block), plus a small dict of recent additions."""
+
+    def __init__(self, codes: np.ndarray, slots: np.ndarray):
+        key = np.sort((codes << 32) | slots)
+        key = key[np.concatenate(([True], key[1:] != key[:-1]))] if len(key) else key
+        gram = key >> 32
+        starts = np.flatnonzero(np.concatenate(([True], gram[1:] != gram[:-1]))) if len(key) else np.empty(0, dtype=np.int64)
+        self._codes = gram[starts]
+        self._offsets = np.append(starts, len(key))
+        self._slots = (key & 0xFFFFFFFF).astype(np.int64)
+        self._delta: dict[int, list[int]] = {}
+        self.delta_size = 0
+
+    def add(self, codes: np.ndarray, slots: np.ndarray):
+        # a word repeated in one text yields the same (trigram, slot) twice
+        key = np.unique((codes << 32) | slots)
+        for c, s in zip((key >> 32).tolist(), (key & 0xFFFFFFFF).tolist()):
+            self._delta.setdefault(c, []).append(s)
+        self.delta_size += len(key)
+
+    def get(self, code: int) -> np.ndarray:
+        i = int(np.searchsorted(self._codes, code))
+        base = self._slots[self._offsets[i] : self._offsets[i + 1]] if i < len(self._codes) and self._codes[i] == code else _EMPTY
+        extra = self._delta.get(code)
+        # delta slots are all newer than the block's, so appending keeps the array sorted
+        return base if not extra else np.concatenate((base, np.asarray(extra, dtype=np.int64)))
+
+    def all_of(self, codes: np.ndarray, n_slots: int) -> np.ndarray:
+        """Sorted slots that have every one of the trigrams."""
+        lists = sorted((self.get(int(c)) for c in np.unique(codes)), key=len)
+        if not lists:
+            return _EMPTY
+        out = lists[0]
+        for arr in lists[1:]:
+            if len(out) == 0:
+                break
+            out = out[_member(out, arr, n_slots)]
+        return out
+
+
+def _member(a: np.ndarray, b: np.ndarray, n_slots: int) -> np.ndarray:
+    """a in b for slot arrays, through a dense mask instead of sorting."""
+    m = np.zeros(n_slots, dtype=bool)
+    m[b] = True
+    return m[a]
+
+
+_BLANK = (32 << 16) | (32 << 8) | 32
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+class SearchIndex:
+    """
+    Trigram index over patients, sessions, devices and alerts. Posting lists are
+    sorted slot arrays, so a query is a few numpy intersections; one lookup answers
+    substring, word prefix and ID suffix matches alike. sync() only indexes entities
+    whose text changed since the last sync of that kind; they go to a small delta
+    that is folded into the arrays once it grows.
+    """
+
+    # fold the delta into the posting arrays past this many (trigram, slot) pairs
+    max_delta = 20_000
+
+    def __init__(self):
+        self._kind: list[str] = []
+        self._meta: list[tuple] = []  # slot -> (id, label, sub, patient_id, folded text, title)
+        self._slots: dict[tuple[str, str], int] = {}
+        self._dead: set[int] = set()
+        self._texts: dict[str, pd.Series] = {}  # kind -> id -> signature, as last synced
+        self._synced_at: dict[str, float] = {}
+        self._grams = _Postings(_EMPTY, _EMPTY)
+        self._title = _Postings(_EMPTY, _EMPTY)
+        self._kind_codes = np.empty(0, dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def synced_at(self, kind: str) -> float:
+        return self._synced_at.get(kind, float("-inf"))
+
+    def _rebuild(self):
+        # compact: live entities get fresh, dense slots
+        live = sorted(self._slots.items(), key=lambda kv: kv[1])
+        self._kind = [self._kind[s] for _, s in live]
+        self._meta = [self._meta[s] for _, s in live]
+        self._slots = {k: i for i, (k, _) in enumerate(live)}
+        self._dead = set()
+        slots = np.arange(len(live))
+        self._grams = _Postings(*_gram_pairs([m[4] for m in self._meta], slots))
+        self._title = _Postings(*_gram_pairs([m[5] for m in self._meta], slots))
+
+    def sync(self, kind: str, df: pd.DataFrame) -> int:
+        """Bring one entity kind in line with a freshly fetched frame; returns entities re-indexed or dropped."""
+        if df is None or kind not in ENTITY_BUILDERS:
+            return 0
+        ents = ENTITY_BUILDERS[kind](df) if len(df) else pd.DataFrame(columns=["id", "label", "sub", "patient_id", "title", "text"])
+        ents = ents[ents["id"] != ""].drop_duplicates("id", keep="last").set_index("id", drop=False)
+        sig = ents["text"] + "\x1f" + ents["label"] + "\x1f" + ents["sub"] + "\x1f" + ents["title"]
+
+        prev = self._texts.get(kind, pd.Series(dtype="string"))
+        changed = ents[sig.ne(prev.reindex(sig.index)).fillna(True).to_numpy(dtype=bool)]
+        gone = prev.index.difference(sig.index)
+        self._texts[kind] = sig
+        self._synced_at[kind] = time.monotonic()
+        if len(changed) == 0 and len(gone) == 0:
+            return 0
+
+        for eid in [*gone, *changed["id"].tolist()]:
+            old = self._slots.pop((kind, str(eid)), None)
+            if old is not None:
+                self._dead.add(old)
+
+        first = len(self._meta)
+        cols = [changed[c].tolist() for c in ("id", "label", "sub", "patient_id", "text", "title")]
+        for eid, label, sub, pid, text, title in zip(*cols):
+            self._slots[(kind, eid)] = len(self._meta)
+            self._kind.append(kind)
+            self._meta.append((eid, label, sub, pid, _fold(text), _fold(title)))
+        new = np.arange(first, len(self._meta))
+
+        grams = _gram_pairs([m[4] for m in self._meta[first:]], new)
+        if len(grams[0]) + self._grams.delta_size > self.max_delta or len(self._dead) > len(self._slots):
+            self._rebuild()
+        elif len(new):
+            self._grams.add(*grams)
+            self._title.add(*_gram_pairs([m[5] for m in self._meta[first:]], new))
+        self._kind_codes = np.fromiter((SEARCH_KINDS.index(k) for k in self._kind), dtype=np.int8, count=len(self._kind))
+        return len(changed) + len(gone)
+
+    def search(self, query: str, limit: int = 10, kinds: Optional[tuple[str, ...]] = None) -> pd.DataFrame:
+        """
+        Entities matching every query word (as a substring when 3+ characters, else as a
+        word prefix), ranked by how they match: word prefix and title prefix beat a bare
+        substring, and a query that ends an ID (e.g. its last 4 characters) scores too.
+        """
+        tokens = _WORD.findall(_fold(query or ""))
+        if not tokens or not self._slots:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        n = len(self._meta)
+        cand: Optional[np.ndarray] = None
+        score: Optional[np.ndarray] = None
+        for t in tokens:
+            pre = _codes(("  " + t)[i : i + 3] for i in range(len(t)))
+            prefix = self._grams.all_of(pre, n)
+            sub = self._grams.all_of(_codes(t[i : i + 3] for i in range(len(t) - 2)), n) if len(t) >= 3 else prefix
+            if cand is not None:
+                sub = sub[_member(sub, cand, n)]
+            if len(sub) == 0:
+                return pd.DataFrame(columns=RESULT_COLUMNS)
+
+            s = 1.0 + 2.0 * _member(sub, prefix, n) + 2.0 * _member(sub, self._title.all_of(pre, n), n)
+            if len(t) >= 3:
+                s += _member(sub, self._grams.all_of(_codes((t + " ")[i : i + 3] for i in range(len(t) - 1)), n), n)
+            if cand is not None:
+                s += score[np.searchsorted(cand, sub)]
+            cand, score = sub, s
+
+        keep = np.ones(len(cand), dtype=bool)
+        if self._dead:
+            keep &= ~_member(cand, np.fromiter(self._dead, dtype=np.int64), n)
+        if kinds:
+            keep &= np.isin(self._kind_codes[cand], [SEARCH_KINDS.index(k) for k in kinds])
+        cand, score = cand[keep], score[keep] + _BOOST[self._kind_codes[cand[keep]]]
+
+        # trigrams only narrow the candidates; confirm the longer words while walking the ranking
+        long_tokens = [t for t in tokens if len(t) > 3]
+        rows = []
+        for i in np.argsort(-score, kind="stable"):
+            slot = int(cand[i])
+            eid, label, sub, pid, text, _ = self._meta[slot]
+            if all(t in text for t in long_tokens):
+                rows.append((self._kind[slot], eid, label, sub, pid, float(score[i])))
+                if len(rows) >= limit:
+                    break
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
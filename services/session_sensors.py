@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# metrics shown against the rep timeline in Session Review
+SESSION_METRICS = ["HR", "SPO2", "LOADCELL_KG"]
+
+
+def rep_timeline(reps: pd.DataFrame, started_at, ended_at) -> pd.DataFrame:
+    """
+    Rep table with a UTC `rep_ts` for every rep. Reps the backend did not timestamp are
+    spread evenly over the session (rep i of n at the end of its slice).
+    """
+    reps = reps.copy()
+    if "rep_ts" not in reps.columns:
+        reps["rep_ts"] = pd.NaT
+    reps["rep_ts"] = pd.to_datetime(reps["rep_ts"], errors="coerce", utc=True)
+
+    missing = reps["rep_ts"].isna().to_numpy()
+    start, end = pd.Timestamp(started_at), pd.Timestamp(ended_at)
+    if missing.any() and pd.notna(start) and pd.notna(end) and end > start:
+        start = start.tz_localize("UTC") if start.tzinfo is None else start.tz_convert("UTC")
+        end = end.tz_localize("UTC") if end.tzinfo is None else end.tz_convert("UTC")
+        n = len(reps)
+        frac = (np.arange(n, dtype=np.float64) + 1.0) / n
+        est = start + pd.to_timedelta(frac * (end - start).value, unit="ns")
+        reps.loc[missing, "rep_ts"] = est[missing]
+    reps.attrs["estimated"] = bool(missing.any())
+    return reps.dropna(subset=["rep_ts"]).sort_values("rep_ts", kind="stable").reset_index(drop=True)
+
+
+def overlay_reps(reps: pd.DataFrame, readings: pd.DataFrame, tolerance_s: float = 30.0) -> pd.DataFrame:
+    """As-of join: each rep gets the latest reading of every metric at or before its rep_ts."""
+    if len(reps) == 0:
+        return reps
+    if len(readings) == 0:
+        return reps.assign(**{m: np.nan for m in readings.columns if m != "ts"})
+    # merge_asof needs identical datetime units on both keys
+    reps = reps.assign(rep_ts=reps["rep_ts"].astype("datetime64[ms, UTC]"))
+    readings = readings.assign(ts=pd.to_datetime(readings["ts"], utc=True).astype("datetime64[ms, UTC]"))
+    out = pd.merge_asof(
+        reps,
+        readings.sort_values("ts", kind="stable"),
+        left_on="rep_ts",
+        right_on="ts",
+        direction="backward",
+        tolerance=pd.Timedelta(seconds=tolerance_s),
+    )
+    out.attrs.update(reps.attrs)
+    out.attrs["units"] = readings.attrs.get("units", {})
+    return out.drop(columns=["ts"]).sort_values("rep_index", kind="stable").reset_index(drop=True)
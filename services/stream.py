@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import weakref
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import requests
+
+from services.metric_registry import canonicalize
+from services.timeseries import now_ms
+
+
+def _ts_ms(raw) -> int:
+    if raw is None:
+        return now_ms()
+    try:
+        ts = pd.Timestamp(raw)
+        ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts
+        return int(ts.value // 1_000_000)
+    except Exception:
+        return now_ms()
+
+
+class _NoStreamEndpoint(Exception):
+    pass
+
+
+class DeviceStream:
+    """
+    One long-lived subscription for a device. Reads Server-Sent Events from
+    GET /devices/{id}/sensor-readings/stream; if the backend has no such endpoint, or
+    the stream fails max_failures times in a row, it polls
+    /devices/{id}/sensor-readings/latest and tries the stream again after
+    stream_retry_s. Either way readings land in per-metric ring buffers the live
+    cards read from. The thread ends by itself once nobody has read from it for idle_s.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        device_id: str,
+        buffer_len: int = 2048,
+        poll_s: float = 3.0,
+        max_failures: int = 3,
+        idle_s: float = 120.0,
+        on_rows=None,
+        stream_retry_s: float = 60.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.device_id = str(device_id)
+        self.buffer_len = int(buffer_len)
+        self.poll_s = float(poll_s)
+        self.max_failures = int(max_failures)
+        self.idle_s = float(idle_s)
+        # polling falls back to the stream after this long (doubling while it keeps failing)
+        self.stream_retry_s = float(stream_retry_s)
+        self.got_event = False
+        # called with each batch of readings (device_id, metric, value, ts) as it arrives
+        self.on_rows = on_rows
+        self.mode = "connecting"  # connecting | stream | poll
+        self.error = ""
+        self.last_event_at = 0.0
+        self.last_read_at = time.monotonic()
+
+        self._lock = threading.Lock()
+        self._latest: dict[str, object] = {}
+        self._buffers: dict[str, deque] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"sensor-stream-{self.device_id}", daemon=True)
+        self._thread.start()
+
+    # ---------- reader side ----------
+    def latest(self) -> dict:
+        self.last_read_at = time.monotonic()
+        with self._lock:
+            return dict(self._latest)
+
+    def series(self, metric: str) -> tuple[np.ndarray, np.ndarray]:
+        self.last_read_at = time.monotonic()
+        with self._lock:
+            buf = list(self._buffers.get(metric, ()))
+        if not buf:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        arr = np.asarray(buf, dtype=np.float64)
+        return arr[:, 0].astype(np.int64), arr[:, 1]
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    @property
+    def idle(self) -> bool:
+        return time.monotonic() - self.last_read_at > self.idle_s
+
+    def stop(self):
+        self._stop.set()
+
+    # ---------- writer side ----------
+    def _push(self, rows: list[dict]):
+        rows = [r for r in rows if r.get("metric")]
+        codes = canonicalize(pd.Series([r["metric"] for r in rows], dtype=object)) if rows else ()
+        with self._lock:
+            for r, m in zip(rows, codes):
+                v = r.get("value")
+                self._latest[m] = v
+                try:
+                    fv = float(v)
+                except (TypeError, ValueError):
+                    continue
+                buf = self._buffers.get(m)
+                if buf is None:
+                    buf = self._buffers[m] = deque(maxlen=self.buffer_len)
+                buf.append((_ts_ms(r.get("ts")), fv))
+        if rows:
+            self.last_event_at = time.monotonic()
+            if self.on_rows is not None:
+                self.on_rows(
+                    pd.DataFrame(
+                        {
+                            "device_id": self.device_id,
+                            "metric": list(codes),
+                            "value": [r.get("value") for r in rows],
+                            "ts": [r.get("ts") for r in rows],
+                        }
+                    )
+                )
+
+    def _run(self):
+        backoff = 1.0
+        failures = 0
+        retry_s = self.stream_retry_s
+        retry_at = 0.0
+        while not self._stop.is_set() and not self.idle:
+            if self.mode == "poll":
+                if time.monotonic() < retry_at:
+                    self._poll_once()
+                    self._stop.wait(self.poll_s)
+                    continue
+                # give the stream another chance now and then; a proxy or backend may recover
+                self.mode = "connecting"
+            self.got_event = False
+            try:
+                self._stream_once()
+            except _NoStreamEndpoint:
+                self.mode = "poll"
+                retry_at = time.monotonic() + self.stream_retry_s * 10
+                continue
+            except Exception as e:
+                self.error = str(e)[:200]
+            # a read timeout after events have arrived is a quiet spell, not a broken stream
+            if self.got_event:
+                failures, backoff, retry_s = 0, 1.0, self.stream_retry_s
+                self._stop.wait(0.5)
+                continue
+            # errors and streams that close (or get buffered) without a single event
+            failures += 1
+            if failures >= self.max_failures:
+                self.mode = "poll"
+                failures = 0
+                retry_at = time.monotonic() + retry_s
+                retry_s = min(retry_s * 2, 30 * 60.0)
+                continue
+            self._poll_once()
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _stream_once(self):
+        """Read one stream connection until it ends; sets got_event once any event arrives."""
+        url = f"{self.base_url}/devices/{self.device_id}/sensor-readings/stream"
+        with requests.get(url, stream=True, timeout=(5, 30), headers={"Accept": "text/event-stream"}) as r:
+            if r.status_code in (404, 405, 501):
+                raise _NoStreamEndpoint()
+            r.raise_for_status()
+            self.mode = "stream"
+            data: list[str] = []
+            for line in r.iter_lines(decode_unicode=True):
+                if self._stop.is_set() or self.idle:
+                    return
+                if line is None:
+                    continue
+                if line == "":
+                    if data:
+                        self._push(_parse_event("\n".join(data)))
+                        self.got_event = True
+                        data = []
+                elif line.startswith("data:"):
+                    data.append(line[5:].lstrip())
+                # ":" comments are keep-alives; event/id/retry fields are not used
+
+    def _poll_once(self):
+        try:
+            r = requests.get(f"{self.base_url}/devices/{self.device_id}/sensor-readings/latest", timeout=12)
+            r.raise_for_status()
+            self._push([x for x in (r.json() or []) if isinstance(x, dict)])
+            self.error = ""
+        except Exception as e:
+            self.error = str(e)[:200]
+
+
+def _parse_event(payload: str) -> list[dict]:
+    try:
+        obj = json.loads(payload)
+    except Exception:
+        return []
+    if isinstance(obj, dict):
+        obj = obj.get("readings", obj.get("items", [obj]))
+    return [x for x in obj if isinstance(x, dict)] if isinstance(obj, list) else []
+
+
+class StreamHub:
+    """One DeviceStream per device, shared by every session talking to the same backend."""
+
+    def __init__(self, base_url: str, idle_s: float = 120.0):
+        self.base_url = base_url
+        self.idle_s = float(idle_s)
+        self._streams: dict[str, DeviceStream] = {}
+        self._lock = threading.Lock()
+        # weak refs: sessions come and go, and a dead session's sink must not be kept alive
+        self._sinks: list[weakref.WeakMethod] = []
+
+    def add_sink(self, fn):
+        """Also hand every streamed batch to fn(df) (a bound method, held weakly)."""
+        with self._lock:
+            self._sinks = [w for w in self._sinks if w() is not None]
+            self._sinks.append(weakref.WeakMethod(fn))
+
+    def _emit(self, df: pd.DataFrame):
+        for w in list(self._sinks):
+            fn = w()
+            if fn is not None:
+                try:
+                    fn(df)
+                except Exception:
+                    pass
+
+    def subscribe(self, device_id: str) -> DeviceStream:
+        did = str(device_id)
+        with self._lock:
+            self._reap()
+            s = self._streams.get(did)
+            if s is None or not s.alive:
+                s = self._streams[did] = DeviceStream(self.base_url, did, idle_s=self.idle_s, on_rows=self._emit)
+            s.last_read_at = time.monotonic()
+            return s
+
+    def _reap(self):
+        # idle streams stop their own threads; this only forgets them
+        for did, s in list(self._streams.items()):
+            if s.idle or not s.alive:
+                s.stop()
+                del self._streams[did]
+
+
+_HUBS: dict[str, StreamHub] = {}
+_HUBS_LOCK = threading.Lock()
+
+
+def get_hub(base_url: str) -> StreamHub:
+    with _HUBS_LOCK:
+        hub = _HUBS.get(base_url)
+        if hub is None:
+            hub = _HUBS[base_url] = StreamHub(base_url)
+        return hub
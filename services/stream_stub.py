@@ -0,0 +1,121 @@
+"""
+Offline stub backend for the live sensor stream.
+
+    python -m services.stream_stub --port 8765
+    PHYSIOTRACK_API_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+Serves synthetic readings for any device id:
+  GET /health
+  GET /devices                                  (dev-001..dev-003)
+  GET /devices/{id}/sensor-readings/latest
+  GET /devices/{id}/sensor-readings/stream      (text/event-stream, 1 event/s)
+Use --no-stream to answer 404 on the stream endpoint and exercise the polling fallback,
+or --stream-error 503 to fail it with another status (fallback after repeated failures).
+Other list endpoints return [] so the rest of the dashboard still renders.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEVICES = ["dev-001", "dev-002", "dev-003"]
+
+
+def _reading_set(device_id: str) -> list[dict]:
+    t = time.time()
+    ts = datetime.fromtimestamp(t, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+    phase = (sum(map(ord, device_id)) % 10) / 10.0
+    values = {
+        "HR": 72 + 8 * math.sin(t / 20 + phase) + random.uniform(-1, 1),
+        "SPO2": 97 + random.uniform(-1, 1),
+        "ECG": math.sin(t * 2 * math.pi * 1.2) ** 15 + random.uniform(-0.05, 0.05),
+        "TEMP_DS18B20": 36.6 + random.uniform(-0.1, 0.1),
+        "LOADCELL_KG": max(0.0, 12 + 6 * math.sin(t / 4 + phase)),
+    }
+    return [{"device_id": device_id, "metric": m, "value": round(v, 3), "ts": ts} for m, v in values.items()]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    stream_enabled = True
+    stream_error = 0
+    protocol_version = "HTTP/1.1"
+
+    def _json(self, obj, status: int = 200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        parts = path.strip("/").split("/")
+
+        if path == "/health":
+            return self._json({"ok": True})
+        if path == "/devices":
+            return self._json([{"device_id": d, "status": "online", "last_seen_at": _reading_set(d)[0]["ts"]} for d in DEVICES])
+        if len(parts) == 4 and parts[0] == "devices" and parts[2] == "sensor-readings":
+            if parts[3] == "latest":
+                return self._json(_reading_set(parts[1]))
+            if parts[3] == "stream":
+                if not self.stream_enabled:
+                    return self._json({"detail": "Not Found"}, status=404)
+                if self.stream_error:
+                    return self._json({"detail": "stream unavailable"}, status=self.stream_error)
+                return self._stream(parts[1])
+        if parts and parts[0] in ("patients", "sessions", "alerts", "exercises", "assignments", "notes", "sensor-readings"):
+            return self._json([])
+        return self._json({"detail": "Not Found"}, status=404)
+
+    def _stream(self, device_id: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            while True:
+                payload = json.dumps(_reading_set(device_id))
+                self.wfile.write(f"data: {payload}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(1.0)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, stream: bool = True, stream_error: int = 0) -> ThreadingHTTPServer:
+    handler = type("StubHandler", (_Handler,), {"stream_enabled": stream, "stream_error": int(stream_error)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="PhysioTrack stub sensor stream server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--no-stream", action="store_true", help="404 the stream endpoint to test polling fallback")
+    ap.add_argument("--stream-error", type=int, default=0, help="answer the stream endpoint with this HTTP status")
+    args = ap.parse_args()
+
+    server = serve(args.host, args.port, stream=not args.no_stream, stream_error=args.stream_error)
+    print(f"stub stream server on http://{args.host}:{args.port} (stream={'off' if args.no_stream else 'on'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
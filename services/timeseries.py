@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+
+SENSOR_COLUMNS = ["ts", "value", "unit"]
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def iso_z(dt) -> str:
+    # backend accepts ISO with Z; ints are epoch milliseconds
+    if isinstance(dt, (int, np.integer)):
+        ts = pd.Timestamp(int(dt), unit="ms", tz="UTC")
+    else:
+        ts = pd.Timestamp(dt)
+        ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.isoformat().replace("+00:00", "Z")
+
+
+def to_utc(series) -> pd.Series:
+    return pd.to_datetime(series, errors="coerce", utc=True, format="ISO8601")
+
+
+def to_epoch_ms(series) -> np.ndarray:
+    """UTC datetimes (NaT-free) -> int64 epoch milliseconds."""
+    return pd.DatetimeIndex(series).as_unit("ms").asi8
+
+
+def from_epoch_ms(ms) -> pd.DatetimeIndex:
+    return pd.to_datetime(np.asarray(ms, dtype=np.int64), unit="ms", utc=True)
+
+
+def readings_frame(items, extra: tuple[str, ...] = ()) -> pd.DataFrame:
+    """
+    JSON rows from /sensor-readings -> columnar frame (ts UTC, value float, unit str),
+    converted in one vectorized pass instead of row by row.
+    """
+    cols = SENSOR_COLUMNS + [c for c in extra if c not in SENSOR_COLUMNS]
+    df = pd.DataFrame.from_records(items or [], columns=cols)
+    if len(df) == 0:
+        empty = {"ts": pd.Series(dtype="datetime64[ns, UTC]"), "value": pd.Series(dtype=float), "unit": pd.Series(dtype=str)}
+        empty.update({c: pd.Series(dtype=object) for c in cols if c not in empty})
+        return pd.DataFrame(empty)
+
+    df["ts"] = to_utc(df["ts"])
+    df["value"] = pd.to_numeric(df["value"], errors="coerce")
+    df["unit"] = df["unit"].fillna("").astype(str)
+    df = df.dropna(subset=["ts", "value"])
+    return df.sort_values("ts", kind="stable").reset_index(drop=True)
+
+
+def minmax_decimate(ts: np.ndarray, values: np.ndarray, n_buckets: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Keep the min and max sample of each of n_buckets equal-count buckets, in time order.
+    Peaks (e.g. ECG R waves) survive, unlike plain striding.
+    """
+    n = len(ts)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return ts, values
+    size = -(-n // n_buckets)
+    m = n // size * size
+    v = np.asarray(values[:m]).reshape(-1, size)
+    base = np.arange(0, m, size)
+    parts = [base + v.argmin(axis=1), base + v.argmax(axis=1)]
+    if m < n:
+        rest = np.asarray(values[m:])
+        parts.append(np.array([m + rest.argmin(), m + rest.argmax()]))
+    idx = np.unique(np.concatenate(parts))
+    return ts[idx], values[idx]
+
+
+def page_readings(repo, device_id: str, metric: str, cursor: int, end_ms: int, budget: int, page_limit: int, sink):
+    """
+    Page /sensor-readings over [cursor, end_ms) in ascending order, handing each page to
+    sink(df). Everything before the returned cursor has been delivered; returns
+    (cursor, requests used). A failed request spends the whole budget so callers stop
+    for this rerun and resume from the cursor next time.
+    """
+    used = 0
+    while used < budget:
+        try:
+            df = repo.list_sensor_readings(device_id, metric, start=cursor, end=end_ms, order="asc", limit=page_limit)
+        except Exception:
+            return cursor, budget
+        used += 1
+        ts_ms = to_epoch_ms(df["ts"])
+        if len(df) < page_limit:
+            sink(df[(ts_ms >= cursor) & (ts_ms < end_ms)])
+            return end_ms, used
+
+        # full page: keep rows strictly before the last timestamp and restart from it
+        last = int(ts_ms[-1])
+        if last <= cursor:
+            sink(df[ts_ms >= cursor])
+            cursor += 1
+        else:
+            sink(df[(ts_ms >= cursor) & (ts_ms < last)])
+            cursor = last
+    return cursor, used
+
+
+def align_metrics(df: pd.DataFrame, metrics: list[str]) -> pd.DataFrame:
+    """Long (ts, metric, value, unit) -> one row per ts, one column per metric."""
+    if df is None or len(df) == 0:
+        out = pd.DataFrame(columns=["ts"] + list(metrics))
+        out.attrs["units"] = {}
+        return out
+    wide = (
+        df.pivot_table(index="ts", columns="metric", values="value", aggfunc="last")
+        .reindex(columns=list(metrics))
+        .reset_index()
+    )
+    wide.columns.name = None
+    wide.attrs["units"] = {str(k): str(v) for k, v in df.groupby("metric")["unit"].last().items() if v}
+    return wide
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from services.timeseries import from_epoch_ms, now_ms, page_readings, to_epoch_ms
+
+_TS = np.dtype("<i8")   # epoch ms
+_VAL = np.dtype("<f4")
+_DAY = 86_400_000
+
+DEFAULT_ROOT = Path(os.getenv("PHYSIOTRACK_TS_DIR") or Path(__file__).resolve().parent.parent / ".cache" / "tsstore")
+
+
+def _slug(x) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", str(x)).strip("_") or "_"
+
+
+class MmapSeries:
+    """
+    Append-only columns for one device/metric: <metric>.ts (int64 epoch ms) and
+    <metric>.val (float32), read back through np.memmap so range queries return
+    views into the page cache instead of copies.
+    """
+
+    def __init__(self, prefix: Path):
+        prefix.parent.mkdir(parents=True, exist_ok=True)
+        self._ts_path = Path(f"{prefix}.ts")
+        self._val_path = Path(f"{prefix}.val")
+        self._meta_path = Path(f"{prefix}.json")
+        self.lock = threading.Lock()
+        # held across a whole sync so sessions sharing the series don't race on the cursor
+        self.sync_lock = threading.Lock()
+        self._maps: tuple[np.ndarray, np.ndarray] | None = None
+        self.n = self._recover()
+
+        meta = {}
+        if self._meta_path.exists():
+            try:
+                meta = json.loads(self._meta_path.read_text())
+            except Exception:
+                meta = {}
+        self.since: int | None = meta.get("since")
+        self.synced_to: int | None = meta.get("synced_to")
+        self.unit: str = meta.get("unit") or ""
+        self.retain_ms: int | None = meta.get("retain_ms")
+
+    def _recover(self) -> int:
+        # an interrupted rewrite (trim or late merge): with both files pending nothing was
+        # swapped yet, with only the ts one pending the val column is already swapped and ts has to follow
+        ts_tmp, val_tmp = self._tmp(self._ts_path), self._tmp(self._val_path)
+        if ts_tmp.exists() and val_tmp.exists():
+            ts_tmp.unlink()
+            val_tmp.unlink()
+        elif ts_tmp.exists():
+            os.replace(ts_tmp, self._ts_path)
+        # an interrupted append can leave one column longer than the other
+        for p in (self._ts_path, self._val_path):
+            p.touch(exist_ok=True)
+        n = min(self._ts_path.stat().st_size // _TS.itemsize, self._val_path.stat().st_size // _VAL.itemsize)
+        os.truncate(self._ts_path, n * _TS.itemsize)
+        os.truncate(self._val_path, n * _VAL.itemsize)
+        return int(n)
+
+    @staticmethod
+    def _tmp(path: Path) -> Path:
+        return path.with_name(path.name + ".tmp")
+
+    def save_meta(self):
+        self._meta_path.write_text(json.dumps({"since": self.since, "synced_to": self.synced_to, "unit": self.unit, "retain_ms": self.retain_ms}))
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        n = self.n
+        if self._maps is None or len(self._maps[0]) != n:
+            if n == 0:
+                self._maps = (np.empty(0, dtype=_TS), np.empty(0, dtype=_VAL))
+            else:
+                self._maps = (
+                    np.memmap(self._ts_path, dtype=_TS, mode="r", shape=(n,)),
+                    np.memmap(self._val_path, dtype=_VAL, mode="r", shape=(n,)),
+                )
+        return self._maps
+
+    @property
+    def first_ts(self) -> int | None:
+        return int(self.arrays()[0][0]) if self.n else None
+
+    @property
+    def last_ts(self) -> int | None:
+        return int(self.arrays()[0][-1]) if self.n else None
+
+    def append(self, ts_ms, values) -> int:
+        """
+        Add readings. Ones after the last stored reading are appended; late ones (at or
+        before it) are merged in by rewriting the tail, skipping readings already stored.
+        Returns the number of readings added.
+        """
+        ts_ms = np.asarray(ts_ms, dtype=_TS)
+        values = np.asarray(values, dtype=_VAL)
+        order = np.argsort(ts_ms, kind="stable")
+        ts_ms, values = ts_ms[order], values[order]
+
+        with self.lock:
+            last = self.last_ts
+            if len(ts_ms) == 0:
+                return 0
+            if last is not None and ts_ms[0] <= last:
+                return self._merge(ts_ms, values)
+            with open(self._ts_path, "ab") as f:
+                f.write(ts_ms.tobytes())
+            with open(self._val_path, "ab") as f:
+                f.write(values.tobytes())
+            self.n += len(ts_ms)
+        return int(len(ts_ms))
+
+    def _merge(self, ts_ms: np.ndarray, values: np.ndarray) -> int:
+        # caller holds self.lock; only the stored tail from the first incoming timestamp is compared
+        ts, val = self.arrays()
+        lo = int(np.searchsorted(ts, ts_ms[0], side="left"))
+        stored = set(zip(ts[lo:].tolist(), val[lo:].view(np.int32).tolist()))
+        new = np.fromiter(
+            ((t, v) not in stored for t, v in zip(ts_ms.tolist(), values.view(np.int32).tolist())),
+            dtype=bool,
+            count=len(ts_ms),
+        )
+        ts_ms, values = ts_ms[new], values[new]
+        if len(ts_ms) == 0:
+            return 0
+        tail_ts = np.concatenate([ts[lo:], ts_ms])
+        tail_val = np.concatenate([val[lo:], values])
+        order = np.argsort(tail_ts, kind="stable")
+        self._rewrite(np.concatenate([ts[:lo], tail_ts[order]]), np.concatenate([val[:lo], tail_val[order]]))
+        return int(len(ts_ms))
+
+    def _rewrite(self, keep_ts: np.ndarray, keep_val: np.ndarray):
+        # caller holds self.lock; readers keep their views of the replaced files
+        self._maps = None
+        ts_tmp, val_tmp = self._tmp(self._ts_path), self._tmp(self._val_path)
+        ts_tmp.write_bytes(keep_ts.tobytes())
+        val_tmp.write_bytes(keep_val.tobytes())
+        # val first: _recover completes a rewrite left with only the ts one pending
+        os.replace(val_tmp, self._val_path)
+        os.replace(ts_tmp, self._ts_path)
+        self.n = len(keep_ts)
+
+    def trim(self, before_ms: int, min_rows: int = 0) -> int:
+        """
+        Drop readings older than before_ms by rewriting both columns, once at least
+        min_rows of them are stale. Returns the number of readings dropped.
+        """
+        with self.lock:
+            ts, val = self.arrays()
+            k = int(np.searchsorted(ts, before_ms, side="left"))
+            if k == 0 or k < min_rows:
+                return 0
+            self._rewrite(np.array(ts[k:]), np.array(val[k:]))
+            if self.since is not None and self.since < before_ms:
+                self.since = int(before_ms)
+        return k
+
+    def append_frame(self, df: pd.DataFrame) -> int:
+        if df is None or len(df) == 0:
+            return 0
+        unit = str(df["unit"].iloc[-1] or "").strip() if "unit" in df.columns else ""
+        self.unit = unit or self.unit
+        return self.append(to_epoch_ms(df["ts"]), df["value"].to_numpy())
+
+    def range(self, start_ms: int, end_ms: int) -> tuple[np.ndarray, np.ndarray]:
+        """Zero-copy views of [start_ms, end_ms) found by binary search on ts."""
+        ts, val = self.arrays()
+        lo = int(np.searchsorted(ts, start_ms, side="left"))
+        hi = int(np.searchsorted(ts, end_ms, side="left"))
+        return ts[lo:hi], val[lo:hi]
+
+    def frame(self, start_ms: int, end_ms: int, max_points: int | None = None) -> pd.DataFrame:
+        ts, val = self.range(start_ms, end_ms)
+        if max_points and len(ts) > max_points:
+            step = -(-len(ts) // int(max_points))
+            ts, val = ts[::step], val[::step]
+        return pd.DataFrame({"ts": from_epoch_ms(ts), "value": np.asarray(val, dtype=np.float64)})
+
+
+class TsStore:
+    """
+    On-disk raw sensor history per device/metric, filled forward from /sensor-readings.
+    New series start `history_ms` back; after that each sync pulls what arrived since
+    the last one, so history accumulates across sessions up to `retain_ms` (or the
+    longest history_ms any sync has asked for), after which the oldest readings are
+    cut. Each sync re-reads the last `late_ms` before its cursor, so readings the
+    backend ingests late are merged in rather than skipped.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        history_ms: int = _DAY,
+        retain_ms: int = 7 * _DAY,
+        page_limit: int = 5000,
+        max_requests: int = 12,
+        late_ms: int = 5 * 60_000,
+    ):
+        self.root = Path(root)
+        self.history_ms = int(history_ms)
+        self.retain_ms = int(retain_ms)
+        self.page_limit = int(page_limit)
+        self.max_requests = int(max_requests)
+        self.late_ms = int(late_ms)
+        self._series: dict[tuple[str, str], MmapSeries] = {}
+        self._lock = threading.Lock()
+
+    def series(self, device_id: str, metric: str) -> MmapSeries:
+        key = (str(device_id), str(metric))
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = MmapSeries(self.root / _slug(device_id) / _slug(metric))
+            return s
+
+    def sync(
+        self,
+        repo,
+        device_id: str,
+        metric: str,
+        now: int | None = None,
+        history_ms: int | None = None,
+        page_limit: int | None = None,
+    ) -> MmapSeries:
+        s = self.series(device_id, metric)
+        now = int(now if now is not None else now_ms())
+        history = int(history_ms or self.history_ms)
+        horizon = now - history
+
+        with s.sync_lock:
+            cursor = s.synced_to if s.synced_to is not None else horizon
+            if cursor < horizon:
+                # idle for longer than the history window: leave a gap rather than crawl through it
+                cursor = s.since = horizon
+            if s.since is None:
+                s.since = cursor
+            # re-read the tail of the last sync for late readings; append() skips stored ones
+            cursor = max(cursor - self.late_ms, s.since)
+
+            s.synced_to, _ = page_readings(
+                repo, device_id, metric, cursor, now, self.max_requests, int(page_limit or self.page_limit), s.append_frame
+            )
+            # history_ms is only the backfill horizon; the store is shared, so one caller's
+            # short window must not cut history another one keeps
+            s.retain_ms = max(s.retain_ms or 0, self.retain_ms, history)
+            # rewrite only once a quarter of the file is stale, so each reading is copied a bounded number of times
+            s.trim(now - s.retain_ms, min_rows=max(1, s.n // 4))
+            s.save_meta()
+        return s
+
+    def covers(self, s: MmapSeries, start_ms: int, end_ms: int) -> bool:
+        """True once [start_ms, end_ms) has been filled without gaps."""
+        return s.since is not None and s.synced_to is not None and s.since <= start_ms and s.synced_to >= end_ms
+
+
+_STORES: dict[str, TsStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_store(base_url: str, root: Path | None = None) -> TsStore:
+    # one store per backend and process: Streamlit sessions share the same files
+    path = Path(root or DEFAULT_ROOT) / _slug(base_url)
+    with _STORES_LOCK:
+        store = _STORES.get(str(path))
+        if store is None:
+            store = _STORES[str(path)] = TsStore(path)
+        return store
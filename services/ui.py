@@ -1,6 +1,10 @@
 # services/ui.py
+import time
+
 import streamlit as st
 
+from services.alerts import group_alerts
+
 # =====================
 # THEME TOKENS 
 # =====================
@@ -337,23 +341,36 @@ def notif_popover(repo=None):
 
     if repo is not None:
         try:
-            adf = repo.list_alerts(status="open")
-            if adf is not None and len(adf) > 0:
-                if "created_at" in adf.columns:
-                    adf = adf.sort_values(["created_at"], ascending=False)
-                open_count = int(len(adf))
-                for _, r in adf.head(6).iterrows():
+            adf = repo.open_alert_feed()
+            open_count = int(repo.alert_feed.open_count)
+            if len(adf) > 0:
+                for r in group_alerts(adf).head(6).to_dict("records"):
+                    times = f" ×{r['count']}" if r["count"] > 1 else ""
                     items.append(
                         {
-                            "title": f"{str(r.get('severity','med')).upper()} • {r.get('patient_name','Patient')}",
+                            "title": f"{str(r.get('severity','med')).upper()} • {r.get('patient_name','Patient')}{times}",
                             "body": str(r.get("message", "")),
-                            "meta": str(r.get("created_at", ""))[:16],
+                            "meta": str(r.get("last_seen", ""))[:16],
                         }
                     )
         except Exception:
             items = []
             open_count = 0
 
+        # provisional alerts already raised by the local anomaly engine (no extra requests)
+        engine = getattr(repo, "anomalies", None)
+        prov = engine.alerts() if engine is not None else None
+        if prov is not None and len(prov):
+            open_count += int(len(prov))
+            items = [
+                {
+                    "title": f"LOCAL • {str(r.get('severity', 'med')).upper()} • {r.get('patient_name', 'Patient')}",
+                    "body": str(r.get("message", "")),
+                    "meta": str(r.get("last_seen_at", ""))[:16],
+                }
+                for r in prov.head(3).to_dict("records")
+            ] + items[:6 - min(3, len(prov))]
+
     label = f"🔔{_superscript(open_count)}" if open_count > 0 else "🔔"
 
     popover_fn = getattr(st, "popover", None)
@@ -391,6 +408,26 @@ def notif_popover(repo=None):
             goto_page("Alerts")
             st.rerun()
 
+def stale_device_toasts(repo=None, minutes: float = 10.0):
+    # local staleness alert: one toast per device when it crosses the threshold
+    hb = getattr(repo, "heartbeats", None) if repo is not None else None
+    if hb is None or len(hb) == 0:
+        return
+    if time.monotonic() - hb.refreshed_at > minutes * 60:
+        # index not fed recently: "silent" would only mean "not polled"
+        return
+    fresh = hb.new_stale(minutes)
+    toast_fn = getattr(st, "toast", None)
+    for did in fresh[:5]:
+        msg = f"Device {did} silent for more than {int(minutes)} min"
+        if toast_fn is not None:
+            toast_fn(msg, icon="📡")
+        else:
+            st.warning(msg)
+    if len(fresh) > 5 and toast_fn is not None:
+        toast_fn(f"+{len(fresh) - 5} more devices went silent", icon="📡")
+
+
 def profile_popover():
     name = st.session_state.get("auth_name", "User")
     role = st.session_state.get("auth_role", "user")
@@ -418,6 +455,52 @@ def profile_popover():
             st.rerun()
 
 
+# =====================
+# SEARCH RESULTS (under the topbar search box)
+# =====================
+_SEARCH_ICONS = {"patient": "🧑‍⚕️", "session": "📅", "device": "📟", "alert": "🔔"}
+
+
+def _open_search_result(kind: str, entity_id: str, patient_id: str):
+    if kind == "patient":
+        st.session_state.selected_patient_id = entity_id
+        st.session_state["patients_tbl_sel"] = entity_id
+        goto_page("Patients")
+    elif kind == "session":
+        st.session_state.selected_patient_id = patient_id or None
+        st.session_state.selected_session_id = entity_id
+        st.session_state["sessions_tbl_sel"] = entity_id
+        goto_page("Sessions")
+    elif kind == "device":
+        st.session_state.selected_device_id = entity_id
+        st.session_state["devices_tbl_sel"] = entity_id
+        goto_page("Devices")
+    else:
+        goto_page("Alerts")
+    st.session_state["search_q"] = ""
+
+
+def search_results(repo, query: str, limit: int = 8):
+    if repo is None or not (query or "").strip():
+        return
+    try:
+        res = repo.search(query, limit=limit)
+    except Exception:
+        return
+    if len(res) == 0:
+        st.caption("No matches.")
+        return
+    for i, r in enumerate(res.to_dict("records")):
+        sub = f" — {r['sub']}" if r["sub"] else ""
+        st.button(
+            f"{_SEARCH_ICONS.get(r['kind'], '•')}  {r['label'] or r['id']}{sub}",
+            key=f"search_hit_{i}",
+            on_click=_open_search_result,
+            args=(r["kind"], r["id"], r["patient_id"]),
+            use_container_width=True,
+        )
+
+
 # =====================
 # TOPBAR (Search + notif + profile) -> 1 wrapper border yang sama
 # =====================
@@ -436,10 +519,12 @@ def topbar(repo=None):
                 key="search_q",
                 label_visibility="collapsed",
             )
+            search_results(repo, st.session_state.get("search_q", ""))
 
         with right:
             c1, c2 = st.columns([1, 1], gap="small")
             with c1:
                 notif_popover(repo)
+                stale_device_toasts(repo, minutes=float(st.session_state.get("stale_minutes", 10)))
             with c2:
                 profile_popover()
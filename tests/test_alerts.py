@@ -0,0 +1,54 @@
+import pandas as pd
+
+from services.alerts import AlertFeed, AnomalyEngine
+
+
+def _snap(values, ts=None):
+    df = pd.DataFrame({"device_id": "dev-1", "metric": ["HR", "SPO2"], "value": values})
+    if ts is not None:
+        df["ts"] = ts
+    return df
+
+
+def test_refeeding_a_timestamped_snapshot_is_ignored():
+    e = AnomalyEngine()
+    snap = _snap([80, 97], ts=[1_000, 1_000])
+    assert e.ingest(snap) == 2
+    assert e.ingest(snap) == 0
+    assert e.ingest(_snap([81, 96], ts=[2_000, 2_000])) == 2
+    # older than the stream's last sample
+    assert e.ingest(_snap([70, 90], ts=[1_500, 1_500])) == 0
+
+
+def test_refeeding_an_undated_snapshot_is_ignored():
+    e = AnomalyEngine()
+    assert e.ingest(_snap([80, 97])) == 2
+    assert e.ingest(_snap([80, 97])) == 0
+    assert e.ingest(_snap([82, 97])) == 1
+    # unparseable timestamps count as missing
+    assert e.ingest(_snap([82, 97], ts=["bad", None])) == 0
+
+
+def test_non_numeric_values_are_dropped():
+    e = AnomalyEngine()
+    assert e.ingest(_snap(["n/a", None], ts=[1_000, 1_000])) == 0
+    assert e.ingest(pd.DataFrame(columns=["device_id", "metric", "value"])) == 0
+
+
+def test_feed_counts_undated_alerts_once_when_since_is_ignored():
+    alerts = [{"alert_id": "a1", "status": "open", "created_at": "2026-01-01T00:00:00Z"}]
+
+    def get(path, params):
+        # ignores `since`: always the whole open list
+        return list(alerts)
+
+    feed = AlertFeed(full_refresh_s=1e9, min_interval_s=0)
+    assert feed.poll(get, 0.0) and feed.open_count == 1
+    alerts.append({"alert_id": "a2", "status": "open"})
+    alerts.append({"alert_id": "a3", "status": "open", "created_at": "not a date"})
+    for t in (1.0, 2.0, 3.0):
+        feed.poll(get, t)
+    assert feed.open_count == 3
+    df = feed.frame()
+    assert df["alert_id"].tolist()[-1] == "a1"
+    assert df["created_at"].notna().all()
@@ -0,0 +1,44 @@
+import io
+import os
+
+import pandas as pd
+
+from services.exports import csv_tempfile, df_to_csv_bytes, discard_export, sweep_exports, write_csv_chunks
+
+BOM = b"\xef\xbb\xbf"
+
+
+def test_chunks_share_one_header_and_bom():
+    chunks = [
+        pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}),
+        pd.DataFrame({"b": ["z"], "a": [3]}),  # columns in another order
+        pd.DataFrame(columns=["a", "b"]),
+        pd.DataFrame({"a": [4], "b": ["é"]}),
+    ]
+    buf = io.BytesIO()
+    assert write_csv_chunks(chunks, buf) == 4
+    data = buf.getvalue()
+    assert data.startswith(BOM) and data.count(BOM) == 1
+    assert data.decode("utf-8-sig").splitlines() == ["a,b", "1,x", "2,y", "3,z", "4,é"]
+    # the binary file is handed back open
+    assert not buf.closed
+
+
+def test_tempfile_matches_df_to_csv_bytes():
+    df = pd.DataFrame({"a": [1, None], "b": ["x", "y"]})
+    path, rows = csv_tempfile([df])
+    try:
+        assert rows == 2
+        with open(path, "rb") as f:
+            assert f.read() == df_to_csv_bytes(df)
+    finally:
+        discard_export(path)
+    assert not os.path.exists(path)
+    assert df_to_csv_bytes(None).startswith(BOM)
+
+
+def test_sweep_removes_only_old_files():
+    old, _ = csv_tempfile([pd.DataFrame({"a": [1]})])
+    assert sweep_exports(60) == 0 and os.path.exists(old)
+    assert sweep_exports(0) >= 1
+    assert not os.path.exists(old)
@@ -0,0 +1,61 @@
+import pandas as pd
+
+from services.paging import PagedFrame
+
+
+def _frame(n: int = 53) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": [f"p{i:03d}" for i in range(n)],
+            "name": [f"Name {i % 7}" for i in range(n)],
+            "age": [(i * 37) % 90 for i in range(n)],
+        }
+    )
+
+
+def test_pages_cover_every_row_once():
+    pf = PagedFrame(_frame(), search_cols=["name", "id"])
+    seen = []
+    for n in range(3):
+        page, total = pf.page(n, 25)
+        assert total == 53
+        seen += page["id"].tolist()
+    assert sorted(seen) == sorted(_frame()["id"])
+    # past the last page clamps to it
+    assert pf.page(9, 25)[0]["id"].tolist() == seen[50:]
+
+
+def test_sort_and_search():
+    df = _frame()
+    pf = PagedFrame(df, search_cols=["name"])
+    page, total = pf.page(0, 10, sort="age", ascending=False)
+    assert page["age"].tolist() == sorted(df["age"], reverse=True)[:10]
+
+    page, total = pf.page(0, 100, sort="age", query="name 3")
+    expected = df[df["name"] == "Name 3"].sort_values("age", kind="stable")
+    assert total == len(expected)
+    assert page["id"].tolist() == expected["id"].tolist()
+
+
+def test_object_column_sorts_numerically():
+    df = pd.DataFrame({"v": pd.Series(["10", "9", None, "100"], dtype=object)})
+    pf = PagedFrame(df, search_cols=[])
+    assert pf.page(0, 10, sort="v")[0]["v"].tolist()[:3] == ["9", "10", "100"]
+
+
+def test_formatters_apply_to_page_only():
+    df = _frame(5)
+    pf = PagedFrame(df, search_cols=[], formatters={"age": lambda s: s.astype(str) + " y"})
+    page, _ = pf.page(0, 5)
+    assert page["age"].str.endswith(" y").all()
+    assert pf.source["age"].dtype != object
+
+
+def test_key_ignores_columns_not_shown():
+    df = _frame(5).assign(last_seen_at=pd.Timestamp("2026-01-01"))
+    pf = PagedFrame(df, search_cols=[], key_columns=["id", "name"])
+    ticked = df.assign(last_seen_at=pd.Timestamp("2026-01-02"))
+    assert PagedFrame(ticked, search_cols=[], key_columns=["id", "name"]).key == pf.key
+    assert PagedFrame(ticked, search_cols=[]).key != PagedFrame(df, search_cols=[]).key
+    # a built page is reused, not rebuilt
+    assert pf.page(0, 2)[0] is pf.page(0, 2)[0]
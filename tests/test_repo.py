@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+
+# services.repo imports streamlit at module level
+pytest.importorskip("streamlit")
+
+from services.repo import ApiRepo  # noqa: E402
+
+
+@pytest.fixture
+def repo():
+    return ApiRepo("http://backend.test")
+
+
+def test_create_assignments_reports_errors_per_row(repo):
+    posted = []
+
+    def post(path, payload):
+        posted.append(payload)
+        if payload["patient_id"] == "boom":
+            raise RuntimeError("backend down")
+        if payload["patient_id"] == "noid":
+            return {}
+        return {"assignment_id": f"a-{payload['patient_id']}"}
+
+    repo._post = post
+    repo._assignments_cache["p1"] = (0.0, pd.DataFrame())
+    out = repo.create_assignments(
+        [
+            {"patient_id": "p1", "exercise_id": "e1", "sets": 3.0, "reps": float("nan")},
+            {"patient_id": "p2", "exercise_id": "e1", "sets": 0},
+            {"patient_id": "p3", "exercise_id": "e1", "reps": "ten"},
+            {"patient_id": "boom", "exercise_id": "e1"},
+            {"patient_id": "noid", "exercise_id": "e1"},
+        ]
+    )
+    assert out["ok"].tolist() == [True, False, False, False, False]
+    assert out.loc[0, "assignment_id"] == "a-p1"
+    assert out["error"].iloc[1:].notna().all()
+    assert "backend down" in out.loc[3, "error"]
+    # invalid rows never reach the backend; NaN reps are simply left out
+    assert [p["patient_id"] for p in posted] == ["p1", "boom", "noid"]
+    assert posted[0] == {"patient_id": "p1", "exercise_id": "e1", "status": "assigned", "sets": 3}
+    assert repo._assignments_cache == {}
+
+
+def _paged(items, honour_paging=True):
+    calls = []
+
+    def get(path, params=None):
+        calls.append(dict(params or {}))
+        if honour_paging and params and "limit" in params:
+            return items[params["offset"] : params["offset"] + params["limit"]]
+        return list(items)
+
+    return get, calls
+
+
+@pytest.mark.parametrize("n", [0, 3, 10, 11])
+def test_iter_pages_with_paging_backend(repo, n):
+    items = [{"id": i} for i in range(n)]
+    repo._get, calls = _paged(items)
+    pages = list(repo._iter_pages("/things", page_size=5))
+    assert [x for p in pages for x in p] == items
+    assert [c["offset"] for c in calls] == [5 * i for i in range(n // 5 + 1)]
+
+
+@pytest.mark.parametrize("n", [3, 5, 12])
+def test_iter_pages_backend_ignoring_paging(repo, n):
+    items = [{"id": i} for i in range(n)]
+    repo._get, calls = _paged(items, honour_paging=False)
+    pages = list(repo._iter_pages("/things", page_size=5))
+    assert [x for p in pages for x in p] == items
+    assert len(calls) <= 2
+
+
+def test_rep_metrics_of_completed_session_without_reps_is_final(repo):
+    calls = []
+
+    def get(path, params=None):
+        calls.append(path)
+        if path == "/sessions/s1/reps" or path == "/sessions/s2/reps":
+            return []
+        raise RuntimeError("404")
+
+    repo._get = get
+    assert repo.get_rep_metrics("s1", completed=True).empty
+    probes = len(calls)
+    # the answering route is remembered and only that one is asked next time
+    assert repo.get_rep_metrics("s2", completed=True).empty
+    assert calls[probes:] == ["/sessions/s2/reps"]
+    repo._rep_cache["s1"] = (repo._rep_cache["s1"][0], 0.0, repo._rep_cache["s1"][2])
+    repo.get_rep_metrics("s1", completed=True)
+    assert len(calls) == probes + 1
+
+    # nothing answered: not final, retried after the TTL
+    repo._get = lambda path, params=None: (_ for _ in ()).throw(RuntimeError("down"))
+    repo.get_rep_metrics("s3", completed=True)
+    assert repo._rep_cache["s3"][0] is False
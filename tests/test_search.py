@@ -0,0 +1,57 @@
+import pandas as pd
+
+from services.search import SearchIndex
+
+
+def _patients(names):
+    return pd.DataFrame(
+        {
+            "patient_id": [f"pat-{i:04d}" for i in range(len(names))],
+            "name": names,
+            "primary_condition": ["ACL"] * len(names),
+        }
+    )
+
+
+def test_prefix_substring_and_id_suffix():
+    ix = SearchIndex()
+    ix.sync("patient", _patients(["Ana Lopez", "Bram Stoker", "Lopez Ana"]))
+    assert set(ix.search("lop")["label"]) == {"Ana Lopez", "Lopez Ana"}
+    assert set(ix.search("opez")["label"]) == {"Ana Lopez", "Lopez Ana"}
+    assert ix.search("0001")["id"].tolist() == ["pat-0001"]
+    assert len(ix.search("zzz")) == 0
+
+
+def test_accents_are_folded():
+    ix = SearchIndex()
+    ix.sync("patient", _patients(["José Müller"]))
+    for q in ("jose", "muller", "Müller", "JOSÉ mul"):
+        assert ix.search(q)["label"].tolist() == ["José Müller"], q
+
+
+def test_sync_reindexes_changes_and_drops_missing():
+    ix = SearchIndex()
+    ix.sync("patient", _patients(["Ana Lopez", "Bram Stoker"]))
+    assert ix.sync("patient", _patients(["Ana Lopez", "Bram Stoker"])) == 0
+    assert ix.sync("patient", _patients(["Ana Perez"])) == 2
+    assert ix.search("lopez").empty
+    assert ix.search("bram").empty
+    assert ix.search("perez")["label"].tolist() == ["Ana Perez"]
+
+
+def test_matches_brute_force_across_rebuilds():
+    ix = SearchIndex()
+    ix.max_delta = 50
+    names = [f"Patient {w} {i}" for i, w in enumerate(["alpha", "beta", "gamma", "delta"] * 30)]
+    for n in range(10, len(names) + 1, 10):
+        ix.sync("patient", _patients(names[:n]))
+    got = set(ix.search("gamma", limit=1000)["label"])
+    assert got == {n for n in names if "gamma" in n}
+
+
+def test_kinds_filter():
+    ix = SearchIndex()
+    ix.sync("patient", _patients(["Ana Lopez"]))
+    ix.sync("device", pd.DataFrame({"device_id": ["dev-lopez"], "label": ["Grip"], "patient_name": ["Ana Lopez"]}))
+    assert set(ix.search("lopez")["kind"]) == {"patient", "device"}
+    assert ix.search("lopez", kinds=("device",))["kind"].tolist() == ["device"]
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from services.stream import DeviceStream, StreamHub
+from services.stream_stub import serve
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kw) -> str:
+        server = serve(port=0, **kw)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    start.servers = servers
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def _wait(cond, timeout: float = 8.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if cond():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_stream_delivers_readings(stub):
+    s = DeviceStream(stub(), "dev-001", poll_s=0.2)
+    try:
+        assert _wait(lambda: s.mode == "stream" and "HR" in s.latest())
+        assert _wait(lambda: len(s.series("HR")[0]) >= 2)
+        ts, val = s.series("HR")
+        assert (ts[1:] >= ts[:-1]).all()
+    finally:
+        s.stop()
+
+
+def test_missing_stream_endpoint_polls(stub):
+    s = DeviceStream(stub(stream=False), "dev-001", poll_s=0.2)
+    try:
+        assert _wait(lambda: s.mode == "poll" and "SPO2" in s.latest())
+    finally:
+        s.stop()
+
+
+def test_failing_stream_falls_back_to_polling(stub):
+    s = DeviceStream(stub(stream_error=503), "dev-001", poll_s=0.2, max_failures=2)
+    try:
+        # readings arrive while the stream is still being retried, then it switches to polling
+        assert _wait(lambda: "HR" in s.latest())
+        assert _wait(lambda: s.mode == "poll")
+    finally:
+        s.stop()
+
+
+def test_polling_retries_the_stream_once_it_recovers(stub):
+    url = stub(stream_error=503)
+    s = DeviceStream(url, "dev-001", poll_s=0.2, max_failures=1, stream_retry_s=0.5)
+    try:
+        assert _wait(lambda: s.mode == "poll")
+        stub.servers[-1].RequestHandlerClass.stream_error = 0
+        assert _wait(lambda: s.mode == "stream" and s.got_event)
+    finally:
+        s.stop()
+
+
+def test_stream_feeds_sinks_and_buffers(stub):
+    got = []
+
+    class Sink:
+        def ingest(self, df):
+            got.append(df)
+
+    sink = Sink()
+    hub = StreamHub(stub())
+    hub.add_sink(sink.ingest)
+    s = hub.subscribe("dev-001")
+    try:
+        assert _wait(lambda: len(got) > 0)
+        assert set(got[0].columns) == {"device_id", "metric", "value", "ts"}
+        assert _wait(lambda: len(s.series("HR")[0]) >= 2)
+    finally:
+        s.stop()
+
+
+def test_idle_stream_stops_itself(stub):
+    s = DeviceStream(stub(), "dev-001", idle_s=0.5)
+    assert _wait(lambda: not s.alive)
+
+
+def test_hub_shares_and_replaces_streams(stub):
+    hub = StreamHub(stub(), idle_s=0.5)
+    a = hub.subscribe("dev-001")
+    try:
+        assert hub.subscribe("dev-001") is a
+        assert _wait(lambda: not a.alive)
+        b = hub.subscribe("dev-001")
+        assert b is not a and b.alive
+    finally:
+        for s in list(hub._streams.values()):
+            s.stop()
@@ -1,6 +1,7 @@
 # views/charts.py
 import streamlit as st
 import plotly.express as px
+import plotly.graph_objects as go
 
 
 def _apply_white_card_layout(fig, y_range=None, height=280):
@@ -53,3 +54,67 @@ def bar_chart(df, x, y, y_range=None, height=280):
         use_container_width=True,
         config={"displayModeBar": False, "responsive": True},
     )
+
+
+def band_chart(df, x, y, y_lo, y_hi, y_range=None, height=280):
+    # mean line over a shaded min..max envelope (rollup buckets)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df[x], y=df[y_hi], mode="lines", line=dict(width=0), hoverinfo="skip"))
+    fig.add_trace(
+        go.Scatter(
+            x=df[x],
+            y=df[y_lo],
+            mode="lines",
+            line=dict(width=0),
+            fill="tonexty",
+            fillcolor="rgba(67,24,255,0.12)",
+            hoverinfo="skip",
+        )
+    )
+    fig.add_trace(go.Scatter(x=df[x], y=df[y], mode="lines", line=dict(color="#4318FF", width=2), name=y))
+    _apply_white_card_layout(fig, y_range=y_range, height=height)
+
+    st.plotly_chart(
+        fig,
+        use_container_width=True,
+        config={"displayModeBar": False, "responsive": True},
+    )
+
+
+def waveform_chart(x, y, y_range=None, height=280):
+    # WebGL trace: stays interactive with tens of thousands of points
+    fig = go.Figure(go.Scattergl(x=x, y=y, mode="lines", line=dict(color="#EE5D50", width=1)))
+    _apply_white_card_layout(fig, y_range=y_range, height=height)
+
+    st.plotly_chart(
+        fig,
+        use_container_width=True,
+        config={"displayModeBar": True, "responsive": True, "scrollZoom": True},
+    )
+
+
+def state_chart(df, x, y, ticks: dict, height=180):
+    # step line over discrete states (e.g. 0/1/2 -> SAFE/WARNING/DANGER)
+    fig = go.Figure(go.Scatter(x=df[x], y=df[y], mode="lines+markers", line=dict(shape="hv", color="#4318FF", width=2)))
+    levels = sorted(ticks)
+    _apply_white_card_layout(fig, y_range=[levels[0] - 0.4, levels[-1] + 0.4], height=height)
+    fig.update_yaxes(tickmode="array", tickvals=levels, ticktext=[ticks[v] for v in levels])
+
+    st.plotly_chart(
+        fig,
+        use_container_width=True,
+        config={"displayModeBar": False, "responsive": True},
+    )
+
+
+def overlay_chart(df, x, ys, y_range=None, height=280):
+    # one line per column in ys, with a legend to tell them apart
+    fig = px.line(df, x=x, y=ys, markers=True)
+    _apply_white_card_layout(fig, y_range=y_range, height=height)
+    fig.update_layout(showlegend=True, legend=dict(title=None, orientation="h", y=-0.2))
+
+    st.plotly_chart(
+        fig,
+        use_container_width=True,
+        config={"displayModeBar": False, "responsive": True},
+    )
@@ -1,25 +1,118 @@
 import streamlit as st
 import pandas as pd
 
+from services.paging import PagedFrame, frame_fingerprint
+
+
+PAGE_SIZE = 25
+
+
+def _paged_frame(
+    df: pd.DataFrame,
+    key: str,
+    search_cols: list[str],
+    formatters: dict | None = None,
+    key_columns: list[str] | None = None,
+) -> PagedFrame:
+    """The PagedFrame kept for this table; rebuilt only when key_columns (the shown ones) change."""
+    pf = st.session_state.get(f"{key}_pf")
+    if pf is None or pf.key != frame_fingerprint(df, key_columns):
+        pf = PagedFrame(df, search_cols, formatters, key_columns=key_columns)
+        st.session_state[f"{key}_pf"] = pf
+    return pf
+
+
+def _reset_page(key: str):
+    st.session_state[f"{key}_page"] = 0
+
+
+def _turn_page(key: str, step: int):
+    st.session_state[f"{key}_page"] = max(0, int(st.session_state.get(f"{key}_page", 0)) + step)
+
+
+def paged_table(
+    pf: PagedFrame,
+    key: str,
+    columns: list[str],
+    sort_options: dict[str, str],
+    search_placeholder: str = "Search...",
+    page_size: int = PAGE_SIZE,
+    default_desc: bool = False,
+) -> pd.DataFrame:
+    """Search box, sort controls, one page of rows and prev/next; returns the visible page."""
+    c1, c2, c3 = st.columns([0.5, 0.3, 0.2], gap="small")
+    with c1:
+        query = st.text_input(
+            "Search",
+            key=f"{key}_q",
+            placeholder=search_placeholder,
+            label_visibility="collapsed",
+            on_change=_reset_page,
+            args=(key,),
+        )
+    with c2:
+        sort_label = st.selectbox(
+            "Sort by",
+            list(sort_options),
+            key=f"{key}_sort",
+            label_visibility="collapsed",
+            on_change=_reset_page,
+            args=(key,),
+        )
+    with c3:
+        desc = st.toggle("Desc", value=default_desc, key=f"{key}_desc", on_change=_reset_page, args=(key,))
+
+    n = int(st.session_state.get(f"{key}_page", 0))
+    page, total = pf.page(n, page_size, sort=sort_options[sort_label], ascending=not desc, query=query)
+    pages = max(1, -(-total // page_size))
+    n = min(n, pages - 1)
+    st.session_state[f"{key}_page"] = n
+
+    st.dataframe(page[[c for c in columns if c in page.columns]], use_container_width=True, hide_index=True)
+
+    p1, p2, p3 = st.columns([0.15, 0.7, 0.15], gap="small")
+    with p1:
+        st.button("‹ Prev", key=f"{key}_prev", disabled=n == 0, on_click=_turn_page, args=(key, -1), use_container_width=True)
+    with p2:
+        first = n * page_size + 1 if total else 0
+        st.caption(f"Rows {first}–{min(total, (n + 1) * page_size)} of {total:,} • page {n + 1} of {pages}")
+    with p3:
+        st.button("Next ›", key=f"{key}_next", disabled=n >= pages - 1, on_click=_turn_page, args=(key, 1), use_container_width=True)
+    return page
+
+
+def _page_picker(pf: PagedFrame, page: pd.DataFrame, key: str, id_col: str, label_col: str, label: str) -> str | None:
+    """
+    Selectbox over the visible page only (the search box narrows it); the current
+    selection is kept after paging away from its row, as long as it is still in the data.
+    """
+    labels = dict(zip(page[id_col].astype(str), page[label_col].astype(str)))
+    current = st.session_state.get(f"{key}_sel") or ""
+    if current and current not in labels:
+        # selected elsewhere (another page, a search hit): label it from the full data
+        hit = pf.source.loc[pf.source[id_col].astype(str).eq(current), label_col]
+        if len(hit):
+            labels = {current: str(hit.iloc[0]), **labels}
+        else:
+            st.session_state[f"{key}_sel"] = ""
+
+    sel = st.selectbox(
+        label,
+        options=[""] + list(labels),
+        key=f"{key}_sel",
+        format_func=lambda x: labels.get(x, x) if x else "",
+    )
+    return sel or None
+
 
 def patients_table(df: pd.DataFrame) -> str | None:
     if df is None or len(df) == 0:
         st.info("No patients found in database.")
         return None
 
-    id_col = "patient_id" if "patient_id" in df.columns else None
+    df = df.copy()
     name_col = "name" if "name" in df.columns else ("patient_name" if "patient_name" in df.columns else None)
-    id_to_name = {}
-    if id_col and name_col:
-        try:
-            id_to_name = dict(zip(df[id_col].astype(str).tolist(), df[name_col].astype(str).fillna("—").tolist()))
-        except Exception:
-            id_to_name = {}
-
-    def _label(pid: str) -> str:
-        if not pid:
-            return ""
-        return id_to_name.get(str(pid), str(pid))
+    df["_label"] = df[name_col].astype(str).fillna("—") if name_col else df["patient_id"].astype(str)
 
     cols = [
         "patient_id",
@@ -30,16 +123,20 @@ def patients_table(df: pd.DataFrame) -> str | None:
         "active_alerts_count",
         "device_status",
     ]
-    show = df[[c for c in cols if c in df.columns]].copy()
-    st.dataframe(show, use_container_width=True, hide_index=True)
-
-    pid = st.selectbox(
-        "Select patient to view details",
-        options=[""] + df["patient_id"].astype(str).tolist(),
-        index=0,
-        format_func=_label,
+    search_cols = ["name", "patient_id", "primary_condition", "device_id"]
+    pf = _paged_frame(df, "patients_tbl", search_cols=search_cols, key_columns=[*cols, *search_cols, "_label"])
+    page = paged_table(
+        pf,
+        "patients_tbl",
+        cols,
+        sort_options={"Name": "name", "Risk": "active_alerts_count", "Age": "age", "Condition": "primary_condition"},
+        search_placeholder="Search name, ID or condition",
     )
-    return pid or None
+    return _page_picker(pf, page, "patients_tbl", "patient_id", "_label", "Select patient to view details")
+
+
+def _fmt_started(s: pd.Series) -> pd.Series:
+    return pd.to_datetime(s, errors="coerce").dt.strftime("%Y-%m-%d %H:%M")
 
 
 def sessions_table(df: pd.DataFrame) -> str | None:
@@ -57,15 +154,24 @@ def sessions_table(df: pd.DataFrame) -> str | None:
         "grip_avg_kg",
         "status",
     ]
-    show = df[[c for c in cols if c in df.columns]].copy()
-
-    if "started_at" in show.columns:
-        show["started_at"] = pd.to_datetime(show["started_at"], errors="coerce").dt.strftime("%Y-%m-%d %H:%M")
-
-    st.dataframe(show, use_container_width=True, hide_index=True)
-
-    sid = st.selectbox("Select session to review", options=[""] + df["session_id"].astype(str).tolist(), index=0)
-    return sid or None
+    show = df[[c for c in [*cols, "exercise_name"] if c in df.columns]]
+    pf = _paged_frame(
+        show,
+        "sessions_tbl",
+        search_cols=["session_id", "exercise_name", "status"],
+        formatters={"started_at": _fmt_started},
+        key_columns=list(show.columns),
+    )
+    page = paged_table(
+        pf,
+        "sessions_tbl",
+        cols,
+        sort_options={"Started": "started_at", "Duration": "duration_min", "Reps": "rep_count", "Adherence": "adherence_pct", "ROM": "rom_avg_deg"},
+        search_placeholder="Search session ID, exercise or status",
+        default_desc=True,
+    )
+    page = page.assign(_label=page["started_at"].fillna("—").astype(str) + " • " + page["session_id"].astype(str))
+    return _page_picker(pf, page, "sessions_tbl", "session_id", "_label", "Select session to review")
 
 
 def devices_table(df: pd.DataFrame) -> str | None:
@@ -80,7 +186,10 @@ def devices_table(df: pd.DataFrame) -> str | None:
 
     st.dataframe(show, use_container_width=True, hide_index=True)
 
-    did = st.selectbox("Select device to view details", options=[""] + df["device_id"].astype(str).tolist(), index=0)
+    opts = [""] + df["device_id"].astype(str).tolist()
+    if st.session_state.get("devices_tbl_sel") not in opts:
+        st.session_state["devices_tbl_sel"] = ""
+    did = st.selectbox("Select device to view details", options=opts, key="devices_tbl_sel")
     return did or None
 
 
@@ -114,3 +223,40 @@ def alert_cards(df: pd.DataFrame):
                 unsafe_allow_html=True,
             )
         st.markdown("<div style='height:10px'></div>", unsafe_allow_html=True)
+
+
+def alert_group_cards(groups: pd.DataFrame):
+    if groups is None or len(groups) == 0:
+        st.info("No alerts found.")
+        return
+
+    for r in groups.to_dict("records"):
+        sev = str(r.get("severity", "med")).lower()
+        status = str(r.get("status", "open")).lower()
+        n = int(r.get("count") or 0)
+        n_open = int(r.get("open_count") or 0)
+
+        badge = "pill-red" if sev in ("critical",) else ("pill-yellow" if sev in ("warning", "high") else "pill-blue")
+        first_seen, last_seen = str(r.get("first_seen", ""))[:16], str(r.get("last_seen", ""))[:16]
+        seen = last_seen if n == 1 else f"{first_seen} → {last_seen}"
+
+        with st.container(border=True):
+            st.markdown(
+                f"""
+                <div style="display:flex;justify-content:space-between;align-items:center;gap:12px;">
+                  <div style="font-weight:900;color:#2B3674;font-size:16px;">
+                    {r.get("patient_name","—")}
+                    <span class="pill {badge}" style="margin-left:8px;">{sev}</span>
+                    <span class="pill pill-blue" style="margin-left:6px;">{status}</span>
+                    <span class="pill pill-blue" style="margin-left:6px;">×{n}</span>
+                  </div>
+                  <div style="color:#A3AED0;font-size:12px;">Type: {r.get("type","—")}</div>
+                </div>
+                <div style="margin-top:6px;color:#2B3674;">{r.get("message","") or "—"}</div>
+                <div style="margin-top:8px;color:#A3AED0;font-size:12px;">
+                  Seen: {seen} • Open: {n_open}/{n}
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+        st.markdown("<div style='height:10px'></div>", unsafe_allow_html=True)